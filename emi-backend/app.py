@@ -1,45 +1,210 @@
-from flask import Flask, request, jsonify
+import json
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from modelo_consulta import ModeloConsultaEMI
 from dotenv import load_dotenv
 import os
-from scripts.api_llm import consultar_openai
+from scripts.api_llm import consultar_openai, precargar_recursos, estado_recursos, recursos_listos
+from scripts.api_llm import responder_con_faiss_y_openai_stream, obtener_cache_respuestas, agrupador_consultas
+from scripts.api_llm import (cache_embeddings, estadisticas_generacion_local, estadisticas_cliente_openai,
+                             estadisticas_extractiva)
+from scripts.arranque import registrar_carga, reporte_arranque, precargar_en_segundo_plano
+from scripts.memoria_sesiones import nuevo_id_sesion
+from scripts.cola_entrenamiento import ColaEntrenamiento, iniciar_trabajador, MAX_EPOCAS
+from scripts.preguntas_lote import responder_lote, LOTE_CONCURRENCIA, LOTE_MAX_PREGUNTAS
 
 # Cargar variables de entorno
 load_dotenv()
 
-# Inicializar Flask
-app = Flask(__name__)
 
-# Habilitar CORS para permitir conexión desde frontend
-CORS(app)
+def entero_en_rango(valor, minimo: int, maximo: int = None):
+    """El valor como int si es un entero (o su texto) entre minimo y maximo (sin tope si es None); si no, None."""
+    if isinstance(valor, bool) or (isinstance(valor, float) and not valor.is_integer()):
+        return None
+    try:
+        entero = int(valor)
+    except (TypeError, ValueError):
+        return None
+    if entero < minimo or (maximo is not None and entero > maximo):
+        return None
+    return entero
 
-# Instancia del modelo
-modelo = ModeloConsultaEMI()
 
+def crear_app(modelo: ModeloConsultaEMI = None, precarga: str = None) -> Flask:
+    """
+    Construye la aplicación Flask. El modelo se carga una sola vez aquí; en producción
+    (wsgi.py + gunicorn con preload) esto ocurre en el proceso maestro antes del fork.
 
-@app.route("/")
-def home():
-    return jsonify({"mensaje": "API del Asistente EMI funcionando 🚀"})
+    precarga (o PRECARGA_MODELOS) decide cuándo se cargan embeddings, FAISS y metadatos:
+      'sincrona': antes de devolver la app; 'segundo_plano': en un hilo de calentamiento;
+      'perezosa': en la primera pregunta que los necesite.
 
+    ENTRENAMIENTO_TRABAJADOR='proceso' (por defecto) lanza el proceso de fine-tuning junto a la
+    API; con 'externo' se ejecuta aparte: python scripts/cola_entrenamiento.py trabajador
+    """
+    precarga = precarga or os.getenv("PRECARGA_MODELOS", "segundo_plano")
 
-@app.route("/api/preguntar", methods=["POST"])
-def preguntar():
-    data = request.get_json()
-    pregunta = data.get("pregunta")
-    contexto = data.get("contexto", "")
+    # Inicializar Flask
+    app = Flask(__name__)
 
-    if not pregunta:
-        return jsonify({"error": "Debes enviar una pregunta"}), 400
+    # Habilitar CORS para permitir conexión desde frontend
+    CORS(app)
 
-    try:
-        respuesta = modelo.generar_respuesta(pregunta, contexto)
-        return jsonify({"respuesta": respuesta})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    # Instancia del modelo
+    if modelo is None:
+        with registrar_carga("modelo_consulta"):
+            modelo = ModeloConsultaEMI()
+
+    if precarga == "sincrona":
+        precargar_recursos()
+    elif precarga == "segundo_plano":
+        precargar_en_segundo_plano(precargar_recursos, nombre="precarga_recursos")
+
+    cola_entrenamiento = ColaEntrenamiento()
+    if os.getenv("ENTRENAMIENTO_TRABAJADOR", "proceso") == "proceso":
+        iniciar_trabajador()
+
+    @app.route("/")
+    def home():
+        return jsonify({"mensaje": "API del Asistente EMI funcionando 🚀"})
+
+    @app.route("/api/salud")
+    def salud():
+        # Liveness: el proceso responde aunque los modelos aún se estén cargando
+        return jsonify({"estado": "vivo"})
+
+    @app.route("/api/salud/listo")
+    def salud_listo():
+        # Readiness: solo se reciben preguntas cuando los recursos pesados están en memoria
+        listo = recursos_listos()
+        return jsonify({
+            "listo": listo,
+            "recursos": estado_recursos(),
+            "arranque": reporte_arranque()
+        }), 200 if listo else 503
+
+    @app.route("/api/estadisticas")
+    def estadisticas():
+        cache = obtener_cache_respuestas()
+        return jsonify({
+            "cache_respuestas": cache.estadisticas() if cache else None,
+            "lotes_embeddings": agrupador_consultas.estadisticas(),
+            "cache_embeddings": cache_embeddings.estadisticas(),
+            "lotes_generacion_local": estadisticas_generacion_local(),
+            "cliente_openai": estadisticas_cliente_openai(),
+            "respuestas_extractivas": estadisticas_extractiva()
+        })
+
+    @app.route("/api/preguntar", methods=["POST"])
+    def preguntar():
+        data = request.get_json()
+        pregunta = data.get("pregunta")
+        contexto = data.get("contexto", "")
+        # El cliente reenvía el id de sesión recibido para conservar la memoria conversacional
+        sesion_id = data.get("sesion_id") or request.headers.get("X-Sesion-Id") or nuevo_id_sesion()
+
+        if not pregunta:
+            return jsonify({"error": "Debes enviar una pregunta"}), 400
+
+        try:
+            respuesta = modelo.generar_respuesta(pregunta, contexto, sesion_id=sesion_id)
+            return jsonify({"respuesta": respuesta, "sesion_id": sesion_id})
+        except Exception as e:
+            return jsonify({"error": str(e), "sesion_id": sesion_id}), 500
+
+    @app.route("/api/preguntar/stream", methods=["POST"])
+    def preguntar_stream():
+        data = request.get_json()
+        pregunta = data.get("pregunta")
+        contexto = data.get("contexto", "")
+        sesion_id = data.get("sesion_id") or request.headers.get("X-Sesion-Id") or nuevo_id_sesion()
+
+        if not pregunta:
+            return jsonify({"error": "Debes enviar una pregunta"}), 400
+
+        def evento_sse(datos, evento=None):
+            cabecera = f"event: {evento}\n" if evento else ""
+            return f"{cabecera}data: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+        def generar():
+            yield evento_sse({"sesion_id": sesion_id}, "sesion")
+            try:
+                # Saludos, artículos exactos y coincidencias del dataset se resuelven sin el LLM
+                respuesta = modelo.generar_respuesta(pregunta, contexto, sesion_id=sesion_id, usar_llm=False)
+                if respuesta is not None:
+                    yield evento_sse({"texto": respuesta})
+                else:
+                    for fragmento in responder_con_faiss_y_openai_stream(pregunta):
+                        yield evento_sse({"texto": fragmento})
+            except Exception as e:
+                yield evento_sse({"error": str(e)}, "error")
+            yield evento_sse({}, "fin")
+
+        return Response(generar(), mimetype="text/event-stream", headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-Sesion-Id": sesion_id
+        })
+
+    @app.route("/api/preguntar/lote", methods=["POST"])
+    def preguntar_lote():
+        data = request.get_json() or {}
+        preguntas = data.get("preguntas")
+        if not isinstance(preguntas, list) or not preguntas or not all(
+                isinstance(p, str) and p.strip() for p in preguntas):
+            return jsonify({"error": "Debes enviar 'preguntas': una lista de textos"}), 400
+        if len(preguntas) > LOTE_MAX_PREGUNTAS:
+            return jsonify({"error": f"El lote admite hasta {LOTE_MAX_PREGUNTAS} preguntas"}), 413
+        # Una concurrencia mayor que la del servidor se limita a LOTE_CONCURRENCIA
+        concurrencia = entero_en_rango(data.get("concurrencia", LOTE_CONCURRENCIA), 1)
+        if concurrencia is None:
+            return jsonify({"error": "'concurrencia' debe ser un entero mayor que 0"}), 400
+        concurrencia = min(concurrencia, LOTE_CONCURRENCIA)
+
+        def generar():
+            # Una línea JSON por pregunta, en el orden en que terminan ('indice' indica la posición)
+            try:
+                for resultado in responder_lote(preguntas, modelo, concurrencia):
+                    yield json.dumps(resultado, ensure_ascii=False) + "\n"
+            except Exception as e:
+                yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+
+        return Response(generar(), mimetype="application/x-ndjson", headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        })
+
+    @app.route("/api/entrenamiento", methods=["POST"])
+    def encolar_entrenamiento():
+        data = request.get_json() or {}
+        datos = data.get("datos")
+        if not isinstance(datos, list) or not datos or not all(
+                isinstance(d, dict) and d.get("pregunta") and d.get("respuesta") for d in datos):
+            return jsonify({"error": "Debes enviar 'datos': una lista de objetos con pregunta y respuesta"}), 400
+
+        epocas = entero_en_rango(data.get("epocas", 2), 1, MAX_EPOCAS)
+        if epocas is None:
+            return jsonify({"error": f"'epocas' debe ser un entero entre 1 y {MAX_EPOCAS}"}), 400
+
+        # El entrenamiento corre en otro proceso: la respuesta es inmediata
+        trabajo_id = cola_entrenamiento.encolar(datos, epocas=epocas)
+        return jsonify(cola_entrenamiento.estado(trabajo_id)), 202
+
+    @app.route("/api/entrenamiento")
+    def listar_entrenamientos():
+        return jsonify(cola_entrenamiento.listar())
+
+    @app.route("/api/entrenamiento/<trabajo_id>")
+    def estado_entrenamiento(trabajo_id):
+        trabajo = cola_entrenamiento.estado(trabajo_id)
+        if trabajo is None:
+            return jsonify({"error": "Trabajo no encontrado"}), 404
+        return jsonify(trabajo)
+
+    return app
 
 
 if __name__ == "__main__":
+    # Servidor de desarrollo; en producción usar: gunicorn -c gunicorn.conf.py wsgi:app
     port = int(os.environ.get("PORT", 5000))
-    app.run(debug=True, host="0.0.0.0", port=port)
-
+    crear_app().run(debug=True, host="0.0.0.0", port=port)
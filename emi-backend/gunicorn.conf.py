@@ -0,0 +1,37 @@
+import os
+import multiprocessing
+
+# Configuración de producción: gunicorn -c gunicorn.conf.py wsgi:app
+#   WEB_CONCURRENCY   número de procesos worker (por defecto: núcleos disponibles, máx. 4)
+#   GUNICORN_THREADS  hilos por worker
+#   GUNICORN_TIMEOUT  segundos antes de reiniciar un worker bloqueado
+#   TORCH_THREADS     hilos de torch/FAISS por worker (evita sobresuscribir los núcleos)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count(), 4)))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+# Carga los modelos una vez en el maestro; los workers heredan la memoria por fork
+preload_app = True
+accesslog = "-"
+
+# Con varios procesos la memoria conversacional debe vivir en un almacén compartido
+if workers > 1 and not os.environ.get("SESIONES_BACKEND"):
+    os.environ["SESIONES_BACKEND"] = "sqlite"
+
+
+def post_fork(server, worker):
+    hilos = int(os.environ.get("TORCH_THREADS", 1))
+    try:
+        import torch
+        torch.set_num_threads(hilos)
+    except ImportError:
+        pass
+    try:
+        import faiss
+        faiss.omp_set_num_threads(hilos)
+    except ImportError:
+        pass
+    server.log.info(f"Worker {worker.pid} listo ({threads} hilos, {hilos} hilos de cómputo)")
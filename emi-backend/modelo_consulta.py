@@ -2,13 +2,24 @@ import os
 import sys
 import json
 import re
+import time
+import shutil
 import difflib
+import threading
 import unicodedata
-from typing import List, Dict
+import numpy as np
+from typing import List, Dict, Optional
 from dotenv import load_dotenv
 from num2words import num2words  # Instalar con: pip install num2words
 from scripts.api_llm import consultar_openai
 from scripts.api_llm import responder_con_faiss_y_openai
+from scripts.similitud_preguntas import MotorSimilitudPreguntas, mejores_indices
+from scripts.memoria_sesiones import crear_almacen_sesiones, nuevo_contexto
+from scripts.arranque import registrar_carga
+from scripts.registro_corpus import racs_disponibles
+from scripts.dataset_qa import DatasetQA
+from scripts.datos_entrenamiento import CacheTokenizado, dividir_anteriores, contar_tokens, MODO as MODO_ENTRENAMIENTO
+from scripts.cola_entrenamiento import ColaEntrenamiento, iniciar_trabajador
 from typing import List, Dict
 
 class ModeloConsultaEMI:
@@ -26,6 +37,16 @@ def quitar_acentos(texto: str) -> str:
     return ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
 
 
+# Patrones para reconocer artículos y RACs dentro del texto del dataset
+PATRON_ARTICULO = re.compile(r'\barticulo\s*0?(\d+)(?!\d)')
+PATRON_RAC = re.compile(r'\brac[- :]?0?(\d+)(?!\d)')
+
+# Preguntas preseleccionadas con la matriz dispersa que buscar_coincidencias puntúa con difflib
+CANDIDATOS_COINCIDENCIAS = int(os.getenv("COINCIDENCIAS_CANDIDATOS", 100))
+
+# Sesión usada cuando el cliente no envía un id (p. ej. la interfaz de consola)
+SESION_POR_DEFECTO = "local"
+
 # Cargar variables de entorno desde .env
 load_dotenv()
 
@@ -34,28 +55,37 @@ BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 CHECKPOINTS_DIR = os.path.join(BASE_DIR, 'checkpoints_emi')
 
-try:
-    from transformers import (
-        AutoTokenizer,
-        AutoModelForSeq2SeqLM,
-        Trainer,
-        TrainingArguments,
-        DataCollatorForSeq2Seq
-    )
-    from datasets import Dataset
+# Las librerías de entrenamiento (transformers, datasets, peft) importan torch y tardan varios
+# segundos; solo hacen falta para el fine-tuning, así que se importan bajo demanda.
+PEFT_DISPONIBLE = False
+
 
+def importar_librerias_entrenamiento():
+    global AutoTokenizer, AutoModelForSeq2SeqLM, Trainer, TrainingArguments, DataCollatorForSeq2Seq, TrainerCallback
+    global Dataset, concatenate_datasets, LoraConfig, get_peft_model, PeftModel, PEFT_DISPONIBLE
     try:
-        from peft import LoraConfig, get_peft_model, PeftModel
+        from transformers import (
+            AutoTokenizer,
+            AutoModelForSeq2SeqLM,
+            Trainer,
+            TrainingArguments,
+            DataCollatorForSeq2Seq,
+            TrainerCallback
+        )
+        from datasets import Dataset, concatenate_datasets
 
-        PEFT_DISPONIBLE = True
-    except ImportError:
-        print("🚫 PEFT no disponible. Usando método de fine-tuning estándar.")
-        PEFT_DISPONIBLE = False
+        try:
+            from peft import LoraConfig, get_peft_model, PeftModel
+
+            PEFT_DISPONIBLE = True
+        except ImportError:
+            print("🚫 PEFT no disponible. Usando método de fine-tuning estándar.")
+            PEFT_DISPONIBLE = False
 
-except ImportError as e:
-    print(f"❌ Error de importación: {e}")
-    print("Por favor, instala las librerías con: pip install transformers datasets pandas accelerate peft")
-    sys.exit(1)
+    except ImportError as e:
+        print(f"❌ Error de importación: {e}")
+        print("Por favor, instala las librerías con: pip install transformers datasets pandas accelerate peft")
+        raise
 
 
 class ModeloConsultaEMI:
@@ -76,15 +106,31 @@ class ModeloConsultaEMI:
         #   - 'sugerencias_previas': lista de objetos con:
         #         'display': cadena para mostrar (ej. "Artículo 40 del RAC-1").
         #         'respuesta': texto completo de la respuesta.
-        self.contexto_conversacion = {
-            'ultima_consulta': None,
-            'ultimo_articulo': None,
-            'ultimo_rac': None,
-            'sugerencias_previas': []
-        }
-
-        self.cargar_dataset_completo()
-        self._inicializar_modelo()
+        # Cada sesión tiene su propia memoria en el almacén; durante una petición se expone
+        # en self.contexto_conversacion a través de un estado local al hilo.
+        self.almacen_sesiones = crear_almacen_sesiones()
+        self._estado_hilo = threading.local()
+
+        # El modelo seq2seq + LoRA solo se usa en fine_tuning_incremental: se carga bajo demanda
+        self.tokenizer = None
+        self.modelo = None
+        self.continua_checkpoint = False
+        self._lock_modelo = threading.Lock()
+        self._lock_recarga = threading.Lock()
+
+        with registrar_carga("dataset"):
+            self.cargar_dataset_completo()
+
+    @property
+    def contexto_conversacion(self) -> Dict:
+        contexto = getattr(self._estado_hilo, 'contexto', None)
+        if contexto is None:
+            contexto = self._estado_hilo.contexto = nuevo_contexto()
+        return contexto
+
+    @contexto_conversacion.setter
+    def contexto_conversacion(self, contexto: Dict):
+        self._estado_hilo.contexto = contexto
 
     # Funciones auxiliares para respuestas formales
     def es_saludo(self, texto: str) -> bool:
@@ -103,75 +149,161 @@ class ModeloConsultaEMI:
         return any(d in texto for d in despedidas)
 
     def cargar_dataset_completo(self):
+        mtime = self._mtime_dataset()
         try:
-            with open(self.ruta_dataset, 'r', encoding='utf-8') as f:
-                self.dataset_completo = json.load(f)
-                self.racs_disponibles = sorted(list(set(
-                    re.findall(r'\brac[- :]?0?(\d+)(?!\d)',
-                               ' '.join([(entrada.get('contexto', '') + " " + entrada.get('respuesta', '')).lower()
-                                         for entrada in self.dataset_completo])
-                               )
-                )))
-                print(f"DEBUG: RACs disponibles: {self.racs_disponibles}")
+            dataset = DatasetQA.cargar(self.ruta_dataset)
         except FileNotFoundError:
             print("⚠️ Dataset no encontrado. Iniciando con dataset vacío.")
-            self.dataset_completo = []
-            self.racs_disponibles = []
+            dataset = DatasetQA()
+        self._publicar_dataset(dataset, mtime)
+
+    def _publicar_dataset(self, dataset: DatasetQA, mtime: Optional[float]):
+        """
+        Construye índices y matriz de similitud para `dataset` y los publica con un solo
+        __dict__.update: las peticiones en curso ven la versión anterior o la nueva completa.
+        """
+        estado = self._construir_indice_articulos(dataset)
+        estado['dataset_completo'] = dataset
+        estado['mtime_dataset'] = mtime
+        estado['motor_similitud'] = MotorSimilitudPreguntas(
+            [quitar_acentos(pregunta.lower()) for pregunta in dataset.preguntas]
+        )
+        self.__dict__.update(estado)
+        print(f"DEBUG: RACs disponibles: {self.racs_disponibles}")
+
+    def _mtime_dataset(self) -> Optional[float]:
+        try:
+            return os.stat(self.ruta_dataset).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def recargar_dataset_si_cambio(self, en_segundo_plano: bool = False):
+        """Recarga el dataset si otro proceso (p. ej. el de entrenamiento) lo reemplazó en disco."""
+        if self._mtime_dataset() == self.mtime_dataset or not self._lock_recarga.acquire(blocking=False):
+            return
+
+        def recargar():
+            try:
+                print("🔄 El dataset cambió en disco; recargando...")
+                self.cargar_dataset_completo()
+            finally:
+                self._lock_recarga.release()
+
+        if en_segundo_plano:
+            threading.Thread(target=recargar, name="recarga_dataset", daemon=True).start()
+        else:
+            recargar()
+
+    def _construir_indice_articulos(self, dataset: DatasetQA) -> Dict:
+        """
+        Recorre la tabla de artículos del dataset una sola vez y precalcula los números de artículo
+        y RACs que menciona cada fila, de modo que las búsquedas exactas sean accesos a diccionario.
+        Las variantes de pregunta comparten fila, así que el índice no crece con el enriquecimiento.
+        """
+        articulos_por_fila: List[List[str]] = []
+        racs_por_fila: List[List[str]] = []
+        # (número de artículo, RAC) -> ids de fila, en el orden de la tabla
+        indice_articulos: Dict[tuple, List[int]] = {}
+        # número de artículo -> ids de fila que lo mencionan, en el orden de la tabla
+        filas_por_articulo: Dict[str, List[int]] = {}
+        # RAC -> conjunto de artículos conocidos
+        articulos_por_rac: Dict[str, set] = {}
+
+        for id_fila, fila in enumerate(dataset.articulos):
+            texto_fila = quitar_acentos((fila.contexto + " " + fila.respuesta).lower())
+            # Claves internadas: se repiten en cada fila y en todos los índices
+            arts = [sys.intern(a) for a in dict.fromkeys(PATRON_ARTICULO.findall(texto_fila))]
+            racs = [sys.intern(r) for r in dict.fromkeys(PATRON_RAC.findall(texto_fila))]
+            articulos_por_fila.append(arts)
+            racs_por_fila.append(racs)
+            for art in arts:
+                filas_por_articulo.setdefault(art, []).append(id_fila)
+                for r in racs:
+                    indice_articulos.setdefault((art, r), []).append(id_fila)
+                    articulos_por_rac.setdefault(r, set()).add(art)
+            for r in racs:
+                articulos_por_rac.setdefault(r, set())
+
+        return {
+            'articulos_por_fila': articulos_por_fila,
+            'racs_por_fila': racs_por_fila,
+            'indice_articulos': indice_articulos,
+            'filas_por_articulo': filas_por_articulo,
+            'articulos_por_rac': articulos_por_rac,
+            # Los RACs disponibles los define el registro del corpus; sin registro, los mencionados en el dataset
+            'racs_disponibles': racs_disponibles() or sorted(articulos_por_rac)
+        }
 
     def obtener_articulos_disponibles(self, numero_articulo: str, rac_solicitado: str = None) -> List[Dict]:
         suggestions = {}
-        for entrada in self.dataset_completo:
-            texto_entrada = (entrada.get('contexto', '') + " " + entrada.get('respuesta', '')).lower()
-            arts = re.findall(r'\bart[ií]culo\s*0?(\d+)(?!\d)', texto_entrada)
-            if numero_articulo in arts:
-                racs = re.findall(r'\brac[- :]?0?(\d+)(?!\d)', texto_entrada)
-                if rac_solicitado and rac_solicitado not in racs:
-                    continue
-                key = (numero_articulo, racs[0] if racs else "desconocido")
-                if key not in suggestions:
-                    suggestions[key] = {
-                        'display': f"Artículo {numero_articulo} del RAC-{key[1]}",
-                        'respuesta': entrada['respuesta']
-                    }
+        for id_fila in self.filas_por_articulo.get(numero_articulo, []):
+            racs = self.racs_por_fila[id_fila]
+            if rac_solicitado and rac_solicitado not in racs:
+                continue
+            key = (numero_articulo, racs[0] if racs else "desconocido")
+            if key not in suggestions:
+                suggestions[key] = {
+                    'display': f"Artículo {numero_articulo} del RAC-{key[1]}",
+                    'respuesta': self.dataset_completo.articulos[id_fila].respuesta
+                }
         return list(suggestions.values())
 
     def obtener_sugerencias_fuzzy(self, numero_articulo: str, rac_solicitado: str = None) -> List[Dict]:
         suggestions = {}
-        for entrada in self.dataset_completo:
-            texto_entrada = (entrada.get('contexto', '') + " " + entrada.get('respuesta', '')).lower()
-            arts = re.findall(r'\bart[ií]culo\s*0?(\d+)(?!\d)', texto_entrada)
-            if rac_solicitado:
-                racs = re.findall(r'\brac[- :]?0?(\d+)(?!\d)', texto_entrada)
-                if rac_solicitado not in racs:
-                    continue
+        similitudes = {}
+        for id_fila, arts in enumerate(self.articulos_por_fila):
+            racs = self.racs_por_fila[id_fila]
+            if rac_solicitado and rac_solicitado not in racs:
+                continue
             for art in arts:
-                similarity = difflib.SequenceMatcher(None, numero_articulo, art).ratio()
+                if art not in similitudes:
+                    similitudes[art] = difflib.SequenceMatcher(None, numero_articulo, art).ratio()
+                similarity = similitudes[art]
                 if similarity >= 0.6 and art != numero_articulo:
-                    racs = re.findall(r'\brac[- :]?0?(\d+)(?!\d)', texto_entrada)
                     candidate_rac = racs[0] if racs else "desconocido"
                     key = (art, candidate_rac)
                     if key not in suggestions:
                         suggestions[key] = {
                             'display': f"Artículo {art} del RAC-{candidate_rac}",
-                            'respuesta': entrada['respuesta'],
+                            'respuesta': self.dataset_completo.articulos[id_fila].respuesta,
                             'similarity': similarity
                         }
         sorted_suggestions = sorted(suggestions.values(), key=lambda x: x['similarity'], reverse=True)
         return sorted_suggestions
 
-    def generar_respuesta(self, pregunta: str, contexto: str = "") -> str:
+    def generar_respuesta(self, pregunta: str, contexto: str = "", sesion_id: str = SESION_POR_DEFECTO,
+                          usar_llm: bool = True) -> Optional[str]:
+        """
+        Responde usando la memoria de la sesión, el índice de artículos y el dataset local.
+        Si nada local responde, consulta FAISS + OpenAI; con usar_llm=False devuelve None en ese
+        caso para que quien llama consulte el LLM por su cuenta (p. ej. en streaming).
+        """
+        # Si el proceso de entrenamiento publicó un dataset nuevo, se recarga sin bloquear esta petición
+        self.recargar_dataset_si_cambio(en_segundo_plano=True)
+        self.contexto_conversacion = self.almacen_sesiones.obtener(sesion_id) or nuevo_contexto()
+        try:
+            return self._generar_respuesta(pregunta, contexto, usar_llm)
+        finally:
+            self.almacen_sesiones.guardar(sesion_id, self.contexto_conversacion)
+            self.contexto_conversacion = None
+
+    def generar_respuesta_sin_sesion(self, pregunta: str, contexto: str = "", usar_llm: bool = True) -> Optional[str]:
+        """Como generar_respuesta, pero sin memoria conversacional: cada pregunta es independiente (p. ej. en lote)."""
+        self.recargar_dataset_si_cambio(en_segundo_plano=True)
+        self.contexto_conversacion = nuevo_contexto()
+        try:
+            return self._generar_respuesta(pregunta, contexto, usar_llm)
+        finally:
+            self.contexto_conversacion = None
+
+    def _generar_respuesta(self, pregunta: str, contexto: str = "", usar_llm: bool = True) -> Optional[str]:
         # Quitamos acentos para que la comparación sea insensible
         pregunta_limpia = quitar_acentos(pregunta.lower().strip())
         print(f"DEBUG: Pregunta procesada: {pregunta_limpia}")
 
         # Si la consulta contiene "artículo", reiniciamos la memoria (nuevo query)
         if re.search(r'\barticulo', pregunta_limpia):
-            self.contexto_conversacion = {
-                'ultima_consulta': None,
-                'ultimo_articulo': None,
-                'ultimo_rac': None,
-                'sugerencias_previas': []
-            }
+            self.contexto_conversacion = nuevo_contexto()
 
         # Responder saludos, agradecimientos y despedidas si NO se menciona "artículo" ni "rac"
         if not re.search(r'\barticulo', pregunta_limpia) and not re.search(r'\brac', pregunta_limpia):
@@ -213,30 +345,23 @@ class ModeloConsultaEMI:
                 return respuesta
 
             exact_suggestions = {}
-            for entrada in self.dataset_completo:
-                texto_entrada = quitar_acentos(
-                    (entrada.get('contexto', '') + " " + entrada.get('respuesta', '')).lower())
-                arts = re.findall(r'\barticulo\s*0?(\d+)(?!\d)', texto_entrada)
-                if numero_articulo in arts:
-                    racs = re.findall(r'\brac[- :]?0?(\d+)(?!\d)', texto_entrada)
-                    print(f"DEBUG: Entrada: {texto_entrada}")
-                    print(f"DEBUG: Artículos encontrados: {arts}, RACS encontrados: {racs}")
-                    if not rac_especifico:
-                        for r in set(racs):
-                            key = (numero_articulo, r)
-                            if key not in exact_suggestions:
-                                exact_suggestions[key] = {
-                                    'display': f"Artículo {numero_articulo} del RAC-{r}",
-                                    'respuesta': entrada['respuesta']
-                                }
-                    else:
-                        if rac_especifico in racs:
-                            key = (numero_articulo, rac_especifico)
-                            if key not in exact_suggestions:
-                                exact_suggestions[key] = {
-                                    'display': f"Artículo {numero_articulo} del RAC-{rac_especifico}",
-                                    'respuesta': entrada['respuesta']
-                                }
+            if not rac_especifico:
+                for id_fila in self.filas_por_articulo.get(numero_articulo, []):
+                    for r in self.racs_por_fila[id_fila]:
+                        key = (numero_articulo, r)
+                        if key not in exact_suggestions:
+                            exact_suggestions[key] = {
+                                'display': f"Artículo {numero_articulo} del RAC-{r}",
+                                'respuesta': self.dataset_completo.articulos[id_fila].respuesta
+                            }
+            else:
+                ids_filas = self.indice_articulos.get((numero_articulo, rac_especifico))
+                if ids_filas:
+                    exact_suggestions[(numero_articulo, rac_especifico)] = {
+                        'display': f"Artículo {numero_articulo} del RAC-{rac_especifico}",
+                        'respuesta': self.dataset_completo.articulos[ids_filas[0]].respuesta
+                    }
+            print(f"DEBUG: Coincidencias exactas en el índice: {list(exact_suggestions)}")
             exact_suggestions = list(exact_suggestions.values())
             if not exact_suggestions:
                 fuzzy_suggestions = self.obtener_sugerencias_fuzzy(numero_articulo, rac_especifico)
@@ -276,6 +401,8 @@ class ModeloConsultaEMI:
             return mejor_coincidencia['datos']['respuesta']
 
         # Si no encuentra respuesta en MongoDB o búsqueda local
+        if not usar_llm:
+            return None
         try:
             print("📄 No se encontró coincidencia exacta. Buscando en archivos de reglamento...")
             return responder_con_faiss_y_openai(pregunta)
@@ -305,12 +432,7 @@ class ModeloConsultaEMI:
             if not re.search(r'\bart[ií]culo\b', pregunta_limpia) and not re.search(r'\brac[- :]?0?(\d+)(?!\d)',
                                                                                     pregunta_limpia):
                 print("🧹 Pregunta no relacionada. Reiniciando memoria conversacional.")
-                self.contexto_conversacion = {
-                    'ultima_consulta': None,
-                    'ultimo_articulo': None,
-                    'ultimo_rac': None,
-                    'sugerencias_previas': []
-                }
+                self.contexto_conversacion = nuevo_contexto()
                 return False
 
         return False
@@ -355,25 +477,17 @@ class ModeloConsultaEMI:
         else:
             ultimo_articulo = self.contexto_conversacion.get('ultimo_articulo')
             ultimo_rac = self.contexto_conversacion.get('ultimo_rac')
-            articulos_encontrados = []
-            for entrada in self.dataset_completo:
-                texto_entrada = (entrada.get('contexto', '') + " " + entrada.get('respuesta', '')).lower()
-                if re.search(rf'\barticulo\s*0?{ultimo_articulo}(?!\d)', texto_entrada) and re.search(
-                        rf'\brac[- :]?0?{ultimo_rac}(?!\d)', texto_entrada):
-                    articulos_encontrados.append(entrada['respuesta'])
-            self.contexto_conversacion.update({
-                'ultima_consulta': None,
-                'ultimo_articulo': None,
-                'ultimo_rac': None,
-                'sugerencias_previas': []
-            })
+            articulos_encontrados = [
+                self.dataset_completo.articulos[id_fila].respuesta
+                for id_fila in self.indice_articulos.get((ultimo_articulo, ultimo_rac), [])
+            ]
+            self.contexto_conversacion = nuevo_contexto()
             return "\n".join(articulos_encontrados) if articulos_encontrados else (
                     f"🤔 No pude encontrar el Artículo {ultimo_articulo}" +
                     (f" en RAC-{ultimo_rac}" if ultimo_rac else "")
             )
 
     def buscar_coincidencias(self, consulta: str) -> List[Dict]:
-        coincidencias = []
         consulta_limpia = quitar_acentos(consulta.lower().strip())
         consulta_normalizada = re.sub(r'[^\w\s]', '', consulta_limpia)
         palabras_clave = {
@@ -388,108 +502,214 @@ class ModeloConsultaEMI:
                 rac_extraido = rac_match.group(1)
                 break
 
-        for entrada in self.dataset_completo:
-            texto_entrada = quitar_acentos((entrada.get('contexto', '') + " " + entrada.get('respuesta', '')).lower())
-            pregunta_entrada = quitar_acentos(entrada.get('pregunta', '').lower())
-            entry_r_matches = re.findall(r'\brac[- :]?0?(\d+)(?!\d)', texto_entrada)
-            contexto_rac_score = 1 if rac_extraido and rac_extraido in entry_r_matches else 0
-            puntajes = {
-                'texto_exacto': difflib.SequenceMatcher(None, consulta_limpia, pregunta_entrada).ratio(),
-                'palabras_clave': sum(1 for palabra in palabras_clave['articulo'] if palabra in consulta_limpia),
-                'contexto_rac': contexto_rac_score,
-                'similitud_semantica': difflib.SequenceMatcher(None, consulta_normalizada, pregunta_entrada).ratio()
-            }
-            relevancia = (
-                    puntajes['texto_exacto'] * 0.4 +
-                    puntajes['palabras_clave'] * 0.2 +
-                    puntajes['contexto_rac'] * 0.3 +
-                    puntajes['similitud_semantica'] * 0.1
-            )
-            if relevancia > 0.3:
-                coincidencias.append({
-                    'similitud': relevancia,
-                    'datos': entrada,
-                    'puntajes': puntajes
-                })
-        return sorted(coincidencias, key=lambda x: (x['puntajes']['contexto_rac'], x['similitud']), reverse=True)[:5]
-
-    def fine_tuning_incremental(self, nuevos_datos: List[Dict], epocas: int = 2):
+        # Referencias locales: una recarga del dataset en otro hilo no mezcla versiones a mitad de la búsqueda
+        dataset, motor, racs_por_fila = self.dataset_completo, self.motor_similitud, self.racs_por_fila
+        if not dataset:
+            return []
+
+        puntaje_palabras_clave = sum(1 for palabra in palabras_clave['articulo'] if palabra in consulta_limpia)
+        contexto_rac = np.zeros(len(dataset), dtype=np.float32)
+        if rac_extraido:
+            # Se marca cada fila de la tabla y se expande a sus preguntas con la columna id_articulo
+            filas_rac = np.array([rac_extraido in racs for racs in racs_por_fila], dtype=np.float32)
+            contexto_rac = filas_rac[dataset.id_articulo]
+        # Una sola multiplicación dispersa puntúa ambas variantes de la consulta contra todo el
+        # dataset y preselecciona candidatos; solo esos se puntúan con difflib, como antes
+        similitud_exacta, similitud_normalizada = motor.similitudes(consulta_limpia, consulta_normalizada)
+        candidatos = mejores_indices(contexto_rac * 10 + similitud_exacta * 0.4 + similitud_normalizada * 0.1,
+                                     CANDIDATOS_COINCIDENCIAS)
+        texto_exacto = motor.ratios(consulta_limpia, candidatos)
+        similitud_semantica = motor.ratios(consulta_normalizada, candidatos)
+        contexto_rac = contexto_rac[candidatos]
+        relevancia = (
+                texto_exacto * 0.4 +
+                puntaje_palabras_clave * 0.2 +
+                contexto_rac * 0.3 +
+                similitud_semantica * 0.1
+        )
+        # Orden equivalente a (contexto_rac, similitud, fila) descendente; se descartan las de baja
+        # relevancia. Las plantillas empatan a menudo: el empate se resuelve por fila, como antes
+        orden = np.where(relevancia > 0.3, contexto_rac * 10 + relevancia, -np.inf)
+        coincidencias = []
+        for j in np.lexsort((-candidatos, -orden))[:5]:
+            if not np.isfinite(orden[j]):
+                break
+            coincidencias.append({
+                'similitud': float(relevancia[j]),
+                'datos': dataset.entrada(int(candidatos[j])),
+                'puntajes': {
+                    'texto_exacto': float(texto_exacto[j]),
+                    'palabras_clave': puntaje_palabras_clave,
+                    'contexto_rac': int(contexto_rac[j]),
+                    'similitud_semantica': float(similitud_semantica[j])
+                }
+            })
+        return coincidencias
+
+    def fine_tuning_incremental(self, nuevos_datos: List[Dict], epocas: int = 2, progreso=None,
+                                modo: str = MODO_ENTRENAMIENTO):
+        """
+        Entrena con los nuevos datos y, según `modo`, una muestra de los anteriores ('repeticion')
+        o todo el dataset ('completo'). Bloquea hasta terminar: desde la API o la consola se usa a
+        través de la cola (scripts/cola_entrenamiento.py), que lo ejecuta en un proceso aparte.
+        progreso(fraccion, mensaje) recibe el avance paso a paso.
+        """
         print("🌱 Iniciando fine-tuning incremental...")
-        dataset_combinado = self.dataset_completo + nuevos_datos
-
-        def preparar_entradas(ejemplos):
-            entradas = [f"Pregunta: {item['pregunta']}\nContexto: {item.get('contexto', '')}" for item in ejemplos]
-            salidas = [item['respuesta'] for item in ejemplos]
-            return entradas, salidas
-
-        entradas, salidas = preparar_entradas(dataset_combinado)
-        inputs = self.tokenizer(entradas, padding=True, truncation=True, max_length=256, return_tensors="pt")
-        outputs = self.tokenizer(salidas, padding=True, truncation=True, max_length=256, return_tensors="pt")
-        dataset = Dataset.from_dict({
-            'input_ids': inputs['input_ids'],
-            'attention_mask': inputs['attention_mask'],
-            'labels': outputs['input_ids']
-        }).train_test_split(test_size=0.2)
+        progreso = progreso or (lambda fraccion, mensaje=None: None)
+        self._asegurar_modelo_generativo()
+        if modo == "repeticion" and not self.continua_checkpoint:
+            # Repasar solo una muestra sirve al seguir un checkpoint; sin él se entrena con todo
+            print("⚠️ No hay un checkpoint publicado del que continuar: se usa el modo completo")
+            modo = "completo"
+        dataset_combinado = self.dataset_completo.con_entradas(nuevos_datos)
+
+        # El dataset anterior ya se tokenizó en el entrenamiento previo: solo se tokenizan los nuevos
+        progreso(0.0, "tokenizando")
+        cache = CacheTokenizado(self.tokenizer, self.modelo_base)
+        anteriores = cache.obtener(self.dataset_completo)
+        nuevos = cache.tokenizar(DatasetQA.desde_entradas(nuevos_datos, self.dataset_completo.sufijo_contexto))
+        cache.guardar(dataset_combinado, concatenate_datasets([anteriores, nuevos]))
+
+        indices_repaso, indices_evaluacion = dividir_anteriores(len(anteriores), len(nuevos), modo)
+        entrenamiento = concatenate_datasets([anteriores.select(indices_repaso), nuevos]).shuffle(seed=0)
+        evaluacion = anteriores.select(indices_evaluacion) if len(indices_evaluacion) else None
+        tokens_por_epoca = contar_tokens(entrenamiento)
+        print(f"📚 Modo {modo}: {len(nuevos)} ejemplos nuevos + {len(indices_repaso)} anteriores "
+              f"({tokens_por_epoca} tokens por época)")
+
+        # Los checkpoints se escriben en un directorio temporal y se publican al terminar
+        dir_temporal = f"{self.dir_modelo_fine_tuned}.tmp"
+        shutil.rmtree(dir_temporal, ignore_errors=True)
+        estrategia = "epoch" if evaluacion is not None else "no"
         argumentos_entrenamiento = TrainingArguments(
-            output_dir=self.dir_modelo_fine_tuned,
+            output_dir=dir_temporal,
             num_train_epochs=epocas,
             per_device_train_batch_size=4,
             learning_rate=1e-4,
             logging_dir=os.path.join(self.directorio_checkpoints, 'logs'),
-            save_strategy="epoch",
-            evaluation_strategy="epoch",
-            load_best_model_at_end=True
+            save_strategy=estrategia,
+            evaluation_strategy=estrategia,
+            load_best_model_at_end=evaluacion is not None,
+            # Lotes de largo parecido: el collator rellena cada lote solo hasta su ejemplo más largo
+            group_by_length=True,
+            length_column_name='longitud'
         )
         data_collator = DataCollatorForSeq2Seq(tokenizer=self.tokenizer, model=self.modelo, padding=True)
+
+        class ReportarProgreso(TrainerCallback):
+            def on_train_begin(self, args, state, control, **kwargs):
+                self.inicio = time.perf_counter()
+
+            def on_step_end(self, args, state, control, **kwargs):
+                if state.max_steps:
+                    fraccion = state.global_step / state.max_steps
+                    tokens_s = fraccion * tokens_por_epoca * epocas / max(time.perf_counter() - self.inicio, 1e-6)
+                    # El 5 % final queda para guardar y publicar
+                    progreso(0.95 * fraccion, f"paso {state.global_step}/{state.max_steps} · {tokens_s:.0f} tokens/s")
+
         trainer = Trainer(
             model=self.modelo,
             args=argumentos_entrenamiento,
-            train_dataset=dataset['train'],
-            eval_dataset=dataset['test'],
-            data_collator=data_collator
+            train_dataset=entrenamiento,
+            eval_dataset=evaluacion,
+            data_collator=data_collator,
+            callbacks=[ReportarProgreso()]
         )
-        trainer.train()
-        trainer.save_model(self.dir_modelo_fine_tuned)
-        self.dataset_completo = dataset_combinado
-        with open(self.ruta_dataset, 'w', encoding='utf-8') as f:
-            json.dump(self.dataset_completo, f, indent=2)
+        progreso(0.0, "entrenando")
+        segundos = trainer.train().metrics['train_runtime']
+        print(f"⚡ {tokens_por_epoca * epocas} tokens en {segundos:.1f} s "
+              f"({tokens_por_epoca * epocas / max(segundos, 1e-6):.0f} tokens/s)")
+        progreso(0.95, "guardando")
+        trainer.save_model(dir_temporal)
+        reemplazar_directorio(dir_temporal, self.dir_modelo_fine_tuned)
+        # El modelo en memoria es el publicado: el siguiente trabajo lo continúa
+        self.continua_checkpoint = True
+        # El dataset se reemplaza con write-then-rename (DatasetQA.guardar)
+        dataset_combinado.guardar(self.ruta_dataset)
+        self._publicar_dataset(dataset_combinado, self._mtime_dataset())
         print("✅ Fine-tuning incremental completado")
 
+    def _asegurar_modelo_generativo(self):
+        if self.modelo is None:
+            with self._lock_modelo:
+                if self.modelo is None:
+                    with registrar_carga("modelo_generativo"):
+                        self._inicializar_modelo()
+
     def _inicializar_modelo(self):
         print(f"🚀 Inicializando modelo base: {self.modelo_base}")
+        importar_librerias_entrenamiento()
         try:
             self.tokenizer = AutoTokenizer.from_pretrained(self.modelo_base)
             self.tokenizer.save_pretrained(self.dir_modelo_base)
-            modelo_base = AutoModelForSeq2SeqLM.from_pretrained(self.modelo_base)
-            if PEFT_DISPONIBLE:
-                print("🔧 Configurando adaptación LoRA...")
-                config_lora = LoraConfig(
-                    r=16,
-                    lora_alpha=32,
-                    target_modules=["q", "v"],
-                    lora_dropout=0.1,
-                    bias="none",
-                    task_type="SEQ_2_SEQ_LM"
-                )
-                self.modelo = get_peft_model(modelo_base, config_lora)
-            else:
-                self.modelo = modelo_base
+            self.modelo, self.continua_checkpoint = cargar_modelo_entrenable(self.modelo_base, self.dir_modelo_fine_tuned)
             print("✅ Modelo inicializado correctamente")
         except Exception as e:
             print(f"❌ Error durante la inicialización: {e}")
             raise
 
 
+def adaptador_publicado(directorio: str) -> bool:
+    return os.path.exists(os.path.join(directorio, 'adapter_config.json'))
+
+
+def cargar_modelo_entrenable(modelo_base: str, dir_fine_tuned: str):
+    """
+    Modelo sobre el que sigue el fine-tuning y si continúa un checkpoint publicado. Tras reiniciar
+    el proceso se retoma el adaptador LoRA (o el modelo completo, sin PEFT) de `dir_fine_tuned`:
+    partir de uno nuevo y publicarlo descartaría todo lo entrenado antes.
+    Requiere importar_librerias_entrenamiento().
+    """
+    if PEFT_DISPONIBLE:
+        base = AutoModelForSeq2SeqLM.from_pretrained(modelo_base)
+        if adaptador_publicado(dir_fine_tuned):
+            print(f"🔁 Continuando desde el adaptador publicado en {dir_fine_tuned}")
+            return PeftModel.from_pretrained(base, dir_fine_tuned, is_trainable=True), True
+        print("🔧 Configurando adaptación LoRA...")
+        config_lora = LoraConfig(
+            r=16,
+            lora_alpha=32,
+            target_modules=["q", "v"],
+            lora_dropout=0.1,
+            bias="none",
+            task_type="SEQ_2_SEQ_LM"
+        )
+        return get_peft_model(base, config_lora), False
+    if os.path.exists(os.path.join(dir_fine_tuned, 'config.json')):
+        print(f"🔁 Continuando desde el modelo publicado en {dir_fine_tuned}")
+        return AutoModelForSeq2SeqLM.from_pretrained(dir_fine_tuned), True
+    return AutoModelForSeq2SeqLM.from_pretrained(modelo_base), False
+
+
+def reemplazar_directorio(origen: str, destino: str):
+    """
+    Publica `origen` como `destino`. Un directorio no se puede reemplazar con un solo rename,
+    así que el anterior se aparta primero; quien lee nunca encuentra un checkpoint a medio escribir.
+    """
+    anterior = f"{destino}.anterior"
+    shutil.rmtree(anterior, ignore_errors=True)
+    if os.path.exists(destino):
+        os.rename(destino, anterior)
+    os.rename(origen, destino)
+    shutil.rmtree(anterior, ignore_errors=True)
+
+
 def main():
     print("🌟 Modelo EMI - Interfaz Interactiva con Memoria Contextual")
     modelo = ModeloConsultaEMI()
-    print("✨ Modelo listo. Escribe 'salir' para terminar.")
+    cola = ColaEntrenamiento()
+    trabajador = None
+    print("✨ Modelo listo. Escribe 'salir' para terminar o 'estado' para ver los entrenamientos.")
 
     while True:
         pregunta = input("\n📝 Tu pregunta: ")
         if pregunta.lower() == 'salir':
             print("👋 ¡Hasta luego!")
             break
+        if pregunta.lower() == 'estado':
+            for trabajo in cola.listar(limite=5):
+                print(f"   {trabajo['id'][:8]} {trabajo['estado']:10} {trabajo['progreso'] * 100:5.1f} % {trabajo['mensaje'] or ''}")
+            continue
         try:
             respuesta = modelo.generar_respuesta(pregunta)
             print(f"\n🤖 Respuesta: {respuesta}")
@@ -509,9 +729,11 @@ def main():
                         "respuesta": nueva_respuesta
                     }]
 
-                    print("\n🌱 Iniciando fine-tuning incremental con los nuevos datos...")
-                    modelo.fine_tuning_incremental(nuevos_datos, epocas=2)
-                    print("✅ Actualización completada. El modelo ahora cuenta con la nueva información.")
+                    # El entrenamiento corre en otro proceso; se puede seguir preguntando mientras tanto
+                    trabajo_id = cola.encolar(nuevos_datos, epocas=2)
+                    if trabajador is None:
+                        trabajador = iniciar_trabajador()
+                    print(f"\n🌱 Fine-tuning encolado ({trabajo_id[:8]}). Escribe 'estado' para ver el progreso.")
 
         except Exception as e:
             print(f"❌ Ocurrió un error: {e}")
@@ -1,31 +1,213 @@
-import subprocess
+import os
+import ast
 import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+RUTA_ESTADO = os.path.join(BASE_DIR, 'data', '.estado_pipeline.json')
 
-# Scripts a ejecutar en orden
-def run_script(path):
-    print(f"\n⬆️ Ejecutando: {path}\n")
-    result = subprocess.run([sys.executable, path])
+from scripts.registro_corpus import cargar_registro, ruta_fuente, ruta_fragmento, ruta_articulos_extraidos
 
-    if result.returncode != 0:
-        print(f"❌ Error ejecutando {path}")
-        exit(1)
-    else:
-        print(f"✅ Finalizado: {path}\n")
+# Archivos por reglamento, según el registro del corpus (data/corpus.json)
+REGISTRO = cargar_registro()
+FUENTES = ["data/corpus.json"] + [os.path.relpath(ruta_fuente(r), BASE_DIR) for r in REGISTRO]
+ARTICULOS_EXTRAIDOS = [os.path.relpath(ruta_articulos_extraidos(r), BASE_DIR) for r in REGISTRO]
+ARTICULOS_FRAGMENTOS = [os.path.relpath(ruta_fragmento(r, 'articulos.json'), BASE_DIR) for r in REGISTRO]
+
+# Etapas del pipeline: script (y sus argumentos, si los necesita), archivos que lee, archivos que
+# escribe y dependencias sin archivo intermedio (p. ej. vectorizar_texto lee la colección que carga
+# guardar_mongodb).
+# Una etapa se omite si el hash de sus entradas, de su script y de los módulos de scripts/ que este
+# importa (directa o indirectamente) no cambió y sus salidas existen.
+ETAPAS = {
+    "cargar_documentos": {
+        "script": "scripts/cargar_documentos.py",
+        "entradas": FUENTES,
+        "salidas": ["data/secciones_completas.json"],
+    },
+    "guardar_mongodb": {
+        "script": "scripts/guardar_mongodb.py",
+        "entradas": ["data/secciones_completas.json"],
+        "salidas": [],
+    },
+    "vectorizar_texto": {
+        "script": "scripts/vectorizar_texto.py",
+        "entradas": ["data/secciones_completas.json"],
+        "salidas": ["data/tfidf_vectorizer.pkl", "data/tfidf_matrix.npz"],
+        "depende_de": ["guardar_mongodb"],
+    },
+    "preparar_datos": {
+        "script": "scripts/preparar_datos.py",
+        "entradas": FUENTES,
+        "salidas": ARTICULOS_EXTRAIDOS,
+    },
+    "preguntas_respuestas": {
+        "script": "scripts/preguntas_respuestas.py",
+        "entradas": ARTICULOS_EXTRAIDOS,
+        "salidas": ["data/dataset_entrenamiento.json"],
+    },
+    "enriquecer_dataset": {
+        "script": "scripts/enriquecer_dataset.py",
+        "entradas": ["data/dataset_entrenamiento.json"],
+        "salidas": ["data/dataset_entrenamiento_enriquecido.json"],
+    },
+    "fragmentos_corpus": {
+        "script": "scripts/registro_corpus.py",
+        "argumentos": ["fragmentar"],
+        "entradas": FUENTES,
+        "salidas": ARTICULOS_FRAGMENTOS,
+    },
+    "construir_indice": {
+        "script": "scripts/construir_indice.py",
+        "entradas": ["data/corpus.json"] + ARTICULOS_FRAGMENTOS,
+        # El manifiesto apunta a la versión publicada en data/indices/<version>/
+        "salidas": ["data/indice_faiss.json"],
+    },
+    "oraciones_articulos": {
+        "script": "scripts/respuesta_extractiva.py",
+        "entradas": ["data/indice_faiss.json"],
+        "salidas": [],
+    },
+}
+
+
+def ruta(relativa):
+    return os.path.join(BASE_DIR, relativa)
+
+
+def hash_archivo(relativa):
+    sha = hashlib.sha256()
+    with open(ruta(relativa), 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def modulos_locales(script):
+    """Módulos del proyecto (scripts/*.py) que importa `script`, también los importados bajo demanda."""
+    encontrados, pendientes = set(), [script]
+    while pendientes:
+        with open(ruta(pendientes.pop()), 'r', encoding='utf-8') as f:
+            arbol = ast.parse(f.read())
+        for nodo in ast.walk(arbol):
+            if isinstance(nodo, ast.Import):
+                nombres = [alias.name for alias in nodo.names]
+            elif isinstance(nodo, ast.ImportFrom) and nodo.module:
+                # "from scripts import x" puede importar el módulo scripts/x.py
+                nombres = [nodo.module] + [f"{nodo.module}.{alias.name}" for alias in nodo.names]
+            else:
+                continue
+            for nombre in nombres:
+                relativa = nombre.replace('.', '/') + '.py'
+                if nombre.startswith('scripts.') and os.path.exists(ruta(relativa)) and relativa not in encontrados:
+                    encontrados.add(relativa)
+                    pendientes.append(relativa)
+    return sorted(encontrados - {script})
+
+
+def hash_entradas(etapa):
+    sha = hashlib.sha256()
+    sha.update(" ".join(etapa.get("argumentos", [])).encode('utf-8'))
+    for relativa in [etapa["script"]] + modulos_locales(etapa["script"]) + etapa["entradas"]:
+        sha.update(relativa.encode('utf-8'))
+        sha.update(hash_archivo(relativa).encode('utf-8') if os.path.exists(ruta(relativa)) else b'-')
+    return sha.hexdigest()
+
+
+def dependencias(nombre):
+    """Etapas que producen alguna de las entradas de `nombre`, más las dependencias explícitas."""
+    etapa = ETAPAS[nombre]
+    productoras = {otra for otra, datos in ETAPAS.items()
+                   if otra != nombre and set(datos["salidas"]) & set(etapa["entradas"])}
+    return productoras | set(etapa.get("depende_de", []))
 
 
-scripts_ordenados = [
-    "./scripts/cargar_documentos.py",
-    "./scripts/guardar_mongodb.py",
-    "./scripts/vectorizar_texto.py",
-    "./scripts/preparar_datos.py",
-    "./scripts/preguntas_respuestas.py",
-    "./scripts/enriquecer_dataset.py"
-]
+def cargar_estado():
+    if os.path.exists(RUTA_ESTADO):
+        with open(RUTA_ESTADO, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def guardar_estado(estado):
+    temporal = f"{RUTA_ESTADO}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2)
+    os.replace(temporal, RUTA_ESTADO)
+
+
+def run_script(path, argumentos=()):
+    print(f"\n⬆️ Ejecutando: {' '.join([path, *argumentos])}\n")
+    result = subprocess.run([sys.executable, path, *argumentos], cwd=BASE_DIR)
+    return result.returncode == 0
+
+
+def ejecutar_pipeline(forzar=False, max_paralelo=2):
+    estado = cargar_estado()
+    pendientes = set(ETAPAS)
+    terminadas, fallidas = set(), set()
+    resumen = {}
+    en_curso = {}
+
+    with ThreadPoolExecutor(max_workers=max_paralelo) as pool:
+        while pendientes or en_curso:
+            # Lanzar todas las etapas cuyas dependencias ya terminaron; omitir una etapa puede
+            # liberar otras, por eso se repite hasta que no quede ninguna lista
+            listas = [n for n in ETAPAS if n in pendientes and dependencias(n) <= terminadas]
+            while listas and not fallidas:
+                for nombre in listas:
+                    pendientes.discard(nombre)
+                    etapa = ETAPAS[nombre]
+                    huella = hash_entradas(etapa)
+                    salidas_ok = all(os.path.exists(ruta(s)) for s in etapa["salidas"])
+                    if not forzar and salidas_ok and estado.get(nombre) == huella:
+                        print(f"⏭️ Sin cambios, se omite: {nombre}")
+                        resumen[nombre] = ("omitida", 0.0)
+                        terminadas.add(nombre)
+                        continue
+                    en_curso[pool.submit(run_script, etapa["script"], etapa.get("argumentos", []))] = (nombre, huella, time.perf_counter())
+                listas = [n for n in ETAPAS if n in pendientes and dependencias(n) <= terminadas]
+
+            if not en_curso:
+                # Nada en ejecución: o terminó todo, o un fallo dejó etapas sin poder lanzarse
+                break
+
+            listos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in listos:
+                nombre, huella, inicio = en_curso.pop(futuro)
+                duracion = time.perf_counter() - inicio
+                if futuro.result():
+                    print(f"✅ Finalizado: {nombre} ({duracion:.1f} s)\n")
+                    resumen[nombre] = ("ejecutada", duracion)
+                    terminadas.add(nombre)
+                    estado[nombre] = huella
+                    guardar_estado(estado)
+                else:
+                    print(f"❌ Error ejecutando {ETAPAS[nombre]['script']}")
+                    resumen[nombre] = ("fallida", duracion)
+                    fallidas.add(nombre)
+
+    print("\n📊 Resumen del pipeline")
+    for nombre in ETAPAS:
+        resultado, duracion = resumen.get(nombre, ("no ejecutada", 0.0))
+        print(f"   {nombre:22} {resultado:13} {duracion:7.1f} s")
+    return not fallidas and not pendientes
+
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline de preparación incremental del Asistente EMI")
+    parser.add_argument("--forzar", action="store_true", help="ejecuta todas las etapas aunque no haya cambios")
+    parser.add_argument("--paralelo", type=int, default=2, help="máximo de etapas ejecutándose a la vez")
+    args = parser.parse_args()
+
     print("\n🌟 Pipeline de Preparación - Asistente EMI\n")
-    for script in scripts_ordenados:
-        run_script(script)
+    inicio = time.perf_counter()
+    if not ejecutar_pipeline(forzar=args.forzar, max_paralelo=args.paralelo):
+        exit(1)
 
-    print("\n🤖 Todo listo. Puedes ejecutar ahora: python modelo_consulta.py")
+    print(f"\n🤖 Todo listo en {time.perf_counter() - inicio:.1f} s. Puedes ejecutar ahora: python modelo_consulta.py")
@@ -1,26 +1,244 @@
 import os
 import faiss
 import pickle
+import time
+import threading
 import numpy as np
 import unicodedata
 import re
-from openai import OpenAI
+import asyncio
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
+from scripts.arranque import registrar_carga
+from scripts import bucle_async
+from scripts.cache_respuestas import crear_cache_respuestas
+from scripts.lotes_embeddings import AgrupadorConsultas
+from scripts.cache_lru import CacheLRU
+from scripts.recuperacion_hibrida import IndiceDisperso, fusionar_rrf
+from scripts.metadata_compacta import MetadataCompacta
+from scripts.registro_corpus import cargar_registro
+from scripts.contexto_llm import armar_contexto
+from scripts.cliente_llm import TransporteLLM
+from scripts import respuesta_extractiva
+from scripts.indice_activo import leer_manifiesto, ruta_activa
 
 # Cargar variables de entorno
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+base_dir = os.path.dirname(__file__)
+# Índice FAISS y metadata: en la versión que nombra el manifiesto (scripts/indice_activo.py)
+ARCHIVO_INDICE = "indice_faiss.index"
+ARCHIVO_METADATA = "metadata_articulos.pkl"
+ARCHIVO_METADATA_COMPACTA = "metadata_articulos.bin"
+RUTA_VECTORIZADOR = os.path.join(base_dir, "../data/tfidf_vectorizer.pkl")
+MODELO_EMBEDDINGS = "all-MiniLM-L6-v2"
+MODELO_OPENAI = "gpt-3.5-turbo"
+# Generación: 'openai' (API) o 'local' (modelo fine-tuned en CPU, sin red; scripts/generacion_local.py)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")
+# Índice y metadata mapeados en memoria: los workers comparten las páginas del page cache
+INDICE_MMAP = os.getenv("INDICE_MMAP", "1") != "0"
+# Palabras clave de respaldo cuando FAISS no devuelve artículos útiles
+CLAVES_RESPALDO = ["admisión", "permisos", "derechos", "obligaciones", "inasistencia", "evaluación", "estudiante militar"]
+# Recuperación: 'hibrida' (FAISS + TF-IDF fusionados con RRF) o 'densa' (solo FAISS)
+RECUPERACION_MODO = os.getenv("RECUPERACION_MODO", "hibrida")
+RECUPERACION_TOP_K = int(os.getenv("RECUPERACION_TOP_K", 10))
+RECUPERACION_CANDIDATOS = int(os.getenv("RECUPERACION_CANDIDATOS", 20))
+# Respuesta extractiva (oraciones citadas de los artículos, sin LLM; scripts/respuesta_extractiva.py):
+# 'primero' responde así cuando la confianza supera EXTRACTIVA_UMBRAL, 'respaldo' solo cuando el LLM
+# falla o agota su plazo (OPENAI_PLAZO_S), 'ambos' hace las dos cosas y 'no' la desactiva
+EXTRACTIVA_MODO = os.getenv("EXTRACTIVA_MODO", "respaldo")
+SIN_INFORMACION = "No se encontró información suficiente en los artículos del reglamento para responder esta pregunta."
+
+# Reglamentos que cubre el asistente, para el prompt: "RAC-01, RAC-02 y RAC-03"
+_ids_reglamentos = [r['id'] for r in cargar_registro()] or ["RAC-01", "RAC-02"]
+NOMBRES_REGLAMENTOS = (", ".join(_ids_reglamentos[:-1]) + " y " + _ids_reglamentos[-1]
+                       if len(_ids_reglamentos) > 1 else _ids_reglamentos[0])
+
+# Los recursos pesados se cargan la primera vez que se usan (o en la precarga), no al importar
+_recursos = {}
+_lock_recursos = threading.RLock()
+
+
+def _obtener_recurso(nombre, cargar):
+    recurso = _recursos.get(nombre)
+    if recurso is None:
+        with _lock_recursos:
+            recurso = _recursos.get(nombre)
+            if recurso is None:
+                with registrar_carga(nombre):
+                    recurso = _recursos[nombre] = cargar()
+    return recurso
+
+
+def _cargar_modelo_embeddings():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(MODELO_EMBEDDINGS)
+
+
+def ruta_indice_activo(nombre):
+    # Todas las rutas salen del mismo manifiesto cargado: índice y metadata son de la misma versión
+    return ruta_activa(nombre, obtener_manifiesto_indice())
+
+
+def _cargar_metadata():
+    ruta_compacta = ruta_indice_activo(ARCHIVO_METADATA_COMPACTA)
+    if INDICE_MMAP and os.path.exists(ruta_compacta):
+        return MetadataCompacta(ruta_compacta)
+    with open(ruta_indice_activo(ARCHIVO_METADATA), "rb") as f:
+        return pickle.load(f)
+
+
+def _cargar_indice():
+    ruta = ruta_indice_activo(ARCHIVO_INDICE)
+    if INDICE_MMAP:
+        try:
+            return faiss.read_index(ruta, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+        except (AttributeError, RuntimeError) as e:
+            # Versiones antiguas de FAISS o tipos de índice sin soporte de mmap
+            print(f"⚠️ No se pudo mapear el índice en memoria ({e}); se carga completo.")
+    return faiss.read_index(ruta)
+
+
+def obtener_cliente_openai():
+    # Pool de conexiones, plazos, reintentos, límite de llamadas y disyuntor (scripts/cliente_llm.py)
+    return _obtener_recurso("cliente_openai", TransporteLLM)
+
+
+def _cargar_generador_local():
+    from scripts.generacion_local import GeneradorLocal
+    return GeneradorLocal()
+
+
+def obtener_generador_local():
+    return _obtener_recurso("generador_local", _cargar_generador_local)
+
 
 # Modelo de embeddings
-modelo = SentenceTransformer("all-MiniLM-L6-v2")
+def obtener_modelo_embeddings():
+    return _obtener_recurso("modelo_embeddings", _cargar_modelo_embeddings)
+
+
+# Índice FAISS y metadatos
+def obtener_indice():
+    return _obtener_recurso("indice_faiss", _cargar_indice)
+
+
+def obtener_metadata():
+    return _obtener_recurso("metadata", _cargar_metadata)
+
+
+# Lo publica scripts/construir_indice.py; se lee una vez y fija la versión del índice del proceso
+def obtener_manifiesto_indice():
+    return _obtener_recurso("manifiesto_indice", leer_manifiesto)
+
+
+def _cargar_indice_disperso():
+    if not os.path.exists(RUTA_VECTORIZADOR):
+        print(f"⚠️ No existe {RUTA_VECTORIZADOR}; la recuperación usará solo FAISS.")
+        return False
+    with open(RUTA_VECTORIZADOR, "rb") as f:
+        vectorizador = pickle.load(f)
+    documentos = [f"{art.get('titulo', '')} {art.get('contenido', '')}" for art in obtener_metadata()]
+    return IndiceDisperso(vectorizador, documentos)
+
+
+# Índice TF-IDF alineado con la metadata (False si no hay vectorizador entrenado)
+def obtener_indice_disperso():
+    return _obtener_recurso("indice_disperso", _cargar_indice_disperso)
+
+
+def _cargar_indice_oraciones():
+    ruta_oraciones = ruta_indice_activo(respuesta_extractiva.ARCHIVO_ORACIONES)
+    if not os.path.exists(ruta_oraciones):
+        print(f"⚠️ No existe {ruta_oraciones}; no habrá respuestas extractivas "
+              "(python scripts/respuesta_extractiva.py).")
+        return False
+    indice = respuesta_extractiva.IndiceOraciones(ruta_indice_activo(respuesta_extractiva.ARCHIVO_EMBEDDINGS),
+                                                  ruta_oraciones)
+    # Las filas apuntan a posiciones de la metadata: si el índice se reconstruyó, ya no sirven
+    if (indice.modelo_embeddings != MODELO_EMBEDDINGS
+            or indice.huella_metadata != respuesta_extractiva.huella_archivo(ruta_indice_activo(ARCHIVO_METADATA))):
+        print("⚠️ Las oraciones no corresponden al índice actual; no habrá respuestas extractivas.")
+        return False
+    return indice
+
+
+# Embeddings por oración de los artículos (False si no existen o están desactualizados)
+def obtener_indice_oraciones():
+    return _obtener_recurso("indice_oraciones", _cargar_indice_oraciones)
+
+
+def obtener_cache_respuestas():
+    # Puede ser None si la caché está desactivada (CACHE_RESPUESTAS=0)
+    if "cache_respuestas" not in _recursos:
+        with _lock_recursos:
+            if "cache_respuestas" not in _recursos:
+                # La caché en disco es de la versión del índice que usa este proceso
+                version = obtener_manifiesto_indice().get('version')
+                _recursos["cache_respuestas"] = crear_cache_respuestas(version)
+    return _recursos["cache_respuestas"]
+
+
+def _calcular_resultados_claves():
+    # Un solo encode + búsqueda para todas las palabras clave; se reutiliza en cada petición
+    claves = [normalizar_texto(clave) for clave in CLAVES_RESPALDO]
+    return {clave: filtrar_ids_utiles(indices) for clave, (_, indices) in zip(claves, buscar_lote(
+        [(clave, 10) for clave in claves]))}
+
+
+def obtener_resultados_claves():
+    return _obtener_recurso("resultados_claves", _calcular_resultados_claves)
+
+
+RECURSOS_REQUERIDOS = {
+    "modelo_embeddings": obtener_modelo_embeddings,
+    "indice_faiss": obtener_indice,
+    "metadata": obtener_metadata,
+    "manifiesto_indice": obtener_manifiesto_indice,
+    "cliente_openai": obtener_cliente_openai,
+    "resultados_claves": obtener_resultados_claves,
+    "indice_disperso": obtener_indice_disperso,
+}
+if EXTRACTIVA_MODO != "no":
+    RECURSOS_REQUERIDOS["indice_oraciones"] = obtener_indice_oraciones
+if LLM_BACKEND == "local":
+    # Sin red ni clave de OpenAI: el recurso necesario es el modelo local
+    del RECURSOS_REQUERIDOS["cliente_openai"]
+    RECURSOS_REQUERIDOS["generador_local"] = obtener_generador_local
+
+
+def precargar_recursos():
+    """Carga todos los recursos necesarios para responder (útil antes de hacer fork o al arrancar)."""
+    for obtener in RECURSOS_REQUERIDOS.values():
+        obtener()
+
+
+def estado_recursos():
+    return {nombre: nombre in _recursos for nombre in RECURSOS_REQUERIDOS}
+
+
+def recursos_listos():
+    return all(estado_recursos().values())
+
+
+def estadisticas_cliente_openai():
+    cliente = _recursos.get("cliente_openai")
+    return cliente.estadisticas() if cliente else None
+
+
+def estadisticas_generacion_local():
+    generador = _recursos.get("generador_local")
+    if not generador:
+        return None
+    return dict(generador.agrupador.estadisticas(), origen=generador.origen, recargas=generador.recargas)
+
+
+# Respuestas extractivas entregadas como primer paso y como respaldo del LLM
+_respuestas_extractivas = {'primer_paso': 0, 'respaldo': 0}
 
-# Cargar índice FAISS y metadatos
-base_dir = os.path.dirname(__file__)
-index = faiss.read_index(os.path.join(base_dir, "../data/indice_faiss.index"))
 
-with open(os.path.join(base_dir, "../data/metadata_articulos.pkl"), "rb") as f:
-    metadata = pickle.load(f)
+def estadisticas_extractiva():
+    indice = _recursos.get("indice_oraciones")
+    return dict(_respuestas_extractivas, modo=EXTRACTIVA_MODO, oraciones=len(indice) if indice else 0)
 
 # 🔤 Función para normalizar texto (elimina tildes, signos raros, y pasa todo a minúsculas)
 def normalizar_texto(texto):
@@ -29,21 +247,67 @@ def normalizar_texto(texto):
     texto = re.sub(r"[^a-z0-9\s]", "", texto)
     return texto.strip()
 
+# 📦 Procesa un lote de consultas (texto_normalizado, top_k): un solo encode y una sola búsqueda FAISS
+def buscar_lote(consultas):
+    textos = [texto for texto, _ in consultas]
+    top_k_max = max(top_k for _, top_k in consultas)
+    embeddings = np.asarray(obtener_modelo_embeddings().encode(textos, batch_size=len(textos)), dtype=np.float32)
+    if obtener_manifiesto_indice().get("normalizar_consultas"):
+        faiss.normalize_L2(embeddings)
+    _, indices = obtener_indice().search(embeddings, top_k_max)
+    return [(embeddings[i], indices[i][:top_k]) for i, (_, top_k) in enumerate(consultas)]
+
+# Agrupa las consultas concurrentes: EMBEDDINGS_LOTE_MAX=1 desactiva el agrupamiento
+agrupador_consultas = AgrupadorConsultas(
+    buscar_lote,
+    max_lote=int(os.getenv("EMBEDDINGS_LOTE_MAX", 32)),
+    espera_ms=float(os.getenv("EMBEDDINGS_LOTE_ESPERA_MS", 5))
+)
+
+# Embeddings de preguntas ya vistas, por texto normalizado
+cache_embeddings = CacheLRU(max_entradas=int(os.getenv("EMBEDDINGS_CACHE_MAX", 4096)))
+
+# 🔍 Buscar ids de artículos similares usando FAISS y texto normalizado (devuelve también el embedding)
+def buscar_ids_similares(pregunta, top_k=10):
+    pregunta_normalizada = normalizar_texto(pregunta)
+    embedding = cache_embeddings.obtener(pregunta_normalizada)
+    if embedding is None:
+        embedding, indices = agrupador_consultas.enviar((pregunta_normalizada, top_k))
+        cache_embeddings.guardar(pregunta_normalizada, embedding)
+    else:
+        _, indices = obtener_indice().search(embedding.reshape(1, -1), top_k)
+        indices = indices[0]
+    return embedding, filtrar_ids_utiles(indices)
+
+def filtrar_ids_utiles(indices):
+    metadata = obtener_metadata()
+    return [int(i) for i in indices if i >= 0 and len(metadata[i].get("contenido", "").strip()) > 30]
+
+# 📦 Igual que buscar_ids_similares para muchas preguntas a la vez: una codificación y una búsqueda
+# FAISS por cada `lote` preguntas distintas. Devuelve [(embedding, ids)] en el orden de `preguntas`.
+def buscar_ids_similares_lote(preguntas, top_k=10, lote=128):
+    normalizadas = [normalizar_texto(pregunta) for pregunta in preguntas]
+    unicas = list(dict.fromkeys(normalizadas))
+    resultados = {}
+    for inicio in range(0, len(unicas), lote):
+        textos = unicas[inicio:inicio + lote]
+        for texto, (embedding, indices) in zip(textos, buscar_lote([(texto, top_k) for texto in textos])):
+            cache_embeddings.guardar(texto, embedding)
+            resultados[texto] = (embedding, filtrar_ids_utiles(indices))
+    return [resultados[texto] for texto in normalizadas]
+
 # 🔍 Buscar artículos similares usando FAISS y texto normalizado
 def buscar_articulo_similar(pregunta, top_k=10):
-    pregunta_normalizada = normalizar_texto(pregunta)
-    embedding = modelo.encode([pregunta_normalizada])
-    _, indices = index.search(np.array(embedding), top_k)
-    resultados = [metadata[i] for i in indices[0]]
-    return [r for r in resultados if len(r.get("contenido", "").strip()) > 30]
+    _, ids = buscar_ids_similares(pregunta, top_k)
+    metadata = obtener_metadata()
+    return [metadata[i] for i in ids]
 
-# 💬 Consultar a OpenAI con los artículos relevantes como contexto
-def consultar_openai(pregunta, contexto):
-    mensajes = [
+def construir_mensajes(pregunta, contexto):
+    return [
         {
             "role": "system",
             "content": f"""
-Eres un asistente académico especializado en los reglamentos RAC-01 y RAC-02 de la Escuela Militar de Ingeniería.
+Eres un asistente académico especializado en los reglamentos {NOMBRES_REGLAMENTOS} de la Escuela Militar de Ingeniería.
 
 Tu única fuente de información debe ser el siguiente contenido textual extraído directamente de los reglamentos. Debes responder de manera clara, completa y en estilo conversacional, citando literalmente lo que corresponda.
 
@@ -59,10 +323,14 @@ Tu única fuente de información debe ser el siguiente contenido textual extraí
         }
     ]
 
+# 💬 Consultar a OpenAI con los artículos relevantes como contexto
+def consultar_openai(pregunta, contexto):
+    mensajes = construir_mensajes(pregunta, contexto)
+
     try:
-        respuesta = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=mensajes,
+        respuesta = obtener_cliente_openai().completar(
+            mensajes,
+            model=MODELO_OPENAI,
             max_tokens=1024,
             temperature=0.2
         )
@@ -70,30 +338,217 @@ Tu única fuente de información debe ser el siguiente contenido textual extraí
     except Exception as e:
         return f"[ERROR] No se pudo consultar OpenAI: {e}"
 
-# 🔁 Función principal que responde usando embeddings + contexto + OpenAI
-def responder_con_faiss_y_openai(pregunta):
+# 🧠 Generar con el modelo local (mismo contrato que consultar_openai)
+def consultar_local(pregunta, contexto):
+    try:
+        return obtener_generador_local().generar(pregunta, contexto)
+    except Exception as e:
+        return f"[ERROR] No se pudo generar con el modelo local: {e}"
+
+# 💬 Consultar el backend configurado en LLM_BACKEND
+def consultar_llm(pregunta, contexto):
+    if LLM_BACKEND == "local":
+        return consultar_local(pregunta, contexto)
+    return consultar_openai(pregunta, contexto)
+
+# ⚡ Versiones asíncronas: muchas consultas en curso a la vez desde el bucle de bucle_async
+async def consultar_openai_async(pregunta, contexto):
+    try:
+        respuesta = await obtener_cliente_openai().completar_async(
+            construir_mensajes(pregunta, contexto),
+            model=MODELO_OPENAI,
+            max_tokens=1024,
+            temperature=0.2
+        )
+        return respuesta.choices[0].message.content.strip()
+    except Exception as e:
+        return f"[ERROR] No se pudo consultar OpenAI: {e}"
+
+async def consultar_llm_async(pregunta, contexto):
+    if LLM_BACKEND == "local":
+        # En hilos: el generador local agrupa en un solo lote las llamadas que coinciden
+        return await asyncio.to_thread(consultar_local, pregunta, contexto)
+    return await consultar_openai_async(pregunta, contexto)
+
+# 🚦 Consulta el LLM para cada (clave, pregunta, contexto) con a lo sumo `concurrencia` llamadas en
+# curso; entrega (clave, respuesta) a medida que terminan, no en el orden de entrada.
+async def consultar_llm_en_paralelo(trabajos, concurrencia):
+    semaforo = asyncio.Semaphore(max(1, concurrencia))
+
+    async def consultar(clave, pregunta, contexto):
+        async with semaforo:
+            return clave, await consultar_llm_async(pregunta, contexto)
+
+    for tarea in asyncio.as_completed([consultar(*trabajo) for trabajo in trabajos]):
+        yield await tarea
+
+# 🌊 Versión asíncrona en streaming: entrega los fragmentos de texto a medida que llegan
+async def consultar_openai_stream(pregunta, contexto):
+    mensajes = construir_mensajes(pregunta, contexto)
+
+    try:
+        async for evento in obtener_cliente_openai().completar_stream(
+            mensajes,
+            model=MODELO_OPENAI,
+            max_tokens=1024,
+            temperature=0.2
+        ):
+            if evento.choices and evento.choices[0].delta.content:
+                yield evento.choices[0].delta.content
+    except Exception as e:
+        yield f"[ERROR] No se pudo consultar OpenAI: {e}"
+
+# 📚 Recupera los artículos relevantes (FAISS + TF-IDF + palabras clave) y arma el contexto del prompt
+# dentro del presupuesto de tokens (scripts/contexto_llm.py).
+# Devuelve None si no hay artículos útiles, o un dict con 'ids', 'embedding' (de la pregunta),
+# 'contexto', 'tiempos' (ms por componente) y 'tokens_contexto' (con y sin recorte).
+# `busqueda` (embedding, ids) evita la búsqueda FAISS si ya se hizo en lote (buscar_ids_similares_lote).
+def recuperar_contexto(pregunta, top_k=RECUPERACION_TOP_K, busqueda=None):
     print("🔍 Buscando artículos más relevantes en FAISS...")
-    articulos_utiles = buscar_articulo_similar(pregunta, top_k=10)
+    tiempos = {}
+    inicio = time.perf_counter()
+    embedding, ids_utiles = busqueda or buscar_ids_similares(pregunta, top_k=RECUPERACION_CANDIDATOS)
+    tiempos['denso_ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+
+    indice_disperso = obtener_indice_disperso() if RECUPERACION_MODO == "hibrida" else None
+    if indice_disperso:
+        inicio = time.perf_counter()
+        ids_dispersos = filtrar_ids_utiles(indice_disperso.buscar(pregunta, RECUPERACION_CANDIDATOS))
+        tiempos['disperso_ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+        inicio = time.perf_counter()
+        ids_utiles = fusionar_rrf([ids_utiles, ids_dispersos])
+        tiempos['fusion_ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+    ids_utiles = ids_utiles[:top_k]
 
-    # Si no encuentra, intentar buscar con palabras clave manuales
-    if not articulos_utiles:
-        claves = ["admisión", "permisos", "derechos", "obligaciones", "inasistencia", "evaluación", "estudiante militar"]
-        for clave in claves:
-            if clave in normalizar_texto(pregunta):
+    # Si no encuentra, usar los resultados precalculados de las palabras clave manuales
+    if not ids_utiles:
+        pregunta_normalizada = normalizar_texto(pregunta)
+        for clave, ids_clave in obtener_resultados_claves().items():
+            if clave in pregunta_normalizada:
                 print(f"🔁 Reintentando búsqueda con palabra clave: {clave}")
-                articulos_utiles = buscar_articulo_similar(clave, top_k=10)
+                ids_utiles = ids_clave[:top_k]
                 break
 
-    if not articulos_utiles:
-        return "No se encontró información suficiente en los artículos del reglamento para responder esta pregunta."
+    print(f"⏱️ Recuperación ({RECUPERACION_MODO}): {tiempos}")
+    if not ids_utiles:
+        return None
 
-    contexto = "\n\n".join([
-        f"[{art.get('rac', 'RAC-?')}] {art.get('articulo', '')} - {art.get('titulo', '')}\n{art.get('contenido', '').strip()}"
-        for art in articulos_utiles
-    ])
+    metadata = obtener_metadata()
+    inicio = time.perf_counter()
+    armado = armar_contexto(pregunta, [metadata[i] for i in ids_utiles],
+                            vectorizador=indice_disperso.vectorizador if indice_disperso else None)
+    tiempos['contexto_ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+    contexto = armado['contexto']
+    ahorro = 1 - armado['tokens'] / max(armado['tokens_completo'], 1)
+    print(f"✂️ Contexto: {armado['tokens_completo']} → {armado['tokens']} tokens ({ahorro:.0%} menos), "
+          f"{armado['duplicados']} duplicados, {armado['pasajes']}/{armado['pasajes_total']} pasajes")
 
-    print("🤖 Consultando OpenAI con contexto relevante...")
     print("📄 Pregunta:", pregunta)
     print("📄 Fragmento del contexto:\n", contexto[:500], "...")
+    return {'ids': ids_utiles, 'embedding': embedding, 'contexto': contexto, 'tiempos': tiempos,
+            'tokens_contexto': {'completo': armado['tokens_completo'], 'final': armado['tokens']}}
 
-    return consultar_openai(pregunta, contexto)
+# 📚 recuperar_contexto para muchas preguntas, con una sola codificación y búsqueda FAISS
+def recuperar_contextos_lote(preguntas, top_k=RECUPERACION_TOP_K):
+    busquedas = buscar_ids_similares_lote(preguntas, top_k=RECUPERACION_CANDIDATOS)
+    return [recuperar_contexto(pregunta, top_k, busqueda) for pregunta, busqueda in zip(preguntas, busquedas)]
+
+# 🗃️ Respuesta previa para la misma pregunta (o una semánticamente equivalente), si existe
+def buscar_en_cache(pregunta, recuperacion):
+    cache = obtener_cache_respuestas()
+    if cache is None:
+        return None
+    respuesta = cache.buscar(normalizar_texto(pregunta), recuperacion['ids'], recuperacion['embedding'])
+    if respuesta is not None:
+        print("🗃️ Respuesta obtenida de la caché")
+    return respuesta
+
+# ✂️ Respuesta con las oraciones más cercanas de los artículos recuperados, sin LLM (milisegundos).
+# Como primer paso solo se usa si la confianza alcanza EXTRACTIVA_UMBRAL; como respaldo, siempre,
+# precedida de un aviso. None si el modo no lo permite o no hay índice de oraciones.
+def responder_extractivo(recuperacion, respaldo=False):
+    if EXTRACTIVA_MODO not in (("respaldo", "ambos") if respaldo else ("primero", "ambos")):
+        return None
+    indice = obtener_indice_oraciones()
+    if not indice:
+        return None
+    inicio = time.perf_counter()
+    resultado = respuesta_extractiva.responder_extractivo(
+        indice, obtener_metadata(), recuperacion['embedding'], recuperacion['ids'],
+        aviso=respuesta_extractiva.AVISO_RESPALDO if respaldo else None)
+    if resultado is None or (not respaldo and resultado['confianza'] < respuesta_extractiva.UMBRAL_CONFIANZA):
+        return None
+    _respuestas_extractivas['respaldo' if respaldo else 'primer_paso'] += 1
+    print(f"✂️ Respuesta extractiva{' de respaldo' if respaldo else ''} (confianza {resultado['confianza']}) "
+          f"en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    return resultado['respuesta']
+
+def respaldo_si_error(recuperacion, respuesta):
+    # Un error del LLM (caído, plazo agotado, disyuntor abierto) se reemplaza por las oraciones citadas
+    if respuesta.startswith("[ERROR]"):
+        return responder_extractivo(recuperacion, respaldo=True) or respuesta
+    return respuesta
+
+def guardar_en_cache(pregunta, recuperacion, respuesta):
+    cache = obtener_cache_respuestas()
+    # Los errores de OpenAI no se guardan para poder reintentar
+    if cache is not None and respuesta and not respuesta.startswith("[ERROR]"):
+        cache.guardar(normalizar_texto(pregunta), recuperacion['ids'], recuperacion['embedding'], respuesta)
+
+# 🔁 Función principal que responde usando embeddings + contexto + OpenAI
+def responder_con_faiss_y_openai(pregunta):
+    recuperacion = recuperar_contexto(pregunta)
+    if recuperacion is None:
+        return SIN_INFORMACION
+
+    respuesta = buscar_en_cache(pregunta, recuperacion)
+    if respuesta is not None:
+        return respuesta
+
+    respuesta = responder_extractivo(recuperacion)
+    if respuesta is not None:
+        guardar_en_cache(pregunta, recuperacion, respuesta)
+        return respuesta
+
+    print(f"🤖 Consultando el LLM ({LLM_BACKEND}) con contexto relevante...")
+    respuesta = consultar_llm(pregunta, recuperacion['contexto'])
+    # El respaldo no se guarda en la caché: la próxima vez se vuelve a intentar con el LLM
+    guardar_en_cache(pregunta, recuperacion, respuesta)
+    return respaldo_si_error(recuperacion, respuesta)
+
+# 🌊 Igual que responder_con_faiss_y_openai, pero devuelve un generador de fragmentos de texto
+def responder_con_faiss_y_openai_stream(pregunta):
+    recuperacion = recuperar_contexto(pregunta)
+    if recuperacion is None:
+        yield SIN_INFORMACION
+        return
+
+    respuesta = buscar_en_cache(pregunta, recuperacion)
+    if respuesta is not None:
+        yield respuesta
+        return
+
+    respuesta = responder_extractivo(recuperacion)
+    if respuesta is not None:
+        yield respuesta
+        guardar_en_cache(pregunta, recuperacion, respuesta)
+        return
+
+    if LLM_BACKEND == "local":
+        # El modelo local genera la respuesta completa (en lote con otras peticiones)
+        respuesta = consultar_local(pregunta, recuperacion['contexto'])
+        yield respaldo_si_error(recuperacion, respuesta)
+        guardar_en_cache(pregunta, recuperacion, respuesta)
+        return
+
+    print("🤖 Consultando OpenAI (streaming) con contexto relevante...")
+    fragmentos = []
+    for fragmento in bucle_async.iterar(consultar_openai_stream(pregunta, recuperacion['contexto'])):
+        if fragmento.startswith("[ERROR]"):
+            # El error llega como último fragmento; si ya se envió parte de la respuesta, el respaldo va a continuación
+            respaldo = respaldo_si_error(recuperacion, fragmento)
+            yield ("\n\n" if fragmentos else "") + respaldo
+            return
+        fragmentos.append(fragmento)
+        yield fragmento
+    guardar_en_cache(pregunta, recuperacion, "".join(fragmentos).strip())
@@ -0,0 +1,44 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+# Segundos que tardó en cargarse cada componente pesado, en orden de carga.
+# Algunos componentes contienen a otros (p. ej. modelo_consulta incluye dataset).
+TIEMPOS_CARGA: Dict[str, float] = {}
+_inicio_proceso = time.perf_counter()
+_lock = threading.Lock()
+
+
+@contextmanager
+def registrar_carga(componente: str):
+    """Mide y registra el tiempo de carga de un componente."""
+    inicio = time.perf_counter()
+    yield
+    duracion = time.perf_counter() - inicio
+    with _lock:
+        TIEMPOS_CARGA[componente] = round(duracion, 3)
+    print(f"⏱️ {componente} cargado en {duracion:.2f} s")
+
+
+def reporte_arranque() -> Dict:
+    with _lock:
+        componentes = dict(TIEMPOS_CARGA)
+    return {
+        'componentes': componentes,
+        'segundos_desde_inicio': round(time.perf_counter() - _inicio_proceso, 3)
+    }
+
+
+def precargar_en_segundo_plano(funcion, nombre: str = "precarga") -> threading.Thread:
+    """Ejecuta la función de precarga en un hilo daemon para no bloquear el arranque."""
+    def ejecutar():
+        try:
+            with registrar_carga(nombre):
+                funcion()
+        except Exception as e:
+            print(f"❌ Error durante la {nombre}: {e}")
+
+    hilo = threading.Thread(target=ejecutar, name=nombre, daemon=True)
+    hilo.start()
+    return hilo
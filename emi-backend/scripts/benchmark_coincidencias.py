@@ -0,0 +1,147 @@
+import os
+import re
+import sys
+import time
+import random
+import difflib
+import argparse
+import unicodedata
+import statistics
+import numpy as np
+
+# Permite importar el paquete scripts al ejecutar este archivo directamente
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+
+from scripts.similitud_preguntas import MotorSimilitudPreguntas, mejores_indices
+from scripts.dataset_qa import DatasetQA
+
+CONSULTAS = [
+    "¿Qué tipos de permisos existen para los estudiantes?",
+    "requisitos de admision",
+    "que pasa si tengo inasistencia a clases",
+    "cual es el proposito del rac 2",
+    "como se realiza la evaluacion final",
+    "obligaciones del estudiante militar",
+    "convalidacion de asignaturas",
+    "derechos de los estudiantes del rac-01",
+]
+
+
+def quitar_acentos(texto):
+    return ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
+
+
+def cargar_dataset():
+    for nombre in ('dataset_entrenamiento_enriquecido.json', 'dataset_entrenamiento.json'):
+        ruta = os.path.join(DATA_DIR, nombre)
+        if os.path.exists(ruta):
+            # La implementación de referencia recorre la lista de dicts del formato anterior
+            return nombre, list(DatasetQA.cargar(ruta).entradas())
+    raise FileNotFoundError("❌ No se encontró ningún dataset en la carpeta 'data'.")
+
+
+def preparar_consulta(consulta):
+    consulta_limpia = quitar_acentos(consulta.lower().strip())
+    consulta_normalizada = re.sub(r'[^\w\s]', '', consulta_limpia)
+    rac_extraido = None
+    for palabra in consulta_normalizada.split():
+        rac_match = re.match(r'rac[- :]?0?(\d+)(?!\d)', palabra)
+        if rac_match:
+            rac_extraido = rac_match.group(1)
+            break
+    palabras_clave = sum(1 for palabra in ['articulo', 'art', 'art.'] if palabra in consulta_limpia)
+    return consulta_limpia, consulta_normalizada, rac_extraido, palabras_clave
+
+
+# Implementación anterior con difflib, conservada como referencia
+def buscar_difflib(dataset, consulta):
+    consulta_limpia, consulta_normalizada, rac_extraido, palabras_clave = preparar_consulta(consulta)
+    coincidencias = []
+    for i, entrada in enumerate(dataset):
+        texto_entrada = quitar_acentos((entrada.get('contexto', '') + " " + entrada.get('respuesta', '')).lower())
+        pregunta_entrada = quitar_acentos(entrada.get('pregunta', '').lower())
+        entry_r_matches = re.findall(r'\brac[- :]?0?(\d+)(?!\d)', texto_entrada)
+        contexto_rac = 1 if rac_extraido and rac_extraido in entry_r_matches else 0
+        relevancia = (
+                difflib.SequenceMatcher(None, consulta_limpia, pregunta_entrada).ratio() * 0.4 +
+                palabras_clave * 0.2 +
+                contexto_rac * 0.3 +
+                difflib.SequenceMatcher(None, consulta_normalizada, pregunta_entrada).ratio() * 0.1
+        )
+        if relevancia > 0.3:
+            coincidencias.append((contexto_rac, relevancia, i))
+    return [i for _, _, i in sorted(coincidencias, reverse=True)[:5]]
+
+
+def buscar_vectorizado(motor, racs_por_entrada, consulta, candidatos=100):
+    """Preselección con la matriz dispersa y difflib solo sobre los candidatos (modelo_consulta)."""
+    consulta_limpia, consulta_normalizada, rac_extraido, palabras_clave = preparar_consulta(consulta)
+    similitud_exacta, similitud_normalizada = motor.similitudes(consulta_limpia, consulta_normalizada)
+    contexto_rac = np.zeros(motor.total, dtype=np.float32)
+    if rac_extraido:
+        contexto_rac[[i for i, racs in enumerate(racs_por_entrada) if rac_extraido in racs]] = 1
+    indices = mejores_indices(contexto_rac * 10 + similitud_exacta * 0.4 + similitud_normalizada * 0.1, candidatos)
+    contexto_rac = contexto_rac[indices]
+    relevancia = (motor.ratios(consulta_limpia, indices) * 0.4 + palabras_clave * 0.2 + contexto_rac * 0.3 +
+                  motor.ratios(consulta_normalizada, indices) * 0.1)
+    orden = np.where(relevancia > 0.3, contexto_rac * 10 + relevancia, -np.inf)
+    return [int(indices[j]) for j in np.lexsort((-indices, -orden))[:5] if np.isfinite(orden[j])]
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        for consulta in CONSULTAS:
+            inicio = time.perf_counter()
+            funcion(consulta)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), statistics.mean(tiempos)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="buscar_coincidencias: difflib vs matriz dispersa + difflib")
+    parser.add_argument("--candidatos", type=int, default=100, help="preguntas preseleccionadas para difflib")
+    parser.add_argument("--muestra", type=int, default=60, help="preguntas del dataset usadas como consultas")
+    args = parser.parse_args()
+
+    nombre, dataset = cargar_dataset()
+    print(f"📊 Benchmark de buscar_coincidencias sobre {nombre} ({len(dataset)} entradas)\n")
+
+    inicio = time.perf_counter()
+    motor = MotorSimilitudPreguntas([quitar_acentos(e.get('pregunta', '').lower()) for e in dataset])
+    racs_por_entrada = [
+        set(re.findall(r'\brac[- :]?0?(\d+)(?!\d)',
+                       quitar_acentos((e.get('contexto', '') + " " + e.get('respuesta', '')).lower())))
+        for e in dataset
+    ]
+    print(f"⏱️ Construcción de la matriz: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    buscar_nuevo = lambda c: buscar_vectorizado(motor, racs_por_entrada, c, args.candidatos)
+    p50_difflib, media_difflib = medir(lambda c: buscar_difflib(dataset, c), repeticiones=1)
+    p50_vector, media_vector = medir(buscar_nuevo, repeticiones=5)
+
+    print(f"🐢 difflib:      p50 {p50_difflib:9.2f} ms | media {media_difflib:9.2f} ms")
+    print(f"⚡ vectorizado:  p50 {p50_vector:9.2f} ms | media {media_vector:9.2f} ms")
+    print(f"🚀 Aceleración p50: x{p50_difflib / max(p50_vector, 1e-9):.1f}\n")
+
+    for consulta in CONSULTAS:
+        anterior = buscar_difflib(dataset, consulta)
+        nuevo = buscar_nuevo(consulta)
+        comunes = len(set(anterior) & set(nuevo))
+        print(f"🔹 {consulta}  (top-5 en común: {comunes}/{len(anterior)})")
+        print(f"   difflib:     {dataset[anterior[0]]['pregunta'] if anterior else '-'}")
+        print(f"   vectorizado: {dataset[nuevo[0]]['pregunta'] if nuevo else '-'}")
+
+    # Preguntas del propio dataset: plantillas que solo cambian el número de artículo, el caso
+    # en que la similitud coseno sola más se aparta del orden de difflib
+    consultas = [dataset[i]['pregunta'] for i in random.Random(0).sample(range(len(dataset)), min(args.muestra, len(dataset)))]
+    comunes = total = primero = 0
+    for consulta in consultas:
+        anterior, nuevo = buscar_difflib(dataset, consulta), buscar_nuevo(consulta)
+        comunes += len(set(anterior) & set(nuevo))
+        total += max(len(anterior), len(nuevo))
+        primero += bool(anterior and nuevo and anterior[0] == nuevo[0])
+    print(f"\n📈 {len(consultas)} preguntas del dataset: top-5 en común {comunes / max(total, 1):.1%}, "
+          f"mismo primer resultado {primero / max(len(consultas), 1):.1%}")
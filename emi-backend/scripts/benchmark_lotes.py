@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+# Permite importar el paquete scripts al ejecutar este archivo directamente
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.api_llm import buscar_lote, normalizar_texto, precargar_recursos
+from scripts.lotes_embeddings import AgrupadorConsultas
+
+CONSULTAS = [
+    "¿Qué tipos de permisos existen para los estudiantes?",
+    "requisitos de admisión a la carrera",
+    "que pasa si tengo inasistencia a clases",
+    "cómo se realiza la evaluación final",
+    "obligaciones del estudiante militar",
+    "convalidación de asignaturas",
+    "derechos de los estudiantes",
+    "cuál es la nota mínima de aprobación",
+]
+
+
+def ejecutar(buscar, total, hilos):
+    """Lanza `total` consultas desde `hilos` hilos concurrentes; devuelve (consultas/s, latencias ms)."""
+    def una(i):
+        inicio = time.perf_counter()
+        buscar((normalizar_texto(CONSULTAS[i % len(CONSULTAS)]), 10))
+        return (time.perf_counter() - inicio) * 1000
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        latencias = list(pool.map(una, range(total)))
+    return total / (time.perf_counter() - inicio), latencias
+
+
+def reportar(nombre, qps, latencias):
+    p95 = statistics.quantiles(latencias, n=20)[18]
+    print(f"{nombre:34} {qps:8.1f} consultas/s | p50 {statistics.median(latencias):7.1f} ms | p95 {p95:7.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput de embeddings + FAISS con y sin micro-batching")
+    parser.add_argument("--consultas", type=int, default=512)
+    parser.add_argument("--hilos", type=int, default=32)
+    parser.add_argument("--max-lote", type=int, default=32)
+    parser.add_argument("--espera-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    precargar_recursos()
+    buscar_lote([(normalizar_texto(CONSULTAS[0]), 10)])  # calentamiento
+
+    print(f"\n📊 {args.consultas} consultas desde {args.hilos} hilos\n")
+    reportar("Sin agrupar (lote de 1)", *ejecutar(lambda c: buscar_lote([c])[0], args.consultas, args.hilos))
+
+    agrupador = AgrupadorConsultas(buscar_lote, max_lote=args.max_lote, espera_ms=args.espera_ms)
+    reportar(f"Micro-batching (max {args.max_lote}, {args.espera_ms} ms)",
+             *ejecutar(agrupador.enviar, args.consultas, args.hilos))
+    print(f"\n📦 {agrupador.estadisticas()}")
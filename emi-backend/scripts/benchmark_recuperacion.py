@@ -0,0 +1,74 @@
+import os
+import re
+import sys
+import random
+import argparse
+
+# Permite importar el paquete scripts al ejecutar este archivo directamente
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+
+from scripts.dataset_qa import DatasetQA
+from scripts.recuperacion_hibrida import fusionar_rrf
+
+# "¿Cuál es el propósito del artículo 9 del RAC-02?" -> ('RAC-02', 9)
+PATRON_REFERENCIA = re.compile(r'art[íi]culo\s+(\d+)\s+del\s+(RAC-\d+)', re.IGNORECASE)
+MODOS = ["densa", "dispersa", "hibrida"]
+
+
+def articulos_esperados(metadata):
+    """(reglamento, número) -> ids de la metadata de ese artículo."""
+    esperados = {}
+    for i, articulo in enumerate(metadata):
+        numero = re.search(r'\d+', articulo.get('articulo', ''))
+        if numero:
+            esperados.setdefault((articulo.get('reglamento', '').upper(), int(numero.group(0))), set()).add(i)
+    return esperados
+
+
+def recall_en_k(rankings, relevantes, ks):
+    """Proporción de preguntas con algún artículo relevante entre los k primeros, para cada k."""
+    return {k: sum(bool(set(ranking[:k]) & esperados) for ranking, esperados in zip(rankings, relevantes))
+            / max(len(rankings), 1) for k in ks}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="recall@k de la recuperación densa, dispersa e híbrida (RRF)")
+    parser.add_argument("--dataset", default=os.path.join(DATA_DIR, 'dataset_entrenamiento.json'))
+    parser.add_argument("--muestra", type=int, default=300, help="preguntas del dataset evaluadas")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--modos", nargs="+", choices=MODOS, default=MODOS)
+    args = parser.parse_args()
+
+    from scripts.api_llm import (obtener_metadata, obtener_indice_disperso, buscar_ids_similares_lote,
+                                 filtrar_ids_utiles, RECUPERACION_CANDIDATOS)
+
+    esperados = articulos_esperados(obtener_metadata())
+    preguntas, relevantes = [], []
+    for pregunta in DatasetQA.cargar(args.dataset).preguntas:
+        referencia = PATRON_REFERENCIA.search(pregunta)
+        ids = referencia and esperados.get((referencia.group(2).upper(), int(referencia.group(1))))
+        if ids:
+            preguntas.append(pregunta)
+            relevantes.append(ids)
+    muestra = random.Random(0).sample(range(len(preguntas)), min(args.muestra, len(preguntas)))
+    preguntas, relevantes = [preguntas[i] for i in muestra], [relevantes[i] for i in muestra]
+    print(f"📊 recall@k sobre {len(preguntas)} preguntas del dataset ({RECUPERACION_CANDIDATOS} candidatos por lista)\n")
+
+    rankings = {}
+    if "densa" in args.modos or "hibrida" in args.modos:
+        rankings["densa"] = [ids for _, ids in buscar_ids_similares_lote(preguntas, top_k=RECUPERACION_CANDIDATOS)]
+    if "dispersa" in args.modos or "hibrida" in args.modos:
+        indice_disperso = obtener_indice_disperso()
+        if not indice_disperso:
+            sys.exit("❌ No hay vectorizador TF-IDF (python scripts/vectorizar_texto.py)")
+        rankings["dispersa"] = [filtrar_ids_utiles(indice_disperso.buscar(p, RECUPERACION_CANDIDATOS)) for p in preguntas]
+    if "hibrida" in args.modos:
+        rankings["hibrida"] = [fusionar_rrf([densa, dispersa])
+                               for densa, dispersa in zip(rankings["densa"], rankings["dispersa"])]
+
+    print(f"{'modo':10}" + "".join(f"{f'recall@{k}':>11}" for k in args.k))
+    for modo in args.modos:
+        recall = recall_en_k(rankings[modo], relevantes, args.k)
+        print(f"{modo:10}" + "".join(f"{recall[k]:11.3f}" for k in args.k))
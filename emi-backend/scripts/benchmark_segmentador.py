@@ -0,0 +1,66 @@
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+# Permite importar el paquete scripts al ejecutar este archivo directamente
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+
+from scripts.segmentador import segmentar_articulos
+
+
+def extraer_articulos_regex(texto):
+    """Implementación anterior de preparar_datos.extraer_articulos, como referencia."""
+    pattern = r'(art[íi]culo\s*\d+)[:\s]*(.*?)(?=art[ íi]culo\s*\d+|$)'
+    return [(titulo, contenido.strip()) for titulo, contenido in re.findall(pattern, texto, re.DOTALL | re.IGNORECASE)]
+
+
+def reglamento_sintetico(megabytes, palabras_por_articulo, semilla=0):
+    """Texto con el vocabulario de RAC-01/02 y un encabezado 'Artículo N:' cada ~palabras_por_articulo."""
+    with open(os.path.join(DATA_DIR, 'rac01.txt'), 'r', encoding='utf-8') as f:
+        vocabulario = [p for p in re.sub(r'art[íi]culo', '', f.read(), flags=re.IGNORECASE).split() if p]
+    rng = random.Random(semilla)
+    partes, tamano, numero = [], 0, 1
+    objetivo = int(megabytes * 1024 * 1024)
+    while tamano < objetivo:
+        cuerpo = ' '.join(rng.choices(vocabulario, k=palabras_por_articulo))
+        parte = f"Artículo {numero}: {cuerpo}\n"
+        partes.append(parte)
+        tamano += len(parte.encode('utf-8'))
+        numero += 1
+    return ''.join(partes)
+
+
+def medir(funcion, texto, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(texto)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Segmentación de artículos: regex perezosa vs finditer")
+    parser.add_argument("--megabytes", type=float, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--palabras", type=int, nargs="+", default=[80, 5000],
+                        help="palabras por artículo (pocas = muchos encabezados)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"\n{'MB':>6} {'palabras/art':>13} {'artículos':>10} {'regex (s)':>10} {'finditer (s)':>13} {'MB/s':>8}")
+    for megabytes in args.megabytes:
+        for palabras in args.palabras:
+            texto = reglamento_sintetico(megabytes, palabras)
+            t_regex, esperado = medir(extraer_articulos_regex, texto, args.repeticiones)
+            # Ambos scripts aplican strip() al cuerpo: '$' de la regex deja fuera el salto de línea final
+            t_nuevo, obtenido = medir(lambda t: [(titulo, cuerpo.strip()) for titulo, cuerpo in segmentar_articulos(t)],
+                                      texto, args.repeticiones)
+            if esperado != obtenido:
+                raise AssertionError("❌ La segmentación no coincide con la implementación anterior")
+            print(f"{megabytes:6.1f} {palabras:13d} {len(obtenido):10d} {t_regex:10.3f} {t_nuevo:13.3f} "
+                  f"{megabytes / t_nuevo:8.1f}")
@@ -0,0 +1,64 @@
+import os
+import queue
+import asyncio
+import threading
+
+# Un único bucle asyncio por proceso, en un hilo daemon. Las vistas de Flask (síncronas) le
+# envían corrutinas, de modo que muchas llamadas de red pueden estar en curso a la vez
+# sin ocupar un hilo de cómputo cada una.
+_bucle = None
+_pid_bucle = None
+_lock = threading.Lock()
+_FIN = object()
+
+
+class _Fallo:
+    def __init__(self, error):
+        self.error = error
+
+
+def obtener_bucle() -> asyncio.AbstractEventLoop:
+    global _bucle, _pid_bucle
+    # Tras un fork el hilo del bucle no existe en el hijo: se crea uno nuevo
+    if _bucle is None or _pid_bucle != os.getpid():
+        with _lock:
+            if _bucle is None or _pid_bucle != os.getpid():
+                bucle = asyncio.new_event_loop()
+                threading.Thread(target=bucle.run_forever, name="bucle_async", daemon=True).start()
+                _bucle, _pid_bucle = bucle, os.getpid()
+    return _bucle
+
+
+def ejecutar(corrutina, timeout: float = None):
+    """Ejecuta una corrutina en el bucle compartido y espera su resultado desde código síncrono."""
+    return asyncio.run_coroutine_threadsafe(corrutina, obtener_bucle()).result(timeout)
+
+
+def iterar(generador_async):
+    """
+    Recorre un generador asíncrono desde código síncrono (p. ej. una respuesta en streaming de Flask).
+    Si el consumidor se detiene antes de tiempo (cliente desconectado), se cancela la tarea.
+    """
+    cola = queue.Queue()
+
+    async def consumir():
+        try:
+            async for elemento in generador_async:
+                cola.put(elemento)
+        except Exception as e:
+            cola.put(_Fallo(e))
+        finally:
+            cola.put(_FIN)
+
+    futuro = asyncio.run_coroutine_threadsafe(consumir(), obtener_bucle())
+    try:
+        while True:
+            elemento = cola.get()
+            if elemento is _FIN:
+                break
+            if isinstance(elemento, _Fallo):
+                raise elemento.error
+            yield elemento
+    finally:
+        if not futuro.done():
+            futuro.cancel()
@@ -0,0 +1,81 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class CacheLRU:
+    """
+    Caché en memoria con desalojo LRU y expiración opcional por TTL (en segundos).
+    Es segura para usarse desde varios hilos y lleva contadores de aciertos y fallos.
+    """
+
+    def __init__(self, max_entradas: int = 1024, ttl: Optional[float] = None):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def obtener(self, clave: Hashable, defecto: Any = None) -> Any:
+        with self._lock:
+            item = self._datos.get(clave)
+            if item is None:
+                self.fallos += 1
+                return defecto
+            valor, expira = item
+            if expira is not None and expira < time.monotonic():
+                del self._datos[clave]
+                self.fallos += 1
+                return defecto
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave: Hashable, valor: Any, ttl: Optional[float] = None):
+        """ttl reemplaza al de la caché para esta entrada (p. ej. el tiempo que le quedaba)."""
+        ttl = ttl if ttl is not None else self.ttl
+        expira = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.desalojos += 1
+
+    def eliminar(self, clave: Hashable):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def items(self) -> list:
+        """Copia de los pares (clave, valor) vigentes, del menos al más recientemente usado."""
+        ahora = time.monotonic()
+        with self._lock:
+            return [(clave, valor) for clave, (valor, expira) in self._datos.items()
+                    if expira is None or expira >= ahora]
+
+    def purgar_expirados(self) -> int:
+        if not self.ttl:
+            return 0
+        ahora = time.monotonic()
+        with self._lock:
+            expirados = [clave for clave, (_, expira) in self._datos.items() if expira < ahora]
+            for clave in expirados:
+                del self._datos[clave]
+        return len(expirados)
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def estadisticas(self) -> dict:
+        total = self.aciertos + self.fallos
+        return {
+            'entradas': len(self._datos),
+            'max_entradas': self.max_entradas,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'desalojos': self.desalojos,
+            'tasa_aciertos': round(self.aciertos / total, 4) if total else 0.0
+        }
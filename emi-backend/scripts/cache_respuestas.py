@@ -0,0 +1,193 @@
+import os
+import time
+import atexit
+import pickle
+import tempfile
+import threading
+import numpy as np
+from typing import Optional, Sequence
+from scripts.cache_lru import CacheLRU
+
+
+class CacheSemantica:
+    """
+    Caché de respuestas del LLM.
+    - Acierto exacto: misma pregunta normalizada y mismos artículos recuperados.
+    - Acierto semántico: el embedding de la pregunta está a una similitud coseno >= umbral
+      de una pregunta ya respondida y los artículos recuperados para ambas coinciden al menos
+      en la proporción `solapamiento` (Jaccard): "artículo 12" y "artículo 13" se parecen
+      mucho como texto, pero recuperan artículos distintos.
+    Desalojo LRU/TTL y persistencia opcional en disco (pickle) entre reinicios. El archivo
+    guarda la versión del índice (manifiesto publicado): los ids de artículo de las claves son
+    filas de esa metadata, así que tras reconstruir el índice se descarta.
+    """
+
+    def __init__(self, max_entradas: int = 1000, ttl: Optional[float] = 86400, umbral: float = 0.95,
+                 ruta: Optional[str] = None, guardar_cada: int = 20, solapamiento: float = 0.5,
+                 version_indice: Optional[str] = None):
+        self.cache = CacheLRU(max_entradas=max_entradas, ttl=ttl)
+        self.ttl = ttl
+        self.umbral = umbral
+        self.solapamiento = solapamiento
+        self.ruta = ruta
+        self.version_indice = version_indice
+        self.guardar_cada = guardar_cada
+        self.aciertos_exactos = 0
+        self.aciertos_semanticos = 0
+        self.fallos = 0
+        self._pendientes = 0
+        self._lock = threading.Lock()
+        # Una sola escritura del archivo a la vez dentro del proceso
+        self._lock_disco = threading.Lock()
+        # Matriz de embeddings de las entradas vigentes; se reconstruye solo si la caché cambió
+        self._matriz = None
+        self._claves_matriz = []
+        if ruta:
+            self.cargar()
+            atexit.register(self.guardar_en_disco)
+
+    @staticmethod
+    def _normalizar(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norma = np.linalg.norm(vector)
+        return vector / norma if norma else vector
+
+    def _matriz_embeddings(self):
+        if self._matriz is None:
+            entradas = self.cache.items()
+            self._claves_matriz = [clave for clave, _ in entradas]
+            self._matriz = np.vstack([valor['embedding'] for _, valor in entradas]) if entradas else None
+        return self._matriz
+
+    def _mismos_articulos(self, ids_articulos: Sequence[int], ids_candidato: Sequence[int]) -> bool:
+        actuales, candidatos = set(ids_articulos), set(ids_candidato)
+        union = actuales | candidatos
+        return bool(union) and len(actuales & candidatos) / len(union) >= self.solapamiento
+
+    def buscar(self, texto_normalizado: str, ids_articulos: Sequence[int], embedding=None) -> Optional[str]:
+        clave = (texto_normalizado, tuple(ids_articulos))
+        entrada = self.cache.obtener(clave)
+        if entrada is not None:
+            self.aciertos_exactos += 1
+            return entrada['respuesta']
+
+        if embedding is not None:
+            with self._lock:
+                matriz = self._matriz_embeddings()
+                claves = self._claves_matriz
+            if matriz is not None:
+                similitudes = matriz @ self._normalizar(embedding)
+                # Todos los candidatos sobre el umbral, del más al menos similar: el mejor puede
+                # haber expirado o corresponder a otros artículos
+                for i in np.argsort(-similitudes):
+                    if similitudes[i] < self.umbral:
+                        break
+                    if not self._mismos_articulos(ids_articulos, claves[i][1]):
+                        continue
+                    entrada = self.cache.obtener(claves[i])
+                    if entrada is not None:
+                        self.aciertos_semanticos += 1
+                        return entrada['respuesta']
+
+        self.fallos += 1
+        return None
+
+    def guardar(self, texto_normalizado: str, ids_articulos: Sequence[int], embedding, respuesta: str):
+        clave = (texto_normalizado, tuple(ids_articulos))
+        self.cache.guardar(clave, {
+            'respuesta': respuesta,
+            'embedding': self._normalizar(embedding),
+            'creado': time.time()
+        })
+        with self._lock:
+            self._matriz = None
+            self._pendientes += 1
+            persistir = self.ruta and self._pendientes >= self.guardar_cada
+        if persistir:
+            self.guardar_en_disco()
+
+    def guardar_en_disco(self):
+        """Escribe la caché en disco; un error se informa sin afectar la respuesta en curso."""
+        if not self.ruta:
+            return
+        with self._lock:
+            self._pendientes = 0
+        directorio = os.path.dirname(os.path.abspath(self.ruta))
+        with self._lock_disco:
+            temporal = None
+            try:
+                os.makedirs(directorio, exist_ok=True)
+                # Temporal único: otros procesos pueden estar escribiendo el mismo archivo
+                descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+                with os.fdopen(descriptor, 'wb') as f:
+                    pickle.dump({'version_indice': self.version_indice, 'entradas': self.cache.items()}, f)
+                # Reemplazo atómico: otro proceso nunca lee un archivo a medio escribir
+                os.replace(temporal, self.ruta)
+            except Exception as e:
+                print(f"⚠️ No se pudo guardar la caché de respuestas en {self.ruta}: {e}")
+                if temporal and os.path.exists(temporal):
+                    os.remove(temporal)
+
+    def cargar(self):
+        if not self.ruta or not os.path.exists(self.ruta):
+            return
+        try:
+            with open(self.ruta, 'rb') as f:
+                datos = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ No se pudo leer la caché de respuestas {self.ruta}: {e}")
+            return
+        if isinstance(datos, dict):
+            version, entradas = datos.get('version_indice'), datos['entradas']
+        else:
+            # Formato anterior: solo la lista de entradas, sin versión del índice
+            version, entradas = None, datos
+        if version != self.version_indice:
+            print(f"🗑️ Caché de respuestas descartada: es del índice {version}, el activo es {self.version_indice}")
+            try:
+                os.remove(self.ruta)
+            except OSError:
+                pass
+            return
+        ahora = time.time()
+        vigentes = [(clave, valor) for clave, valor in entradas
+                    if not self.ttl or ahora - valor['creado'] < self.ttl]
+        for clave, valor in vigentes:
+            # Conserva el tiempo de vida que le quedaba, no uno completo desde el reinicio
+            self.cache.guardar(clave, valor, ttl=self.ttl - (ahora - valor['creado']) if self.ttl else None)
+        print(f"🗃️ Caché de respuestas: {len(vigentes)} entradas cargadas desde {self.ruta}")
+
+    def estadisticas(self) -> dict:
+        consultas = self.aciertos_exactos + self.aciertos_semanticos + self.fallos
+        return {
+            'entradas': len(self.cache),
+            'max_entradas': self.cache.max_entradas,
+            'umbral_coseno': self.umbral,
+            'aciertos_exactos': self.aciertos_exactos,
+            'aciertos_semanticos': self.aciertos_semanticos,
+            'fallos': self.fallos,
+            'desalojos': self.cache.desalojos,
+            'tasa_aciertos': round((consultas - self.fallos) / consultas, 4) if consultas else 0.0
+        }
+
+
+def crear_cache_respuestas(version_indice: Optional[str] = None) -> Optional[CacheSemantica]:
+    """
+    version_indice: versión del índice activo; el archivo de otra versión se descarta.
+    Variables de entorno:
+      CACHE_RESPUESTAS: '0' la desactiva.
+      CACHE_RESPUESTAS_MAX, CACHE_RESPUESTAS_TTL (segundos), CACHE_RESPUESTAS_UMBRAL (coseno).
+      CACHE_RESPUESTAS_SOLAPAMIENTO: proporción mínima de artículos recuperados en común (Jaccard)
+        para un acierto semántico.
+      CACHE_RESPUESTAS_RUTA: archivo para conservarla entre reinicios (sin definir = solo memoria).
+    """
+    if os.getenv("CACHE_RESPUESTAS", "1") == "0":
+        return None
+    return CacheSemantica(
+        max_entradas=int(os.getenv("CACHE_RESPUESTAS_MAX", 1000)),
+        ttl=float(os.getenv("CACHE_RESPUESTAS_TTL", 86400)),
+        umbral=float(os.getenv("CACHE_RESPUESTAS_UMBRAL", 0.95)),
+        ruta=os.getenv("CACHE_RESPUESTAS_RUTA"),
+        solapamiento=float(os.getenv("CACHE_RESPUESTAS_SOLAPAMIENTO", 0.5)),
+        version_indice=version_indice
+    )
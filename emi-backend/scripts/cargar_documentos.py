@@ -1,15 +1,21 @@
 import os
 import re
+import sys
 import json
 
 # Obtener la ruta absoluta a la carpeta raíz del proyecto
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.segmentador import segmentar_articulos
+from scripts.registro_corpus import cargar_registro, ruta_fuente
 
 # Rutas correctas desde cualquier ubicación
-RUTA_RAC01 = os.path.join(BASE_DIR, 'data', 'rac01.txt')
-RUTA_RAC02 = os.path.join(BASE_DIR, 'data', 'rac02.txt')
 RUTA_SALIDA_JSON = os.path.join(BASE_DIR, 'data', 'secciones_completas.json')
 
+# El texto ya pasó por limpiar_texto: sin tildes perdidas ni signos de puntuación
+PATRON_SECCION = re.compile(r'artículo \d+', re.IGNORECASE)
+
 
 def cargar_texto_txt(archivo):
     with open(archivo, 'r', encoding='utf-8') as f:
@@ -24,15 +30,13 @@ def limpiar_texto(texto):
 
 
 def dividir_en_secciones(texto, documento_nombre):
-    secciones = re.split(r'(artículo \d+)', texto, flags=re.IGNORECASE)
     resultados = []
 
-    for i in range(1, len(secciones), 2):
-        titulo = secciones[i].strip()
-        contenido = secciones[i + 1].strip() if i + 1 < len(secciones) else ""
+    for titulo, contenido in segmentar_articulos(texto, PATRON_SECCION):
+        contenido = contenido.strip()
         if contenido:
             resultados.append({
-                "titulo": titulo,
+                "titulo": titulo.strip(),
                 "contenido": contenido,
                 "documento": documento_nombre
             })
@@ -45,15 +49,13 @@ def guardar_json(secciones, ruta_salida):
         json.dump(secciones, f, ensure_ascii=False, indent=2)
 
 
-# Procesar documentos
-texto_rac01 = limpiar_texto(cargar_texto_txt(RUTA_RAC01))
-texto_rac02 = limpiar_texto(cargar_texto_txt(RUTA_RAC02))
-
-secciones_rac01 = dividir_en_secciones(texto_rac01, "RAC-01")
-secciones_rac02 = dividir_en_secciones(texto_rac02, "RAC-02")
+# Procesar cada reglamento registrado en data/corpus.json
+secciones_totales = []
+for reglamento in cargar_registro():
+    texto = limpiar_texto(cargar_texto_txt(ruta_fuente(reglamento)))
+    secciones_totales.extend(dividir_en_secciones(texto, reglamento['id']))
 
-# Unir y guardar en archivo
-secciones_totales = secciones_rac01 + secciones_rac02
+# Guardar en archivo
 guardar_json(secciones_totales, RUTA_SALIDA_JSON)
 
 print(f"✅ {len(secciones_totales)} secciones guardadas en {RUTA_SALIDA_JSON}")
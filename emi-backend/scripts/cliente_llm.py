@@ -0,0 +1,281 @@
+import os
+import time
+import random
+import asyncio
+import threading
+import httpx
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+from openai import APITimeoutError, APIConnectionError, RateLimitError, InternalServerError
+
+# Plazo total de una llamada (incluidos los reintentos) y de la conexión de cada intento
+PLAZO_S = float(os.getenv("OPENAI_PLAZO_S", 30))
+TIMEOUT_CONEXION_S = float(os.getenv("OPENAI_TIMEOUT_CONEXION_S", 5))
+REINTENTOS = int(os.getenv("OPENAI_REINTENTOS", 2))
+ESPERA_BASE_S = float(os.getenv("OPENAI_ESPERA_BASE_S", 0.5))
+ESPERA_MAX_S = float(os.getenv("OPENAI_ESPERA_MAX_S", 8))
+# Llamadas en curso a la vez por proceso (una cuota para el cliente síncrono y otra para el asíncrono)
+MAX_EN_CURSO = int(os.getenv("OPENAI_MAX_EN_CURSO", 16))
+DISYUNTOR_FALLOS = int(os.getenv("OPENAI_DISYUNTOR_FALLOS", 5))
+DISYUNTOR_ENFRIAMIENTO_S = float(os.getenv("OPENAI_DISYUNTOR_ENFRIAMIENTO_S", 30))
+
+# Errores que indican un servicio lento o caído: se reintentan y cuentan para el disyuntor.
+# Los demás (credenciales, petición inválida) se propagan de inmediato.
+ERRORES_TRANSITORIOS = (APITimeoutError, APIConnectionError, RateLimitError, InternalServerError)
+
+
+class LLMNoDisponible(Exception):
+    """La llamada no se hizo: disyuntor abierto, demasiadas llamadas en curso o plazo agotado."""
+
+
+class Disyuntor:
+    """
+    Circuit breaker: tras `umbral_fallos` fallos transitorios seguidos se abre y rechaza las
+    llamadas durante `enfriamiento_s`; después deja pasar una sola llamada de prueba
+    (semiabierto) y vuelve a cerrarse si tiene éxito. Si la llamada de prueba no informa su
+    resultado en otro `enfriamiento_s`, se permite una nueva.
+    """
+    CERRADO, ABIERTO, SEMIABIERTO = "cerrado", "abierto", "semiabierto"
+
+    def __init__(self, umbral_fallos: int = DISYUNTOR_FALLOS, enfriamiento_s: float = DISYUNTOR_ENFRIAMIENTO_S):
+        self.umbral_fallos = umbral_fallos
+        self.enfriamiento_s = enfriamiento_s
+        self.estado = self.CERRADO
+        self.fallos_seguidos = 0
+        self.aperturas = 0
+        self.rechazadas = 0
+        self._abierto_hasta = 0.0
+        self._lock = threading.Lock()
+
+    def permitir(self) -> bool:
+        with self._lock:
+            if self.estado == self.CERRADO:
+                return True
+            ahora = time.monotonic()
+            if ahora >= self._abierto_hasta:
+                self.estado = self.SEMIABIERTO
+                self._abierto_hasta = ahora + self.enfriamiento_s
+                return True
+            self.rechazadas += 1
+            return False
+
+    def registrar_exito(self):
+        with self._lock:
+            self.estado = self.CERRADO
+            self.fallos_seguidos = 0
+
+    def registrar_fallo(self):
+        with self._lock:
+            self.fallos_seguidos += 1
+            if self.estado == self.SEMIABIERTO or self.fallos_seguidos >= self.umbral_fallos:
+                if self.estado != self.ABIERTO:
+                    self.aperturas += 1
+                self.estado = self.ABIERTO
+                self._abierto_hasta = time.monotonic() + self.enfriamiento_s
+
+    def estadisticas(self) -> dict:
+        return {
+            'estado': self.estado,
+            'fallos_seguidos': self.fallos_seguidos,
+            'aperturas': self.aperturas,
+            'rechazadas': self.rechazadas
+        }
+
+
+def espera_reintento(intento: int) -> float:
+    # Backoff exponencial con jitter completo: los workers no reintentan todos a la vez
+    return random.uniform(0, min(ESPERA_MAX_S, ESPERA_BASE_S * 2 ** intento))
+
+
+class TransporteLLM:
+    """
+    Acceso a la API de chat de OpenAI para la API: clientes con pool de conexiones (uno por
+    proceso, se recrean tras un fork), plazo por llamada, reintentos con backoff y jitter, límite
+    de llamadas en curso y disyuntor. base_url (u OPENAI_BASE_URL) permite apuntarlo a un servidor
+    de prueba (scripts/servidor_llm_simulado.py).
+    """
+
+    def __init__(self, api_key: str = None, base_url: str = None, plazo_s: float = PLAZO_S,
+                 reintentos: int = REINTENTOS, max_en_curso: int = MAX_EN_CURSO, disyuntor: Disyuntor = None):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        self.plazo_s = plazo_s
+        self.reintentos = reintentos
+        self.max_en_curso = max_en_curso
+        self.disyuntor = disyuntor or Disyuntor()
+        self._semaforo = threading.BoundedSemaphore(max_en_curso)
+        self._semaforo_async = None
+        self._clientes = {}
+        # Protege la creación de clientes y los contadores, que se actualizan desde varios hilos
+        self._lock = threading.Lock()
+        self.llamadas = 0
+        self.reintentos_hechos = 0
+        self.fallos = 0
+        self.en_curso = 0
+
+    def _cliente(self, asincrono: bool):
+        clave = (os.getpid(), asincrono)
+        cliente = self._clientes.get(clave)
+        if cliente is None:
+            with self._lock:
+                cliente = self._clientes.get(clave)
+                if cliente is None:
+                    limites = httpx.Limits(max_connections=self.max_en_curso,
+                                           max_keepalive_connections=self.max_en_curso)
+                    opciones = dict(api_key=self.api_key, base_url=self.base_url, max_retries=0,
+                                    timeout=httpx.Timeout(self.plazo_s, connect=TIMEOUT_CONEXION_S))
+                    if asincrono:
+                        cliente = AsyncOpenAI(http_client=DefaultAsyncHttpxClient(limits=limites), **opciones)
+                    else:
+                        cliente = OpenAI(http_client=DefaultHttpxClient(limits=limites), **opciones)
+                    self._clientes = {c: v for c, v in self._clientes.items() if c[0] == os.getpid()}
+                    self._clientes[clave] = cliente
+        return cliente
+
+    def _sumar(self, contador: str, cantidad: int = 1):
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + cantidad)
+
+    def _semaforo_del_bucle(self) -> asyncio.Semaphore:
+        # El semáforo asíncrono pertenece al bucle de bucle_async de este proceso
+        if self._semaforo_async is None or self._semaforo_async[0] != os.getpid():
+            self._semaforo_async = (os.getpid(), asyncio.Semaphore(self.max_en_curso))
+        return self._semaforo_async[1]
+
+    def _timeout(self, limite: float) -> httpx.Timeout:
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            raise LLMNoDisponible(f"plazo de {self.plazo_s:.0f} s agotado")
+        return httpx.Timeout(restante, connect=min(TIMEOUT_CONEXION_S, restante))
+
+    def _registrar(self, error: Exception = None) -> bool:
+        """Actualiza el disyuntor con el resultado de un intento; True si el error es transitorio."""
+        if error is None or not isinstance(error, ERRORES_TRANSITORIOS):
+            # Un error de la petición (4xx) también demuestra que el servicio responde
+            self.disyuntor.registrar_exito()
+            return False
+        self.disyuntor.registrar_fallo()
+        return True
+
+    def _puede_reintentar(self, error: Exception, intento: int, limite: float) -> float:
+        """
+        Espera antes del siguiente intento, o None si no se debe reintentar (el llamador propaga
+        `error`). Si el reintento ya no cabe en el plazo total, lanza LLMNoDisponible.
+        """
+        if not self._registrar(error) or intento >= self.reintentos:
+            return None
+        espera = espera_reintento(intento)
+        if time.monotonic() + espera >= limite:
+            self._sumar('fallos')
+            raise LLMNoDisponible(f"plazo de {self.plazo_s:.0f} s agotado tras {intento + 1} intentos") from error
+        if not self.disyuntor.permitir():
+            return None
+        self._sumar('reintentos_hechos')
+        return espera
+
+    def completar(self, mensajes, **parametros):
+        """chat.completions.create con las garantías de la clase; lanza LLMNoDisponible o el error de OpenAI."""
+        limite = time.monotonic() + self.plazo_s
+        if not self.disyuntor.permitir():
+            raise LLMNoDisponible("servicio degradado (disyuntor abierto)")
+        if not self._semaforo.acquire(timeout=self.plazo_s):
+            raise LLMNoDisponible("demasiadas llamadas en curso")
+        self._sumar('llamadas')
+        self._sumar('en_curso')
+        try:
+            intento = 0
+            while True:
+                try:
+                    respuesta = self._cliente(False).chat.completions.create(
+                        messages=mensajes, timeout=self._timeout(limite), **parametros)
+                    self._registrar()
+                    return respuesta
+                except LLMNoDisponible:
+                    raise
+                except Exception as e:
+                    espera = self._puede_reintentar(e, intento, limite)
+                    if espera is None:
+                        self._sumar('fallos')
+                        raise
+                    time.sleep(espera)
+                    intento += 1
+        finally:
+            self._sumar('en_curso', -1)
+            self._semaforo.release()
+
+    async def _crear_async(self, mensajes, limite: float, **parametros):
+        intento = 0
+        while True:
+            try:
+                respuesta = await self._cliente(True).chat.completions.create(
+                    messages=mensajes, timeout=self._timeout(limite), **parametros)
+                self._registrar()
+                return respuesta
+            except LLMNoDisponible:
+                raise
+            except Exception as e:
+                espera = self._puede_reintentar(e, intento, limite)
+                if espera is None:
+                    self._sumar('fallos')
+                    raise
+                await asyncio.sleep(espera)
+                intento += 1
+
+    async def completar_async(self, mensajes, **parametros):
+        limite = time.monotonic() + self.plazo_s
+        if not self.disyuntor.permitir():
+            raise LLMNoDisponible("servicio degradado (disyuntor abierto)")
+        try:
+            semaforo = self._semaforo_del_bucle()
+            await asyncio.wait_for(semaforo.acquire(), self.plazo_s)
+        except asyncio.TimeoutError:
+            raise LLMNoDisponible("demasiadas llamadas en curso")
+        self._sumar('llamadas')
+        self._sumar('en_curso')
+        try:
+            return await self._crear_async(mensajes, limite, **parametros)
+        finally:
+            self._sumar('en_curso', -1)
+            semaforo.release()
+
+    async def completar_stream(self, mensajes, **parametros):
+        """
+        Versión en streaming (generador asíncrono de eventos). Solo se reintenta hasta recibir la
+        respuesta inicial; el plazo limita la espera del primer byte y de cada fragmento.
+        """
+        limite = time.monotonic() + self.plazo_s
+        if not self.disyuntor.permitir():
+            raise LLMNoDisponible("servicio degradado (disyuntor abierto)")
+        try:
+            semaforo = self._semaforo_del_bucle()
+            await asyncio.wait_for(semaforo.acquire(), self.plazo_s)
+        except asyncio.TimeoutError:
+            raise LLMNoDisponible("demasiadas llamadas en curso")
+        self._sumar('llamadas')
+        self._sumar('en_curso')
+        try:
+            stream = await self._crear_async(mensajes, limite, stream=True, **parametros)
+            # async with cierra la respuesta y devuelve la conexión al pool también si el stream se
+            # abandona (cliente desconectado, error): si no, queda ocupada hasta que pase el GC
+            async with stream:
+                try:
+                    async for evento in stream:
+                        yield evento
+                except ERRORES_TRANSITORIOS:
+                    self._sumar('fallos')
+                    self.disyuntor.registrar_fallo()
+                    raise
+        finally:
+            self._sumar('en_curso', -1)
+            semaforo.release()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            estadisticas = {
+                'llamadas': self.llamadas,
+                'en_curso': self.en_curso,
+                'max_en_curso': self.max_en_curso,
+                'reintentos': self.reintentos_hechos,
+                'fallos': self.fallos
+            }
+        estadisticas['disyuntor'] = self.disyuntor.estadisticas()
+        return estadisticas
@@ -0,0 +1,204 @@
+import os
+import sys
+import json
+import time
+import uuid
+import fcntl
+import sqlite3
+import argparse
+import threading
+import traceback
+import multiprocessing
+from typing import Dict, List, Optional
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+
+RUTA_COLA = os.getenv("ENTRENAMIENTO_COLA_RUTA", os.path.join(DATA_DIR, 'entrenamiento.sqlite3'))
+# Solo un proceso puede tener este bloqueo: es el límite de un entrenamiento a la vez
+RUTA_BLOQUEO = os.path.join(DATA_DIR, 'entrenamiento.lock')
+ESPERA_S = float(os.getenv("ENTRENAMIENTO_ESPERA_S", 2))
+# Máximo de épocas que se aceptan para un trabajo desde la API
+MAX_EPOCAS = int(os.getenv("ENTRENAMIENTO_MAX_EPOCAS", 20))
+
+PENDIENTE, EN_CURSO, COMPLETADO, FALLIDO = "pendiente", "en_curso", "completado", "fallido"
+
+
+class ColaEntrenamiento:
+    """
+    Cola persistente de trabajos de fine-tuning sobre SQLite (modo WAL), compartida entre los
+    procesos que sirven la API y el proceso que entrena. Cada trabajo guarda sus nuevos pares
+    pregunta/respuesta, su estado y su progreso (0 a 1).
+    """
+
+    def __init__(self, ruta: str = RUTA_COLA):
+        self.ruta = ruta
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        with self._conexion() as conexion:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS trabajos ("
+                " id TEXT PRIMARY KEY,"
+                " estado TEXT NOT NULL,"
+                " datos TEXT NOT NULL,"
+                " epocas INTEGER NOT NULL,"
+                " progreso REAL NOT NULL DEFAULT 0,"
+                " mensaje TEXT,"
+                " creado REAL NOT NULL,"
+                " iniciado REAL,"
+                " terminado REAL)"
+            )
+            conexion.execute("CREATE INDEX IF NOT EXISTS idx_trabajos_estado ON trabajos (estado, creado)")
+
+    def _conexion(self) -> sqlite3.Connection:
+        # Las conexiones no deben cruzar un fork: se reabren si cambió el pid
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = sqlite3.connect(self.ruta, timeout=5, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            conexion.row_factory = sqlite3.Row
+            self._local.conexion = conexion
+            self._local.pid = os.getpid()
+        return conexion
+
+    @staticmethod
+    def _como_dict(fila: sqlite3.Row, con_datos: bool = False) -> Dict:
+        trabajo = dict(fila)
+        datos = json.loads(trabajo.pop('datos'))
+        trabajo['ejemplos'] = len(datos)
+        if con_datos:
+            trabajo['datos'] = datos
+        return trabajo
+
+    def encolar(self, nuevos_datos: List[Dict], epocas: int = 2) -> str:
+        trabajo_id = uuid.uuid4().hex
+        self._conexion().execute(
+            "INSERT INTO trabajos (id, estado, datos, epocas, creado) VALUES (?, ?, ?, ?, ?)",
+            (trabajo_id, PENDIENTE, json.dumps(nuevos_datos, ensure_ascii=False), epocas, time.time())
+        )
+        return trabajo_id
+
+    def estado(self, trabajo_id: str) -> Optional[Dict]:
+        fila = self._conexion().execute("SELECT * FROM trabajos WHERE id = ?", (trabajo_id,)).fetchone()
+        return self._como_dict(fila) if fila else None
+
+    def listar(self, limite: int = 20) -> List[Dict]:
+        filas = self._conexion().execute(
+            "SELECT * FROM trabajos ORDER BY creado DESC LIMIT ?", (limite,)).fetchall()
+        return [self._como_dict(fila) for fila in filas]
+
+    def tomar_siguiente(self) -> Optional[Dict]:
+        """Marca como en curso el trabajo pendiente más antiguo y lo devuelve con sus datos."""
+        conexion = self._conexion()
+        conexion.execute("BEGIN IMMEDIATE")
+        try:
+            fila = conexion.execute(
+                "SELECT * FROM trabajos WHERE estado = ? ORDER BY creado LIMIT 1", (PENDIENTE,)).fetchone()
+            if fila:
+                conexion.execute(
+                    "UPDATE trabajos SET estado = ?, iniciado = ?, mensaje = ? WHERE id = ?",
+                    (EN_CURSO, time.time(), "iniciando", fila['id']))
+            conexion.execute("COMMIT")
+        except Exception:
+            conexion.execute("ROLLBACK")
+            raise
+        return self._como_dict(fila, con_datos=True) if fila else None
+
+    def actualizar(self, trabajo_id: str, progreso: float, mensaje: str = None):
+        self._conexion().execute(
+            "UPDATE trabajos SET progreso = ?, mensaje = COALESCE(?, mensaje) WHERE id = ?",
+            (round(min(max(progreso, 0.0), 1.0), 4), mensaje, trabajo_id))
+
+    def finalizar(self, trabajo_id: str, exito: bool, mensaje: str):
+        self._conexion().execute(
+            "UPDATE trabajos SET estado = ?, progreso = CASE WHEN ? THEN 1 ELSE progreso END,"
+            " mensaje = ?, terminado = ? WHERE id = ?",
+            (COMPLETADO if exito else FALLIDO, exito, mensaje, time.time(), trabajo_id))
+
+    def marcar_interrumpidos(self):
+        # Trabajos que quedaron en curso porque el proceso anterior murió a mitad del entrenamiento
+        self._conexion().execute(
+            "UPDATE trabajos SET estado = ?, mensaje = ?, terminado = ? WHERE estado = ?",
+            (FALLIDO, "interrumpido: el proceso de entrenamiento terminó inesperadamente", time.time(), EN_CURSO))
+
+
+def bucle_trabajador(ruta: str = RUTA_COLA, una_vez: bool = False):
+    """
+    Proceso de entrenamiento: toma los trabajos de a uno y ejecuta el fine-tuning. Corre con
+    menor prioridad que los procesos que sirven la API; si otro trabajador ya tiene el
+    bloqueo, termina sin hacer nada.
+    """
+    os.makedirs(os.path.dirname(RUTA_BLOQUEO), exist_ok=True)
+    with open(RUTA_BLOQUEO, 'w') as bloqueo:
+        try:
+            fcntl.flock(bloqueo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print("⏭️ Ya hay un proceso de entrenamiento activo.")
+            return
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+
+        cola = ColaEntrenamiento(ruta)
+        cola.marcar_interrumpidos()
+        print(f"🏋️ Proceso de entrenamiento listo (pid {os.getpid()})")
+        modelo = None
+        while True:
+            trabajo = cola.tomar_siguiente()
+            if trabajo is None:
+                if una_vez:
+                    return
+                time.sleep(ESPERA_S)
+                continue
+
+            trabajo_id = trabajo['id']
+            print(f"🌱 Trabajo {trabajo_id}: {trabajo['ejemplos']} ejemplos, {trabajo['epocas']} épocas")
+            try:
+                if modelo is None:
+                    # Se importa aquí: el proceso no carga nada pesado hasta el primer trabajo
+                    sys.path.insert(0, BASE_DIR)
+                    from modelo_consulta import ModeloConsultaEMI
+                    cola.actualizar(trabajo_id, 0.0, "cargando modelo")
+                    modelo = ModeloConsultaEMI()
+                else:
+                    modelo.recargar_dataset_si_cambio()
+                modelo.fine_tuning_incremental(
+                    trabajo['datos'], epocas=trabajo['epocas'],
+                    progreso=lambda fraccion, mensaje=None: cola.actualizar(trabajo_id, fraccion, mensaje))
+                cola.finalizar(trabajo_id, True, "modelo y dataset actualizados")
+            except Exception as e:
+                traceback.print_exc()
+                cola.finalizar(trabajo_id, False, f"{type(e).__name__}: {e}")
+
+
+def iniciar_trabajador(ruta: str = RUTA_COLA) -> multiprocessing.Process:
+    # 'spawn' y no fork: el proceso hijo no hereda el estado (hilos, modelos) de quien lo lanza
+    contexto = multiprocessing.get_context('spawn')
+    proceso = contexto.Process(target=bucle_trabajador, args=(ruta,), name="entrenamiento_emi", daemon=True)
+    proceso.start()
+    return proceso
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cola de fine-tuning del Asistente EMI")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    p_trabajador = comandos.add_parser("trabajador", help="ejecuta el proceso de entrenamiento")
+    p_trabajador.add_argument("--una-vez", action="store_true", help="termina cuando la cola queda vacía")
+    p_encolar = comandos.add_parser("encolar", help="encola un JSON con pares pregunta/contexto/respuesta")
+    p_encolar.add_argument("archivo")
+    p_encolar.add_argument("--epocas", type=int, default=2)
+    p_estado = comandos.add_parser("estado")
+    p_estado.add_argument("id", nargs="?")
+    args = parser.parse_args()
+
+    cola = ColaEntrenamiento()
+    if args.comando == "trabajador":
+        bucle_trabajador(una_vez=args.una_vez)
+    elif args.comando == "encolar":
+        with open(args.archivo, 'r', encoding='utf-8') as f:
+            print(f"📥 Trabajo encolado: {cola.encolar(json.load(f), args.epocas)}")
+    else:
+        trabajos = [cola.estado(args.id)] if args.id else cola.listar()
+        print(json.dumps([t for t in trabajos if t], ensure_ascii=False, indent=2))
@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import math
+import time
+import pickle
+import hashlib
+import argparse
+import numpy as np
+import faiss
+
+# Permite importar el paquete scripts al ejecutar este archivo directamente
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.api_llm import normalizar_texto, MODELO_EMBEDDINGS
+from scripts.metadata_compacta import escribir_metadata_compacta
+from scripts.registro_corpus import cargar_registro, cargar_articulos, ruta_fragmento
+from scripts.indice_activo import DIR_VERSIONES, RUTA_MANIFIESTO, publicar_manifiesto
+
+TIPOS_INDICE = ['flat', 'ivf', 'hnsw', 'pq', 'ivfpq']
+
+
+def cargar_corpus(ruta):
+    with open(ruta, 'r', encoding='utf-8') as f:
+        articulos = json.load(f)
+    return filtrar_articulos(articulos)
+
+
+def filtrar_articulos(articulos):
+    return [a for a in articulos if a.get('contenido', '').strip()]
+
+
+def texto_para_embedding(articulo):
+    # Se normaliza igual que las preguntas en api_llm.buscar_ids_similares
+    return normalizar_texto(f"{articulo.get('articulo', '')} {articulo.get('titulo', '')} {articulo.get('contenido', '')}")
+
+
+def hash_corpus(articulos):
+    return hashlib.sha256(json.dumps(articulos, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+_modelo = None
+
+
+def obtener_modelo():
+    global _modelo
+    if _modelo is None:
+        from sentence_transformers import SentenceTransformer
+        _modelo = SentenceTransformer(MODELO_EMBEDDINGS)
+    return _modelo
+
+
+def generar_embeddings(articulos, tamano_lote):
+    modelo = obtener_modelo()
+    textos = [texto_para_embedding(a) for a in articulos]
+    lotes = []
+    for inicio in range(0, len(textos), tamano_lote):
+        lotes.append(modelo.encode(textos[inicio:inicio + tamano_lote], batch_size=tamano_lote))
+        print(f"🧮 Embeddings: {min(inicio + tamano_lote, len(textos))}/{len(textos)}")
+    return np.ascontiguousarray(np.vstack(lotes), dtype=np.float32)
+
+
+def embeddings_por_fragmentos(registro, tamano_lote):
+    """
+    Reúne artículos y embeddings de todos los fragmentos del registro, en su orden.
+    Cada fragmento guarda sus embeddings junto a la huella de sus artículos: solo se
+    recalculan los de los fragmentos nuevos o modificados.
+    """
+    articulos, bloques, fragmentos = [], [], []
+    for reglamento in registro:
+        propios = filtrar_articulos(cargar_articulos(reglamento))
+        huella = hash_corpus([MODELO_EMBEDDINGS] + propios)
+        ruta_embeddings = ruta_fragmento(reglamento, 'embeddings.npy')
+        ruta_estado = ruta_fragmento(reglamento, 'fragmento.json')
+        estado = {}
+        if os.path.exists(ruta_estado):
+            with open(ruta_estado, 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+
+        if estado.get('huella') == huella and os.path.exists(ruta_embeddings):
+            embeddings = np.load(ruta_embeddings)
+            print(f"⏭️ {reglamento['id']}: {len(propios)} artículos sin cambios, se reutilizan sus embeddings")
+        else:
+            print(f"🧮 {reglamento['id']}: generando embeddings de {len(propios)} artículos")
+            embeddings = generar_embeddings(propios, tamano_lote)
+            np.save(ruta_embeddings, embeddings)
+            with open(ruta_estado, 'w', encoding='utf-8') as f:
+                json.dump({'huella': huella, 'articulos': len(propios), 'modelo_embeddings': MODELO_EMBEDDINGS}, f, indent=2)
+
+        articulos.extend(propios)
+        bloques.append(embeddings)
+        fragmentos.append({'id': reglamento['id'], 'articulos': len(propios), 'huella': huella})
+    return articulos, np.ascontiguousarray(np.vstack(bloques), dtype=np.float32), fragmentos
+
+
+def crear_indice(tipo, embeddings, metrica):
+    """
+    Crea y entrena un índice FAISS. Los parámetros se ajustan al tamaño del corpus para que
+    IVF/PQ puedan entrenarse también con pocos artículos.
+    """
+    n, d = embeddings.shape
+    metrica_faiss = faiss.METRIC_INNER_PRODUCT if metrica == 'ip' else faiss.METRIC_L2
+    nlist = max(1, min(int(4 * math.sqrt(n)), n // 39))
+    # FAISS recomienda ~39 puntos de entrenamiento por centroide de PQ (2^nbits centroides)
+    nbits = max(4, min(8, int(math.log2(max(n // 39, 2)))))
+    m_pq = next(m for m in (16, 12, 8, 6, 4, 3, 2, 1) if d % m == 0)
+
+    if tipo == 'flat':
+        indice = faiss.IndexFlatIP(d) if metrica == 'ip' else faiss.IndexFlatL2(d)
+    elif tipo == 'ivf':
+        cuantizador = faiss.IndexFlatIP(d) if metrica == 'ip' else faiss.IndexFlatL2(d)
+        indice = faiss.IndexIVFFlat(cuantizador, d, nlist, metrica_faiss)
+        indice.nprobe = max(1, nlist // 4)
+    elif tipo == 'hnsw':
+        indice = faiss.IndexHNSWFlat(d, 32, metrica_faiss)
+        indice.hnsw.efConstruction = 80
+        indice.hnsw.efSearch = 64
+    elif tipo == 'pq':
+        indice = faiss.IndexPQ(d, m_pq, nbits, metrica_faiss)
+    elif tipo == 'ivfpq':
+        cuantizador = faiss.IndexFlatIP(d) if metrica == 'ip' else faiss.IndexFlatL2(d)
+        indice = faiss.IndexIVFPQ(cuantizador, d, nlist, m_pq, nbits, metrica_faiss)
+        indice.nprobe = max(1, nlist // 4)
+    else:
+        raise ValueError(f"❌ Tipo de índice desconocido: {tipo}")
+
+    if not indice.is_trained:
+        indice.train(embeddings)
+    indice.add(embeddings)
+    return indice
+
+
+def evaluar(indice, embeddings, metrica, k, consultas):
+    """Latencia por consulta y recall@k frente a la búsqueda exacta (Flat) con la misma métrica."""
+    exacto = crear_indice('flat', embeddings, metrica)
+    _, referencia = exacto.search(consultas, k)
+    inicio = time.perf_counter()
+    _, resultado = indice.search(consultas, k)
+    latencia_ms = (time.perf_counter() - inicio) * 1000 / len(consultas)
+    recall = np.mean([len(set(r) & set(e)) / k for r, e in zip(resultado, referencia)])
+    return latencia_ms, float(recall)
+
+
+def construir(tipo, embeddings, metrica, k, consultas):
+    inicio = time.perf_counter()
+    indice = crear_indice(tipo, embeddings, metrica)
+    construccion_s = time.perf_counter() - inicio
+    tamano_bytes = faiss.serialize_index(indice).nbytes
+    latencia_ms, recall = evaluar(indice, embeddings, metrica, k, consultas)
+    return indice, {
+        'tipo': tipo,
+        'construccion_s': round(construccion_s, 3),
+        'tamano_kb': round(tamano_bytes / 1024, 1),
+        'latencia_ms': round(latencia_ms, 4),
+        f'recall@{k}': round(recall, 4)
+    }
+
+
+def consultas_de_prueba(embeddings, total, ruido=0.05, semilla=0):
+    # Artículos del corpus con una pequeña perturbación, para no medir solo coincidencias exactas
+    rng = np.random.default_rng(semilla)
+    elegidos = rng.choice(len(embeddings), size=min(total, len(embeddings)), replace=False)
+    consultas = embeddings[elegidos] + rng.normal(0, ruido, (len(elegidos), embeddings.shape[1])).astype(np.float32)
+    return np.ascontiguousarray(consultas, dtype=np.float32)
+
+
+def publicar(indice, articulos, manifiesto):
+    """
+    Escribe la versión completa en data/indices/<version>/ y solo entonces la activa reemplazando
+    el manifiesto data/indice_faiss.json (reemplazo atómico). Los lectores resuelven las rutas a
+    través de él (scripts/indice_activo.py): nunca combinan archivos de dos versiones.
+    """
+    directorio = os.path.join(DIR_VERSIONES, manifiesto['version'])
+    os.makedirs(directorio, exist_ok=True)
+    faiss.write_index(indice, os.path.join(directorio, 'indice_faiss.index'))
+    with open(os.path.join(directorio, 'metadata_articulos.pkl'), 'wb') as f:
+        pickle.dump(articulos, f)
+    escribir_metadata_compacta(articulos, os.path.join(directorio, 'metadata_articulos.bin'))
+    with open(os.path.join(directorio, 'indice_faiss.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+
+    publicar_manifiesto(manifiesto)
+    print(f"✅ Índice {manifiesto['version']} publicado en {directorio} (activo según {RUTA_MANIFIESTO})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construye el índice FAISS y la metadata de artículos")
+    parser.add_argument("--tipo", choices=TIPOS_INDICE, default="flat")
+    parser.add_argument("--metrica", choices=["l2", "ip"], default="l2",
+                        help="'ip' normaliza los vectores (similitud coseno)")
+    parser.add_argument("--corpus", help="JSON de artículos; por defecto se usan los fragmentos de data/corpus.json")
+    parser.add_argument("--lote", type=int, default=64, help="tamaño de lote para los embeddings")
+    parser.add_argument("--k", type=int, default=10, help="k para recall@k")
+    parser.add_argument("--consultas", type=int, default=200, help="consultas de prueba para el reporte")
+    parser.add_argument("--comparar", action="store_true",
+                        help="construye y reporta todos los tipos sin publicar ninguno")
+    args = parser.parse_args()
+
+    registro = [] if args.corpus else cargar_registro()
+    if not registro and not args.corpus:
+        parser.error("no hay reglamentos en data/corpus.json; indica un JSON de artículos con --corpus")
+    inicio = time.perf_counter()
+    if registro:
+        articulos, embeddings, fragmentos = embeddings_por_fragmentos(registro, args.lote)
+        print(f"📚 {len(articulos)} artículos en {len(registro)} reglamentos")
+    else:
+        articulos = cargar_corpus(args.corpus)
+        print(f"📚 {len(articulos)} artículos en {args.corpus}")
+        embeddings = generar_embeddings(articulos, args.lote)
+        fragmentos = []
+    embeddings_s = time.perf_counter() - inicio
+    print(f"⏱️ Embeddings generados en {embeddings_s:.2f} s")
+    if args.metrica == 'ip':
+        faiss.normalize_L2(embeddings)
+
+    consultas = consultas_de_prueba(embeddings, args.consultas)
+    if args.metrica == 'ip':
+        faiss.normalize_L2(consultas)
+    k = min(args.k, len(articulos))
+
+    print("\n📊 Reporte de índices")
+    tipos = TIPOS_INDICE if args.comparar else [args.tipo]
+    for tipo in tipos:
+        indice, reporte = construir(tipo, embeddings, args.metrica, k, consultas)
+        print("   " + " | ".join(f"{clave}: {valor}" for clave, valor in reporte.items()))
+
+    if not args.comparar:
+        huella = hash_corpus(articulos)
+        manifiesto = {
+            'version': f"{time.strftime('%Y%m%d-%H%M%S')}-{huella[:8]}",
+            'modelo_embeddings': MODELO_EMBEDDINGS,
+            'dimension': int(embeddings.shape[1]),
+            'articulos': len(articulos),
+            'metrica': args.metrica,
+            'normalizar_consultas': args.metrica == 'ip',
+            'hash_corpus': huella,
+            'reglamentos': fragmentos,
+            'embeddings_s': round(embeddings_s, 3),
+            'reporte': reporte
+        }
+        publicar(indice, articulos, manifiesto)
@@ -0,0 +1,130 @@
+import os
+import re
+from typing import Dict, List, Sequence
+
+from scripts.recuperacion_hibrida import fusionar_rrf
+
+# Presupuesto de tokens para los fragmentos del reglamento en el prompt
+CONTEXTO_MAX_TOKENS = int(os.getenv("CONTEXTO_MAX_TOKENS", 1200))
+PASAJE_MAX_TOKENS = int(os.getenv("CONTEXTO_PASAJE_TOKENS", 160))
+# Jaccard de 5-gramas de palabras a partir del cual dos artículos se consideran el mismo texto
+UMBRAL_DUPLICADO = float(os.getenv("CONTEXTO_UMBRAL_DUPLICADO", 0.8))
+CODIFICACION_TOKENS = "cl100k_base"
+
+PATRON_ORACION = re.compile(r'(?<=[.;:])\s+')
+PATRON_PALABRA = re.compile(r'\w+')
+
+_codificador = None
+
+
+def contar_tokens(texto: str) -> int:
+    """Tokens según tiktoken; si no está instalado, una estimación de ~4 caracteres por token."""
+    global _codificador
+    if _codificador is None:
+        try:
+            import tiktoken
+            _codificador = tiktoken.get_encoding(CODIFICACION_TOKENS)
+        except ImportError:
+            print("⚠️ tiktoken no está instalado; los tokens del contexto se estiman por caracteres.")
+            _codificador = False
+    if _codificador:
+        return len(_codificador.encode(texto, disallowed_special=()))
+    return len(texto) // 4 + 1
+
+
+def encabezado_articulo(articulo: Dict) -> str:
+    return f"[{articulo.get('reglamento', 'RAC-?')}] {articulo.get('articulo', '')} - {articulo.get('titulo', '')}"
+
+
+def formatear_articulo(articulo: Dict) -> str:
+    return f"{encabezado_articulo(articulo)}\n{articulo.get('contenido', '').strip()}"
+
+
+def dividir_pasajes(texto: str, max_tokens: int = PASAJE_MAX_TOKENS) -> List[str]:
+    """Agrupa párrafos (u oraciones, si el párrafo es largo) consecutivos en pasajes de hasta max_tokens."""
+    unidades = []
+    for parrafo in (p.strip() for p in texto.split('\n')):
+        if not parrafo:
+            continue
+        if contar_tokens(parrafo) <= max_tokens:
+            unidades.append(parrafo)
+        else:
+            unidades.extend(o for o in PATRON_ORACION.split(parrafo) if o)
+
+    pasajes, actual, tokens_actual = [], [], 0
+    for unidad in unidades:
+        tokens = contar_tokens(unidad)
+        if actual and tokens_actual + tokens > max_tokens:
+            pasajes.append('\n'.join(actual))
+            actual, tokens_actual = [], 0
+        actual.append(unidad)
+        tokens_actual += tokens
+    if actual:
+        pasajes.append('\n'.join(actual))
+    return pasajes
+
+
+def _tejas(texto: str, n: int = 5) -> set:
+    palabras = PATRON_PALABRA.findall(texto.lower())
+    return {' '.join(palabras[i:i + n]) for i in range(max(1, len(palabras) - n + 1))}
+
+
+def armar_contexto(pregunta: str, articulos: Sequence[Dict], vectorizador=None,
+                   max_tokens: int = CONTEXTO_MAX_TOKENS) -> Dict:
+    """
+    Arma el contexto del prompt con los artículos recuperados (en orden de relevancia):
+    descarta los casi duplicados, divide los artículos en pasajes y elige los mejores hasta
+    max_tokens. Cada pasaje se puntúa fusionando (RRF) el rango de su artículo con su similitud
+    TF-IDF a la pregunta, si hay vectorizador. Devuelve el contexto y los conteos de tokens
+    ('tokens', y 'tokens_completo' para el contexto con los artículos enteros).
+    """
+    unicos, tejas_unicos = [], []
+    for articulo in articulos:
+        tejas = _tejas(articulo.get('contenido', ''))
+        if any(len(tejas & otras) / len(tejas | otras) >= UMBRAL_DUPLICADO for otras in tejas_unicos):
+            continue
+        unicos.append(articulo)
+        tejas_unicos.append(tejas)
+
+    encabezados = [encabezado_articulo(a) for a in unicos]
+    pasajes = [(rango, texto) for rango, articulo in enumerate(unicos)
+               for texto in dividir_pasajes(articulo.get('contenido', '').strip())]
+
+    rankings = [list(range(len(pasajes)))]
+    if vectorizador is not None and pasajes:
+        similitudes = (vectorizador.transform([texto for _, texto in pasajes])
+                       @ vectorizador.transform([pregunta]).T).toarray().ravel()
+        rankings.append(sorted(range(len(pasajes)), key=lambda i: -similitudes[i]))
+
+    elegidos, tokens = set(), 0
+    articulos_incluidos = set()
+    for i in fusionar_rrf(rankings):
+        rango, texto = pasajes[i]
+        costo = contar_tokens(texto) + (0 if rango in articulos_incluidos else contar_tokens(encabezados[rango]) + 1)
+        # El primer pasaje entra siempre, aunque exceda el presupuesto
+        if elegidos and tokens + costo > max_tokens:
+            continue
+        elegidos.add(i)
+        articulos_incluidos.add(rango)
+        tokens += costo
+
+    # Los pasajes elegidos se muestran bajo su artículo y en su orden original
+    # (los que no son consecutivos se separan con "[…]")
+    bloques, anterior = {}, None
+    for i in sorted(elegidos):
+        rango, texto = pasajes[i]
+        if rango not in bloques:
+            bloques[rango] = encabezados[rango] + "\n" + texto
+        else:
+            bloques[rango] += ("\n" if anterior == i - 1 else "\n[…]\n") + texto
+        anterior = i
+    contexto = "\n\n".join(bloques[rango] for rango in sorted(bloques))
+
+    return {
+        'contexto': contexto,
+        'tokens': contar_tokens(contexto),
+        'tokens_completo': contar_tokens("\n\n".join(formatear_articulo(a) for a in articulos)),
+        'duplicados': len(articulos) - len(unicos),
+        'pasajes': len(elegidos),
+        'pasajes_total': len(pasajes)
+    }
@@ -0,0 +1,132 @@
+import os
+import json
+import hashlib
+import numpy as np
+from typing import Dict, Iterator, List
+
+# Formato en disco del dataset normalizado:
+#   {"formato": "emi-qa/2", "sufijo_contexto": "...",
+#    "articulos": [[contexto, respuesta, enriquecido], ...], "preguntas": [[pregunta, id_articulo], ...]}
+# Cada contexto/respuesta aparece una sola vez aunque tenga decenas de variantes de pregunta.
+# El sufijo solo se agrega al contexto de los artículos enriquecidos (enriquecer_dataset.py), no a
+# los que se enseñan después con el fine-tuning. En emi-qa/1 (sin la marca) todos lo llevaban.
+FORMATO = "emi-qa/2"
+
+
+class ArticuloQA:
+    """Fila de la tabla de artículos: contexto y respuesta compartidos por sus preguntas."""
+    __slots__ = ('contexto', 'respuesta', 'enriquecido')
+
+    def __init__(self, contexto: str, respuesta: str, enriquecido: bool = False):
+        self.contexto = contexto
+        self.respuesta = respuesta
+        self.enriquecido = enriquecido
+
+
+class DatasetQA:
+    """
+    Dataset de preguntas y respuestas normalizado: una tabla de artículos y una columna de
+    preguntas con el id de su artículo (arreglo int32). dataset.entrada(i) reconstruye el dict
+    {'pregunta', 'contexto', 'respuesta'} del formato anterior solo cuando se necesita.
+    """
+
+    def __init__(self, articulos: List[ArticuloQA] = None, preguntas: List[str] = None,
+                 ids_articulo=None, sufijo_contexto: str = ""):
+        self.articulos = articulos or []
+        self.preguntas = preguntas or []
+        self.id_articulo = np.asarray(ids_articulo if ids_articulo is not None else [], dtype=np.int32)
+        self.sufijo_contexto = sufijo_contexto
+
+    @classmethod
+    def desde_entradas(cls, entradas: List[Dict], sufijo_contexto: str = "",
+                       enriquecer: bool = False) -> 'DatasetQA':
+        """
+        Normaliza una lista de dicts: las entradas con igual contexto y respuesta comparten artículo.
+        Con enriquecer=True sus artículos llevan el sufijo de contexto.
+        """
+        dataset = cls(sufijo_contexto=sufijo_contexto)
+        dataset._agregar(entradas, enriquecer)
+        return dataset
+
+    @classmethod
+    def cargar(cls, ruta: str) -> 'DatasetQA':
+        with open(ruta, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        # Compatibilidad con el formato anterior (lista de dicts)
+        if isinstance(datos, list):
+            return cls.desde_entradas(datos)
+        sufijo_contexto = datos.get('sufijo_contexto', "")
+        return cls(
+            [ArticuloQA(fila[0], fila[1], bool(fila[2]) if len(fila) > 2 else bool(sufijo_contexto))
+             for fila in datos['articulos']],
+            [pregunta for pregunta, _ in datos['preguntas']],
+            [id_articulo for _, id_articulo in datos['preguntas']],
+            sufijo_contexto
+        )
+
+    def guardar(self, ruta: str):
+        temporal = f"{ruta}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({
+                'formato': FORMATO,
+                'sufijo_contexto': self.sufijo_contexto,
+                'articulos': [[a.contexto, a.respuesta, int(a.enriquecido)] for a in self.articulos],
+                'preguntas': [[p, int(i)] for p, i in zip(self.preguntas, self.id_articulo)]
+            }, f, ensure_ascii=False, indent=1)
+        os.replace(temporal, ruta)
+
+    def con_entradas(self, entradas: List[Dict]) -> 'DatasetQA':
+        """Copia del dataset con nuevas entradas (dicts) agregadas; el original no cambia."""
+        dataset = DatasetQA(list(self.articulos), list(self.preguntas), self.id_articulo, self.sufijo_contexto)
+        dataset._agregar(entradas)
+        return dataset
+
+    def _agregar(self, entradas: List[Dict], enriquecer: bool = False):
+        ids = {(a.contexto, a.respuesta, a.enriquecido): i for i, a in enumerate(self.articulos)}
+        nuevos_ids = []
+        for entrada in entradas:
+            contexto, enriquecido = entrada.get('contexto', ''), enriquecer
+            # Una entrada obtenida con entrada(i) trae el sufijo: se reconoce su artículo
+            if self.sufijo_contexto and contexto.endswith(self.sufijo_contexto):
+                contexto, enriquecido = contexto[:-len(self.sufijo_contexto)], True
+            clave = (contexto, entrada.get('respuesta', ''), enriquecido)
+            if clave not in ids:
+                ids[clave] = len(self.articulos)
+                self.articulos.append(ArticuloQA(*clave))
+            self.preguntas.append(entrada.get('pregunta', ''))
+            nuevos_ids.append(ids[clave])
+        self.id_articulo = np.concatenate([self.id_articulo, np.asarray(nuevos_ids, dtype=np.int32)])
+
+    def huella(self) -> str:
+        """Hash del contenido (no del archivo): identifica el dataset en las cachés derivadas."""
+        h = hashlib.sha256(self.sufijo_contexto.encode('utf-8'))
+        for articulo in self.articulos:
+            h.update(f"{articulo.contexto}\0{articulo.respuesta}\0{int(articulo.enriquecido)}\0".encode('utf-8'))
+        for pregunta in self.preguntas:
+            h.update(f"{pregunta}\0".encode('utf-8'))
+        h.update(self.id_articulo.astype('<i4').tobytes())
+        return h.hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.preguntas)
+
+    def articulo(self, i: int) -> ArticuloQA:
+        return self.articulos[self.id_articulo[i]]
+
+    def respuesta(self, i: int) -> str:
+        return self.articulo(i).respuesta
+
+    def contexto(self, i: int) -> str:
+        articulo = self.articulo(i)
+        return articulo.contexto + self.sufijo_contexto if articulo.enriquecido else articulo.contexto
+
+    def entrada(self, i: int) -> Dict:
+        return {
+            'pregunta': self.preguntas[i],
+            'contexto': self.contexto(i),
+            'respuesta': self.respuesta(i)
+        }
+
+    def entradas(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self.entrada(i)
@@ -0,0 +1,112 @@
+import os
+import time
+import shutil
+import hashlib
+import numpy as np
+from typing import Tuple
+
+from scripts.dataset_qa import DatasetQA
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+
+# Datasets ya tokenizados (formato Arrow de `datasets`), uno por huella de dataset + tokenizador
+DIR_CACHE = os.getenv("ENTRENAMIENTO_CACHE_DIR", os.path.join(DATA_DIR, 'tokenizado'))
+CACHES_CONSERVADAS = int(os.getenv("ENTRENAMIENTO_CACHES", 3))
+LONGITUD_MAXIMA = 256
+
+# 'repeticion': los ejemplos nuevos más una muestra de los anteriores (evita olvidar lo aprendido
+# sin volver a recorrer todo el dataset); 'completo': todo el dataset, como un reentrenamiento.
+MODO = os.getenv("ENTRENAMIENTO_MODO", "repeticion")
+PROPORCION_REPETICION = int(os.getenv("ENTRENAMIENTO_REPETICION", 8))
+MINIMO_REPETICION = int(os.getenv("ENTRENAMIENTO_REPETICION_MINIMA", 64))
+
+
+def texto_entrada(pregunta: str, contexto: str) -> str:
+    return f"Pregunta: {pregunta}\nContexto: {contexto}"
+
+
+class CacheTokenizado:
+    """
+    Tokeniza un DatasetQA sin relleno (el relleno lo hace el collator por lote) y guarda el
+    resultado en disco. Como el dataset está normalizado, cada respuesta se tokeniza una vez por
+    artículo y se reparte a sus preguntas. Las columnas son input_ids, attention_mask, labels y
+    longitud (usada por group_by_length para armar lotes de largo parecido).
+    """
+
+    def __init__(self, tokenizer, nombre_tokenizador: str, longitud_maxima: int = LONGITUD_MAXIMA,
+                 directorio: str = DIR_CACHE):
+        self.tokenizer = tokenizer
+        self.longitud_maxima = longitud_maxima
+        self.directorio = directorio
+        self._huella_tokenizador = f"{nombre_tokenizador}|{type(tokenizer).__name__}|{len(tokenizer)}|{longitud_maxima}"
+
+    def ruta(self, dataset: DatasetQA) -> str:
+        clave = hashlib.sha256(f"{dataset.huella()}|{self._huella_tokenizador}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directorio, clave)
+
+    def tokenizar(self, dataset: DatasetQA):
+        from datasets import Dataset
+        entradas = [texto_entrada(pregunta, dataset.contexto(i))
+                    for i, pregunta in enumerate(dataset.preguntas)]
+        tokens_entrada = self.tokenizer(entradas, truncation=True, max_length=self.longitud_maxima)
+        tokens_respuesta = self.tokenizer([a.respuesta for a in dataset.articulos],
+                                          truncation=True, max_length=self.longitud_maxima)['input_ids']
+        return Dataset.from_dict({
+            'input_ids': tokens_entrada['input_ids'],
+            'attention_mask': tokens_entrada['attention_mask'],
+            'labels': [tokens_respuesta[i] for i in dataset.id_articulo],
+            'longitud': [len(ids) for ids in tokens_entrada['input_ids']]
+        })
+
+    def obtener(self, dataset: DatasetQA):
+        """Dataset tokenizado desde la caché (mapeado en memoria) o tokenizado en el momento."""
+        from datasets import load_from_disk
+        ruta = self.ruta(dataset)
+        if os.path.isdir(ruta):
+            print(f"📦 Dataset tokenizado desde caché ({len(dataset)} ejemplos)")
+            return load_from_disk(ruta)
+        inicio = time.perf_counter()
+        tokenizado = self.tokenizar(dataset)
+        print(f"🔤 {len(dataset)} ejemplos tokenizados en {time.perf_counter() - inicio:.2f} s")
+        self.guardar(dataset, tokenizado)
+        return tokenizado
+
+    def guardar(self, dataset: DatasetQA, tokenizado):
+        ruta = self.ruta(dataset)
+        if os.path.isdir(ruta):
+            return
+        temporal = f"{ruta}.tmp"
+        shutil.rmtree(temporal, ignore_errors=True)
+        tokenizado.save_to_disk(temporal)
+        os.rename(temporal, ruta)
+        self._limpiar(conservar=ruta)
+
+    def _limpiar(self, conservar: str):
+        # Solo sirven las cachés de los últimos datasets; las más viejas se borran
+        rutas = [os.path.join(self.directorio, d) for d in os.listdir(self.directorio) if not d.endswith('.tmp')]
+        rutas.sort(key=os.path.getmtime, reverse=True)
+        for ruta in rutas[CACHES_CONSERVADAS:]:
+            if ruta != conservar:
+                shutil.rmtree(ruta, ignore_errors=True)
+
+
+def dividir_anteriores(n_anteriores: int, n_nuevos: int, modo: str = MODO,
+                       semilla: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Índices de los ejemplos anteriores que se repasan y de los que se usan para evaluar. Los
+    ejemplos nuevos van siempre al entrenamiento, así que la evaluación sale solo de los anteriores.
+    """
+    orden = np.random.default_rng(semilla).permutation(n_anteriores)
+    if modo == "completo":
+        n_evaluacion = int(0.2 * n_anteriores)
+        repaso = orden[n_evaluacion:]
+    else:
+        n_repaso = min(n_anteriores, max(MINIMO_REPETICION, PROPORCION_REPETICION * n_nuevos))
+        n_evaluacion = min(n_anteriores - n_repaso, max(1, n_repaso // 4))
+        repaso = orden[n_evaluacion:n_evaluacion + n_repaso]
+    return np.sort(repaso), np.sort(orden[:n_evaluacion])
+
+
+def contar_tokens(tokenizado) -> int:
+    return int(sum(tokenizado['longitud'])) + sum(len(etiquetas) for etiquetas in tokenizado['labels'])
@@ -1,12 +1,18 @@
+import os
+import sys
 import faiss
 import pickle
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
-# Cargar modelo y recursos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scripts.indice_activo import leer_manifiesto, ruta_activa
+
+# Cargar modelo y recursos (de la versión activa del índice)
 modelo = SentenceTransformer("all-MiniLM-L6-v2")
-index = faiss.read_index("../data/indice_faiss.index")
-with open("../data/metadata_articulos.pkl", "rb") as f:
+manifiesto = leer_manifiesto()
+index = faiss.read_index(ruta_activa("indice_faiss.index", manifiesto))
+with open(ruta_activa("metadata_articulos.pkl", manifiesto), "rb") as f:
     metadata = pickle.load(f)
 
 # Función para buscar el artículo más relevante
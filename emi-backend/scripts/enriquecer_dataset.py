@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import re
 from typing import List, Dict
@@ -6,6 +7,17 @@ from typing import List, Dict
 # Definir rutas relativas basadas en la ubicación de este script
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
+sys.path.insert(0, BASE_DIR)
+
+from scripts.dataset_qa import DatasetQA
+
+# Se guarda una sola vez en el dataset y se agrega al contexto de cada artículo enriquecido al leerlo
+SUFIJO_CONTEXTO = "\n\n" + """
+    Ejemplo de aplicación:
+    - Este artículo es fundamental para comprender los procedimientos administrativos
+    - Proporciona un marco legal y normativo claro
+    - Sirve como guía para estudiantes y personal administrativo
+    """
 
 
 def generar_variantes_preguntas(pregunta_base: str) -> List[str]:
@@ -22,42 +34,20 @@ def generar_variantes_preguntas(pregunta_base: str) -> List[str]:
     return variantes
 
 
-def enriquecer_contexto(contexto: str) -> str:
+def procesar_dataset(ruta_dataset: str) -> DatasetQA:
     """
-    Añade contexto y ejemplos para enriquecer la información
-    """
-    contexto_ampliado = contexto + "\n\n" + """
-    Ejemplo de aplicación:
-    - Este artículo es fundamental para comprender los procedimientos administrativos
-    - Proporciona un marco legal y normativo claro
-    - Sirve como guía para estudiantes y personal administrativo
-    """
-    return contexto_ampliado
-
-
-def procesar_dataset(ruta_dataset: str) -> List[Dict]:
-    """
-    Procesa y enriquece el dataset existente
+    Procesa y enriquece el dataset existente: cada variante de pregunta referencia el
+    artículo de la pregunta original en lugar de copiar su contexto y respuesta
     """
     with open(ruta_dataset, 'r', encoding='utf-8') as f:
         dataset = json.load(f)
 
-    dataset_enriquecido = []
-
-    for entrada in dataset:
-        # Generar variantes de preguntas
-        variantes_preguntas = generar_variantes_preguntas(entrada['pregunta'])
-
-        # Enriquecer cada variante
-        for variante in variantes_preguntas:
-            nueva_entrada = {
-                'pregunta': variante,
-                'contexto': enriquecer_contexto(entrada['contexto']),
-                'respuesta': entrada['respuesta']
-            }
-            dataset_enriquecido.append(nueva_entrada)
-
-    return dataset_enriquecido
+    variantes = [
+        {'pregunta': variante, 'contexto': entrada['contexto'], 'respuesta': entrada['respuesta']}
+        for entrada in dataset
+        for variante in generar_variantes_preguntas(entrada['pregunta'])
+    ]
+    return DatasetQA.desde_entradas(variantes, sufijo_contexto=SUFIJO_CONTEXTO, enriquecer=True)
 
 
 # Uso: definir la ruta del dataset utilizando DATA_DIR
@@ -65,7 +55,7 @@ ruta_dataset = os.path.join(DATA_DIR, 'dataset_entrenamiento.json')
 dataset_final = procesar_dataset(ruta_dataset)
 
 # Guardar dataset enriquecido usando rutas relativas
-with open(os.path.join(DATA_DIR, 'dataset_entrenamiento_enriquecido.json'), 'w', encoding='utf-8') as f:
-    json.dump(dataset_final, f, ensure_ascii=False, indent=2)
+dataset_final.guardar(os.path.join(DATA_DIR, 'dataset_entrenamiento_enriquecido.json'))
 
-print(f"✅ Dataset enriquecido generado con {len(dataset_final)} entradas")
+print(f"✅ Dataset enriquecido generado con {len(dataset_final)} entradas "
+      f"({len(dataset_final.articulos)} artículos)")
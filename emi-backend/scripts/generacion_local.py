@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from typing import List
+
+# Permite importar el paquete scripts al ejecutar este archivo directamente
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.lotes_embeddings import AgrupadorConsultas
+from scripts.datos_entrenamiento import texto_entrada
+
+CHECKPOINTS_DIR = os.path.join(BASE_DIR, 'checkpoints_emi')
+DIR_MODELO_BASE = os.path.join(CHECKPOINTS_DIR, 'modelo_base')
+DIR_MODELO_FINE_TUNED = os.path.join(CHECKPOINTS_DIR, 'modelo_fine_tuned')
+
+MAX_ENTRADA = int(os.getenv("LLM_LOCAL_MAX_ENTRADA", 512))
+MAX_NUEVOS_TOKENS = int(os.getenv("LLM_LOCAL_MAX_TOKENS", 256))
+CUANTIZAR_INT8 = os.getenv("LLM_LOCAL_INT8", "1") != "0"
+# 0: los hilos que decida torch
+HILOS = int(os.getenv("LLM_LOCAL_HILOS", 0))
+
+
+def firma_directorio(directorio: str):
+    # reemplazar_directorio publica un directorio nuevo: cambian su inodo y su fecha de modificación
+    try:
+        estado = os.stat(directorio)
+    except FileNotFoundError:
+        return None
+    return estado.st_ino, estado.st_mtime_ns
+
+
+class GeneradorLocal:
+    """
+    Genera respuestas en CPU con el modelo seq2seq del fine-tuning: carga el modelo base, le
+    fusiona el adaptador LoRA de checkpoints_emi/modelo_fine_tuned y cuantiza las capas lineales
+    a int8. Las preguntas que llegan a la vez desde varios hilos se agrupan (AgrupadorConsultas)
+    en una sola llamada a generate. Cuando la cola de entrenamiento publica un checkpoint nuevo,
+    se carga en segundo plano y reemplaza al anterior sin reiniciar.
+    """
+
+    def __init__(self, modelo_base: str = None, dir_fine_tuned: str = DIR_MODELO_FINE_TUNED,
+                 cuantizar: bool = CUANTIZAR_INT8, max_lote: int = None, espera_ms: float = None):
+        import torch
+
+        if HILOS:
+            torch.set_num_threads(HILOS)
+        self.torch = torch
+        self.modelo_base = modelo_base
+        self.dir_fine_tuned = dir_fine_tuned
+        self.cuantizar = cuantizar
+        self.recargas = 0
+        self._lock = threading.Lock()
+        self._lock_recarga = threading.Lock()
+        self.firma_checkpoint = firma_directorio(dir_fine_tuned)
+        self.modelo, self.tokenizer, self.origen = self._cargar()
+        self.agrupador = AgrupadorConsultas(
+            self._generar_lote,
+            max_lote=max_lote or int(os.getenv("LLM_LOCAL_LOTE_MAX", 8)),
+            espera_ms=espera_ms if espera_ms is not None else float(os.getenv("LLM_LOCAL_LOTE_ESPERA_MS", 20))
+        )
+        print(f"🧠 Generación local lista: {self.origen}{' (int8)' if cuantizar else ''}")
+
+    def _cargar(self):
+        torch = self.torch
+        from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+        dir_fine_tuned = self.dir_fine_tuned
+        modelo_base = self.modelo_base or os.getenv("MODELO_BASE")
+        ruta_adaptador = os.path.join(dir_fine_tuned, 'adapter_config.json')
+        if os.path.exists(ruta_adaptador):
+            from peft import PeftModel
+            with open(ruta_adaptador, 'r', encoding='utf-8') as f:
+                modelo_base = modelo_base or json.load(f).get('base_model_name_or_path')
+            modelo = AutoModelForSeq2SeqLM.from_pretrained(modelo_base)
+            # Con el adaptador fusionado no quedan capas LoRA: se genera tan rápido como con el base
+            modelo = PeftModel.from_pretrained(modelo, dir_fine_tuned).merge_and_unload()
+            origen = f"{modelo_base} + LoRA"
+        elif os.path.exists(os.path.join(dir_fine_tuned, 'config.json')):
+            # Fine-tuning sin PEFT: el checkpoint es el modelo completo
+            modelo = AutoModelForSeq2SeqLM.from_pretrained(dir_fine_tuned)
+            origen = dir_fine_tuned
+        elif modelo_base:
+            print("⚠️ No hay modelo fine-tuned; se genera con el modelo base.")
+            modelo = AutoModelForSeq2SeqLM.from_pretrained(modelo_base)
+            origen = modelo_base
+        else:
+            raise RuntimeError("No hay modelo fine-tuned ni MODELO_BASE configurado para el backend local")
+
+        # El tokenizador guardado junto al modelo base permite arrancar sin red
+        if os.path.exists(os.path.join(DIR_MODELO_BASE, 'tokenizer_config.json')):
+            tokenizer = AutoTokenizer.from_pretrained(DIR_MODELO_BASE)
+        else:
+            tokenizer = AutoTokenizer.from_pretrained(modelo_base or dir_fine_tuned)
+
+        modelo.eval()
+        if self.cuantizar:
+            modelo = torch.ao.quantization.quantize_dynamic(modelo, {torch.nn.Linear}, dtype=torch.qint8)
+        return modelo, tokenizer, origen
+
+    def recargar_si_cambio(self, en_segundo_plano: bool = True):
+        """
+        Recarga el modelo si la cola de entrenamiento publicó otro checkpoint (reemplazar_directorio).
+        Mientras carga se sigue generando con el anterior; el cambio ocurre entre dos lotes.
+        """
+        firma = firma_directorio(self.dir_fine_tuned)
+        # None: el directorio se está reemplazando en este momento; se reintenta en la próxima llamada
+        if firma is None or firma == self.firma_checkpoint or not self._lock_recarga.acquire(blocking=False):
+            return
+
+        def recargar():
+            try:
+                print("🔄 El checkpoint del modelo local cambió; recargando...")
+                modelo, tokenizer, origen = self._cargar()
+                with self._lock:
+                    self.modelo, self.tokenizer, self.origen = modelo, tokenizer, origen
+                self.recargas += 1
+                print(f"🧠 Generación local recargada: {origen}")
+            except Exception as e:
+                print(f"⚠️ No se pudo recargar el modelo local ({e}); se sigue usando el anterior.")
+            finally:
+                # También tras un fallo: no se reintenta hasta que se publique otro checkpoint
+                self.firma_checkpoint = firma
+                self._lock_recarga.release()
+
+        if en_segundo_plano:
+            threading.Thread(target=recargar, name="recarga_generador_local", daemon=True).start()
+        else:
+            recargar()
+
+    def _generar_lote(self, entradas: List[str]) -> List[str]:
+        # generate reutiliza la caché de claves/valores entre pasos (use_cache) para todo el lote
+        with self._lock, self.torch.inference_mode():
+            tokenizer = self.tokenizer
+            tokens = tokenizer(entradas, padding=True, truncation=True, max_length=MAX_ENTRADA, return_tensors="pt")
+            salida = self.modelo.generate(**tokens, max_new_tokens=MAX_NUEVOS_TOKENS, num_beams=1,
+                                          do_sample=False, use_cache=True)
+        return [texto.strip() for texto in tokenizer.batch_decode(salida, skip_special_tokens=True)]
+
+    def generar(self, pregunta: str, contexto: str) -> str:
+        self.recargar_si_cambio()
+        # Mismo formato de entrada que en el entrenamiento (scripts/datos_entrenamiento.py)
+        return self.agrupador.enviar(texto_entrada(pregunta, contexto))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba del backend de generación local")
+    parser.add_argument("pregunta")
+    parser.add_argument("--contexto", default="")
+    parser.add_argument("--lote", type=int, default=1, help="genera la misma pregunta N veces en un lote")
+    parser.add_argument("--sin-int8", action="store_true")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    generador = GeneradorLocal(cuantizar=not args.sin_int8)
+    print(f"⏱️ Carga: {time.perf_counter() - inicio:.2f} s")
+    inicio = time.perf_counter()
+    respuestas = generador._generar_lote([texto_entrada(args.pregunta, args.contexto)] * args.lote)
+    segundos = time.perf_counter() - inicio
+    print(f"⏱️ {args.lote} respuestas en {segundos:.2f} s ({segundos / args.lote:.2f} s por respuesta)")
+    print(f"🤖 {respuestas[0]}")
@@ -1,6 +1,8 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING
 import json
-from bson.objectid import ObjectId
+import time
+import hashlib
+import argparse
 from dotenv import load_dotenv
 import os
 
@@ -9,36 +11,83 @@ load_dotenv()
 MONGODB_URI = os.getenv("MONGODB_URI")
 MONGODB_DB = os.getenv("MONGODB_DB")
 MONGODB_COLLECTION = os.getenv("MONGODB_COLLECTION")
+MONGODB_LOTE = int(os.getenv("MONGODB_LOTE", "500"))
 
-# Conectar a MongoDB y cargar las secciones
-client = MongoClient(MONGODB_URI)
-db = client[MONGODB_DB]
-coleccion = db[MONGODB_COLLECTION]
-
-# Limpiar la colección antes de cargar los datos nuevamente
-coleccion.delete_many({})  # Esto elimina todas las entradas anteriores
 # Ruta absoluta a la raíz del proyecto
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 ruta_json = os.path.join(BASE_DIR, 'data', 'secciones_completas.json')
 
 
+def hash_seccion(seccion):
+    """Hash del contenido de la sección; se usa como _id para que la carga sea idempotente."""
+    return hashlib.sha256(json.dumps(seccion, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def cargar_secciones(db, nombre_coleccion, secciones, tamano_lote=MONGODB_LOTE):
+    """
+    Carga las secciones en una colección temporal con insert_many por lotes y la publica
+    con renameCollection(dropTarget): los lectores ven la colección anterior completa
+    hasta el reemplazo y nunca una carga a medias. Si el contenido no cambió, no escribe nada.
+    """
+    documentos = {}
+    for seccion in secciones:
+        seccion = {clave: valor for clave, valor in seccion.items() if clave != '_id'}
+        documentos[hash_seccion(seccion)] = seccion
+
+    if nombre_coleccion in db.list_collection_names():
+        if set(db[nombre_coleccion].distinct('_id')) == set(documentos):
+            print(f"⏭️ La colección {nombre_coleccion} ya contiene estas {len(documentos)} secciones.")
+            return {'documentos': len(documentos), 'lotes': 0, 'segundos': 0.0, 'docs_por_segundo': 0.0}
+
+    temporal = db[f"{nombre_coleccion}_carga"]
+    temporal.drop()
+
+    inicio = time.perf_counter()
+    # La colección temporal parte vacía y los _id ya vienen deduplicados por hash
+    filas = [dict(seccion, _id=huella) for huella, seccion in documentos.items()]
+    lotes = 0
+    for desde in range(0, len(filas), tamano_lote):
+        temporal.insert_many(filas[desde:desde + tamano_lote], ordered=False)
+        lotes += 1
+
+    temporal.create_index([('documento', ASCENDING), ('titulo', ASCENDING)])
+    temporal.rename(nombre_coleccion, dropTarget=True)
+    segundos = time.perf_counter() - inicio
+
+    return {
+        'documentos': len(documentos),
+        'lotes': lotes,
+        'segundos': round(segundos, 3),
+        'docs_por_segundo': round(len(documentos) / segundos, 1) if segundos else 0.0
+    }
+
+
 # Función para cargar datos desde el archivo JSON completo
-def cargar_datos_completos(archivo_json):
+def cargar_datos_completos(archivo_json, db, nombre_coleccion, tamano_lote=MONGODB_LOTE):
     try:
         # Abrir y cargar los datos del archivo JSON
         with open(archivo_json, 'r', encoding='utf-8') as f:
             secciones = json.load(f)
 
-        # Insertar las secciones en la base de datos
-        for seccion in secciones:
-            seccion['_id'] = ObjectId()  # Generar un nuevo ObjectId para cada sección
-            coleccion.insert_one(seccion)
-
+        reporte = cargar_secciones(db, nombre_coleccion, secciones, tamano_lote)
+        if not reporte['lotes']:
+            return reporte
         print(f"Datos del archivo {archivo_json} cargados exitosamente en la base de datos.")
+        print(f"📊 {reporte['documentos']} secciones en {reporte['lotes']} lotes, "
+              f"{reporte['segundos']} s ({reporte['docs_por_segundo']} docs/s)")
+        return reporte
 
     except Exception as e:
         print(f"Error al cargar datos desde {archivo_json}: {e}")
+        exit(1)
+
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga idempotente de secciones en MongoDB")
+    parser.add_argument("--lote", type=int, default=MONGODB_LOTE, help="documentos por insert_many")
+    parser.add_argument("--archivo", default=ruta_json)
+    args = parser.parse_args()
 
-# Cargar datos
-cargar_datos_completos(ruta_json)
+    # Conectar a MongoDB y cargar las secciones
+    client = MongoClient(MONGODB_URI)
+    cargar_datos_completos(args.archivo, client[MONGODB_DB], MONGODB_COLLECTION, args.lote)
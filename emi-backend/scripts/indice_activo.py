@@ -0,0 +1,39 @@
+import os
+import json
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+DIR_VERSIONES = os.path.join(DATA_DIR, 'indices')
+# Puntero al índice activo: el manifiesto de la versión publicada. Es lo único que se reemplaza al
+# publicar, así que quien lo lee obtiene índice, metadata y manifiesto de una misma versión.
+RUTA_MANIFIESTO = os.path.join(DATA_DIR, 'indice_faiss.json')
+
+
+def leer_manifiesto() -> dict:
+    # Un índice antiguo sin manifiesto usa L2 sin normalizar y sus archivos sueltos en data/
+    if not os.path.exists(RUTA_MANIFIESTO):
+        return {}
+    with open(RUTA_MANIFIESTO, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def directorio_activo(manifiesto: dict = None) -> str:
+    """Directorio de la versión publicada; data/ para un índice anterior al versionado."""
+    manifiesto = leer_manifiesto() if manifiesto is None else manifiesto
+    version = manifiesto.get('version')
+    if version and os.path.isdir(os.path.join(DIR_VERSIONES, version)):
+        return os.path.join(DIR_VERSIONES, version)
+    return DATA_DIR
+
+
+def ruta_activa(nombre: str, manifiesto: dict = None) -> str:
+    """Ruta de un archivo del índice (p. ej. 'indice_faiss.index') en la versión de `manifiesto`."""
+    return os.path.join(directorio_activo(manifiesto), nombre)
+
+
+def publicar_manifiesto(manifiesto: dict):
+    """Activa la versión del manifiesto (ya escrita en data/indices/<version>/) con un solo reemplazo atómico."""
+    temporal = f"{RUTA_MANIFIESTO}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, RUTA_MANIFIESTO)
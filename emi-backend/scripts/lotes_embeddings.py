@@ -0,0 +1,79 @@
+import os
+import queue
+import time
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+
+class AgrupadorConsultas:
+    """
+    Micro-batching dinámico: agrupa las consultas que llegan desde varios hilos durante una
+    ventana de unos milisegundos (o hasta max_lote) y las procesa juntas con una sola llamada
+    a procesar_lote(elementos) -> resultados (misma longitud y orden).
+    Cada hilo que llamó a enviar() recibe únicamente su resultado.
+    """
+
+    def __init__(self, procesar_lote: Callable[[List[Any]], List[Any]], max_lote: int = 32,
+                 espera_ms: float = 5):
+        self.procesar_lote = procesar_lote
+        self.max_lote = max_lote
+        self.espera = espera_ms / 1000
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid_hilo = None
+        self.lotes = 0
+        self.consultas = 0
+        self.max_lote_observado = 0
+
+    def _asegurar_hilo(self):
+        # El hilo se crea en el primer uso de cada proceso (no sobrevive a un fork)
+        if self._pid_hilo != os.getpid():
+            with self._lock:
+                if self._pid_hilo != os.getpid():
+                    self._cola = queue.Queue()
+                    threading.Thread(target=self._bucle, name="agrupador_consultas", daemon=True).start()
+                    self._pid_hilo = os.getpid()
+
+    def enviar(self, elemento: Any, timeout: float = None) -> Any:
+        if self.max_lote <= 1:
+            return self.procesar_lote([elemento])[0]
+        self._asegurar_hilo()
+        futuro = Future()
+        self._cola.put((elemento, futuro))
+        return futuro.result(timeout)
+
+    def _bucle(self):
+        cola = self._cola
+        while True:
+            pendientes = [cola.get()]
+            limite = time.monotonic() + self.espera
+            while len(pendientes) < self.max_lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    pendientes.append(cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            self.lotes += 1
+            self.consultas += len(pendientes)
+            self.max_lote_observado = max(self.max_lote_observado, len(pendientes))
+            try:
+                resultados = self.procesar_lote([elemento for elemento, _ in pendientes])
+                for (_, futuro), resultado in zip(pendientes, resultados):
+                    futuro.set_result(resultado)
+            except Exception as e:
+                for _, futuro in pendientes:
+                    futuro.set_exception(e)
+
+    def estadisticas(self) -> dict:
+        return {
+            'max_lote': self.max_lote,
+            'espera_ms': self.espera * 1000,
+            'lotes': self.lotes,
+            'consultas': self.consultas,
+            'lote_promedio': round(self.consultas / self.lotes, 2) if self.lotes else 0.0,
+            'max_lote_observado': self.max_lote_observado
+        }
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+from scripts.cache_lru import CacheLRU
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+
+
+def nuevo_contexto() -> Dict:
+    """Memoria conversacional vacía de una sesión."""
+    return {
+        'ultima_consulta': None,
+        'ultimo_articulo': None,
+        'ultimo_rac': None,
+        'sugerencias_previas': []
+    }
+
+
+def nuevo_id_sesion() -> str:
+    return uuid.uuid4().hex
+
+
+class AlmacenSesiones(ABC):
+    """Interfaz común: guarda la memoria conversacional (dict serializable a JSON) por id de sesión."""
+
+    @abstractmethod
+    def obtener(self, sesion_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def guardar(self, sesion_id: str, contexto: Dict):
+        ...
+
+    @abstractmethod
+    def eliminar(self, sesion_id: str):
+        ...
+
+
+class AlmacenSesionesMemoria(AlmacenSesiones):
+    """LRU acotada con TTL dentro del proceso. Solo sirve con un único proceso."""
+
+    def __init__(self, max_sesiones: int = 10000, ttl: float = 1800):
+        self.cache = CacheLRU(max_entradas=max_sesiones, ttl=ttl)
+
+    def obtener(self, sesion_id: str) -> Optional[Dict]:
+        datos = self.cache.obtener(sesion_id)
+        # Se devuelve una copia para que cada petición trabaje sobre su propio estado
+        return json.loads(datos) if datos is not None else None
+
+    def guardar(self, sesion_id: str, contexto: Dict):
+        self.cache.guardar(sesion_id, json.dumps(contexto, ensure_ascii=False))
+
+    def eliminar(self, sesion_id: str):
+        self.cache.eliminar(sesion_id)
+
+
+class AlmacenSesionesSQLite(AlmacenSesiones):
+    """
+    Almacén compartido entre procesos sobre un archivo SQLite local (modo WAL).
+    Cada hilo/proceso abre su propia conexión; las sesiones expiradas se purgan periódicamente.
+    """
+
+    def __init__(self, ruta: str, ttl: float = 1800, purgar_cada: int = 500):
+        self.ruta = ruta
+        self.ttl = ttl
+        self.purgar_cada = purgar_cada
+        self._local = threading.local()
+        self._escrituras = 0
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        with self._conexion() as conexion:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS sesiones ("
+                " id TEXT PRIMARY KEY,"
+                " datos TEXT NOT NULL,"
+                " actualizado REAL NOT NULL)"
+            )
+            conexion.execute("CREATE INDEX IF NOT EXISTS idx_sesiones_actualizado ON sesiones (actualizado)")
+
+    def _conexion(self) -> sqlite3.Connection:
+        # Las conexiones no deben cruzar un fork: se reabren si cambió el pid
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None or self._local.pid != os.getpid():
+            conexion = sqlite3.connect(self.ruta, timeout=5, isolation_level=None)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion = conexion
+            self._local.pid = os.getpid()
+        return conexion
+
+    def obtener(self, sesion_id: str) -> Optional[Dict]:
+        fila = self._conexion().execute(
+            "SELECT datos FROM sesiones WHERE id = ? AND actualizado >= ?",
+            (sesion_id, time.time() - self.ttl)
+        ).fetchone()
+        return json.loads(fila[0]) if fila else None
+
+    def guardar(self, sesion_id: str, contexto: Dict):
+        conexion = self._conexion()
+        conexion.execute(
+            "INSERT INTO sesiones (id, datos, actualizado) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET datos = excluded.datos, actualizado = excluded.actualizado",
+            (sesion_id, json.dumps(contexto, ensure_ascii=False), time.time())
+        )
+        self._escrituras += 1
+        if self._escrituras % self.purgar_cada == 0:
+            conexion.execute("DELETE FROM sesiones WHERE actualizado < ?", (time.time() - self.ttl,))
+
+    def eliminar(self, sesion_id: str):
+        self._conexion().execute("DELETE FROM sesiones WHERE id = ?", (sesion_id,))
+
+
+def crear_almacen_sesiones() -> AlmacenSesiones:
+    """
+    Construye el almacén según las variables de entorno:
+      SESIONES_BACKEND: 'memoria' (por defecto) o 'sqlite' (necesario con varios procesos).
+      SESIONES_TTL: segundos de inactividad antes de olvidar una sesión.
+      SESIONES_MAX: número máximo de sesiones en memoria.
+      SESIONES_SQLITE_RUTA: archivo SQLite compartido.
+    """
+    backend = os.getenv("SESIONES_BACKEND", "memoria").lower()
+    ttl = float(os.getenv("SESIONES_TTL", 1800))
+    if backend == "sqlite":
+        ruta = os.getenv("SESIONES_SQLITE_RUTA", os.path.join(DATA_DIR, 'sesiones.sqlite3'))
+        print(f"🗂️ Memoria conversacional compartida en SQLite: {ruta}")
+        return AlmacenSesionesSQLite(ruta, ttl=ttl)
+    if backend != "memoria":
+        raise ValueError(f"❌ SESIONES_BACKEND desconocido: {backend}")
+    return AlmacenSesionesMemoria(max_sesiones=int(os.getenv("SESIONES_MAX", 10000)), ttl=ttl)
@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import mmap
+import pickle
+import struct
+import numpy as np
+from typing import Dict, List
+
+# Formato en disco (un solo archivo, para poder reemplazarlo de forma atómica):
+#   MAGIA (8 bytes) | longitud de la cabecera (uint64) | cabecera JSON (UTF-8)
+#   por cada campo: tabla de offsets uint64 (n + 1 valores) y blob de texto UTF-8
+# Cada bloque empieza alineado a 8 bytes. La cabecera guarda dónde empieza cada bloque.
+MAGIA = b'EMIMETA1'
+ALINEACION = 8
+
+
+def _alinear(posicion: int) -> int:
+    return (posicion + ALINEACION - 1) // ALINEACION * ALINEACION
+
+
+def escribir_metadata_compacta(articulos: List[Dict], ruta: str):
+    """Guarda la lista de artículos (dicts de texto) en formato columnar; escritura atómica."""
+    campos = []
+    for articulo in articulos:
+        for campo in articulo:
+            if campo not in campos:
+                campos.append(campo)
+
+    columnas = {}
+    for campo in campos:
+        codificados = [str(articulo.get(campo, '')).encode('utf-8') for articulo in articulos]
+        offsets = np.zeros(len(codificados) + 1, dtype=np.uint64)
+        offsets[1:] = np.cumsum([len(texto) for texto in codificados], dtype=np.uint64)
+        columnas[campo] = (offsets, b''.join(codificados))
+
+    # La cabecera depende de las posiciones y las posiciones del tamaño de la cabecera:
+    # se reserva un tamaño fijo holgado para resolverlo en una sola pasada.
+    reserva_cabecera = _alinear(256 + 96 * len(campos))
+    posicion = _alinear(len(MAGIA) + 8 + reserva_cabecera)
+    bloques = {}
+    for campo, (offsets, blob) in columnas.items():
+        inicio_offsets = posicion
+        inicio_blob = _alinear(inicio_offsets + offsets.nbytes)
+        bloques[campo] = {'offsets': inicio_offsets, 'blob': inicio_blob, 'bytes_blob': len(blob)}
+        posicion = _alinear(inicio_blob + len(blob))
+
+    cabecera = json.dumps({'total': len(articulos), 'campos': campos, 'bloques': bloques}).encode('utf-8')
+    if len(cabecera) > reserva_cabecera:
+        raise ValueError("❌ La cabecera de la metadata compacta excede el espacio reservado")
+
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'wb') as f:
+        f.write(MAGIA)
+        f.write(struct.pack('<Q', len(cabecera)))
+        f.write(cabecera)
+        for campo, (offsets, blob) in columnas.items():
+            f.seek(bloques[campo]['offsets'])
+            f.write(offsets.tobytes())
+            f.seek(bloques[campo]['blob'])
+            f.write(blob)
+        f.truncate(posicion)
+    os.replace(temporal, ruta)
+
+
+class MetadataCompacta:
+    """
+    Vista de solo lectura sobre el archivo compacto, mapeado en memoria. Todos los procesos que
+    lo abren comparten las mismas páginas del page cache; los textos se decodifican bajo demanda.
+    Se comporta como la lista de dicts que devolvía el pickle: metadata[i], len(), iteración.
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        with open(ruta, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIA)] != MAGIA:
+            raise ValueError(f"❌ {ruta} no es un archivo de metadata compacta")
+        (longitud,) = struct.unpack_from('<Q', self._mmap, len(MAGIA))
+        inicio = len(MAGIA) + 8
+        cabecera = json.loads(self._mmap[inicio:inicio + longitud].decode('utf-8'))
+        self.total = cabecera['total']
+        self.campos = cabecera['campos']
+        self._columnas = {}
+        for campo, bloque in cabecera['bloques'].items():
+            # np.frombuffer no copia: la tabla de offsets queda respaldada por el mmap
+            offsets = np.frombuffer(self._mmap, dtype=np.uint64, count=self.total + 1, offset=bloque['offsets'])
+            self._columnas[campo] = (offsets, bloque['blob'])
+
+    def __len__(self) -> int:
+        return self.total
+
+    def valor(self, i: int, campo: str) -> str:
+        offsets, inicio_blob = self._columnas[campo]
+        return self._mmap[inicio_blob + int(offsets[i]):inicio_blob + int(offsets[i + 1])].decode('utf-8')
+
+    def __getitem__(self, i) -> Dict:
+        i = int(i)
+        if i < 0:
+            i += self.total
+        if not 0 <= i < self.total:
+            raise IndexError(i)
+        return {campo: self.valor(i, campo) for campo in self.campos}
+
+    def __iter__(self):
+        for i in range(self.total):
+            yield self[i]
+
+
+if __name__ == "__main__":
+    # Convierte un metadata_articulos.pkl existente al formato compacto
+    BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    origen = sys.argv[1] if len(sys.argv) > 1 else os.path.join(BASE_DIR, 'data', 'metadata_articulos.pkl')
+    destino = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(origen)[0] + '.bin'
+    with open(origen, 'rb') as f:
+        articulos = pickle.load(f)
+    escribir_metadata_compacta(articulos, destino)
+    print(f"✅ {len(articulos)} artículos convertidos: {origen} -> {destino} ({os.path.getsize(destino) / 1024:.1f} KB)")
@@ -0,0 +1,128 @@
+import os
+import sys
+import json
+import time
+import argparse
+import urllib.request
+from typing import Dict, Iterator, List
+
+# Permite importar el paquete scripts al ejecutar este archivo directamente
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts import bucle_async
+from scripts.api_llm import (SIN_INFORMACION, normalizar_texto, recuperar_contextos_lote, buscar_en_cache,
+                             guardar_en_cache, consultar_llm_en_paralelo, responder_extractivo, respaldo_si_error)
+
+# Llamadas al LLM en curso a la vez por lote, y tamaño máximo de un lote en la API
+LOTE_CONCURRENCIA = int(os.getenv("LOTE_CONCURRENCIA", 8))
+LOTE_MAX_PREGUNTAS = int(os.getenv("LOTE_MAX_PREGUNTAS", 1000))
+
+
+def responder_lote(preguntas: List[str], modelo=None, concurrencia: int = LOTE_CONCURRENCIA) -> Iterator[Dict]:
+    """
+    Responde una lista de preguntas independientes (sin memoria conversacional) y entrega cada
+    resultado apenas está listo: {'indice', 'pregunta', 'respuesta', 'origen', 'ms'}.
+      1. Lo que el modelo local resuelve sin LLM (saludos, artículos exactos, dataset): 'dataset'.
+      2. El resto se recupera con una sola codificación y búsqueda FAISS; 'cache' si ya se respondió,
+         'extractiva' si las oraciones citadas bastan (EXTRACTIVA_MODO=primero o ambos).
+      3. Las preguntas restantes van al LLM en paralelo, hasta `concurrencia` a la vez: 'llm', o
+         'respaldo' si el LLM falló y se respondió con las oraciones citadas.
+    Las preguntas repetidas (mismo texto normalizado) se consultan una sola vez.
+    """
+    inicio = time.perf_counter()
+
+    def resultado(indice, respuesta, origen):
+        return {'indice': indice, 'pregunta': preguntas[indice], 'respuesta': respuesta, 'origen': origen,
+                'ms': round((time.perf_counter() - inicio) * 1000, 1)}
+
+    pendientes = []
+    for indice, pregunta in enumerate(preguntas):
+        respuesta = modelo.generar_respuesta_sin_sesion(pregunta, usar_llm=False) if modelo else None
+        if respuesta is not None:
+            yield resultado(indice, respuesta, 'dataset')
+        else:
+            pendientes.append(indice)
+
+    # Por texto normalizado: índices que esperan la respuesta y la recuperación de la primera pregunta
+    grupos = {}
+    for indice in pendientes:
+        grupos.setdefault(normalizar_texto(preguntas[indice]), []).append(indice)
+    claves = list(grupos)
+    recuperaciones = dict(zip(claves, recuperar_contextos_lote([preguntas[grupos[c][0]] for c in claves])))
+
+    trabajos = []
+    for clave in claves:
+        recuperacion = recuperaciones[clave]
+        if recuperacion is None:
+            respuesta, origen = SIN_INFORMACION, 'sin_informacion'
+        else:
+            respuesta, origen = buscar_en_cache(preguntas[grupos[clave][0]], recuperacion), 'cache'
+            if respuesta is None:
+                respuesta, origen = responder_extractivo(recuperacion), 'extractiva'
+                if respuesta is not None:
+                    guardar_en_cache(preguntas[grupos[clave][0]], recuperacion, respuesta)
+        if respuesta is None:
+            trabajos.append((clave, preguntas[grupos[clave][0]], recuperacion['contexto']))
+            continue
+        for indice in grupos[clave]:
+            yield resultado(indice, respuesta, origen)
+
+    print(f"🤖 {len(trabajos)} consultas al LLM ({concurrencia} en paralelo) para {len(preguntas)} preguntas")
+    for clave, respuesta in bucle_async.iterar(consultar_llm_en_paralelo(trabajos, concurrencia)):
+        guardar_en_cache(preguntas[grupos[clave][0]], recuperaciones[clave], respuesta)
+        final = respaldo_si_error(recuperaciones[clave], respuesta)
+        for indice in grupos[clave]:
+            yield resultado(indice, final, 'llm' if final is respuesta else 'respaldo')
+
+
+def leer_preguntas(ruta: str) -> List[str]:
+    """Un .json con una lista de preguntas (textos u objetos con 'pregunta') o un texto con una por línea."""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        if ruta.endswith('.json'):
+            return [p['pregunta'] if isinstance(p, dict) else p for p in json.load(f)]
+        return [linea.strip() for linea in f if linea.strip()]
+
+
+def responder_lote_remoto(url: str, preguntas: List[str], concurrencia: int) -> Iterator[Dict]:
+    peticion = urllib.request.Request(
+        url.rstrip('/') + "/api/preguntar/lote",
+        data=json.dumps({'preguntas': preguntas, 'concurrencia': concurrencia}).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(peticion) as respuesta:
+        for linea in respuesta:
+            if linea.strip():
+                yield json.loads(linea)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Responde un archivo de preguntas en lote (salida en JSON lines)")
+    parser.add_argument("archivo", help=".json con una lista de preguntas o .txt con una por línea")
+    parser.add_argument("--salida", help="archivo .jsonl (por defecto, la salida estándar)")
+    parser.add_argument("--concurrencia", type=int, default=LOTE_CONCURRENCIA)
+    parser.add_argument("--url", help="usa una API en ejecución (p. ej. http://localhost:5000) en lugar del modelo local")
+    args = parser.parse_args()
+
+    if args.salida:
+        salida = open(args.salida, 'w', encoding='utf-8')
+    else:
+        # Los mensajes de progreso (print) van a stderr para no mezclarse con las líneas JSON
+        salida, sys.stdout = sys.stdout, sys.stderr
+
+    preguntas = leer_preguntas(args.archivo)
+    if args.url:
+        resultados = responder_lote_remoto(args.url, preguntas, args.concurrencia)
+    else:
+        from modelo_consulta import ModeloConsultaEMI
+        resultados = responder_lote(preguntas, ModeloConsultaEMI(), args.concurrencia)
+
+    inicio = time.perf_counter()
+    try:
+        for resultado in resultados:
+            salida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+            salida.flush()
+    finally:
+        if args.salida:
+            salida.close()
+    print(f"✅ {len(preguntas)} preguntas respondidas en {time.perf_counter() - inicio:.1f} s", file=sys.stderr)
@@ -1,17 +1,14 @@
 import os
+import sys
 import json
 import re
 
 # Ruta base del proyecto
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
+sys.path.insert(0, BASE_DIR)
 
-# Cargar los artículos previamente extraídos
-with open(os.path.join(DATA_DIR, 'rac01_articulos.json'), "r", encoding="utf-8") as f:
-    rac01 = json.load(f)
-
-with open(os.path.join(DATA_DIR, 'rac02_articulos.json'), "r", encoding="utf-8") as f:
-    rac02 = json.load(f)
+from scripts.registro_corpus import cargar_registro, ruta_articulos_extraidos
 
 
 def extraer_numero_articulo(titulo):
@@ -57,20 +54,19 @@ def ordenar_articulos(articulos):
 # Generar dataset
 dataset = []
 
-# Procesar RAC-01 y RAC-02 ordenados
-rac01_ordenado = ordenar_articulos(rac01)
-rac02_ordenado = ordenar_articulos(rac02)
-
-for articulo in rac01_ordenado:
-    dataset.extend(generar_pregunta_respuesta(articulo, "RAC-01"))
-
-for articulo in rac02_ordenado:
-    dataset.extend(generar_pregunta_respuesta(articulo, "RAC-02"))
+# Procesar cada reglamento registrado, con sus artículos ordenados
+registro = cargar_registro()
+for reglamento in registro:
+    # Artículos previamente extraídos por preparar_datos.py
+    with open(ruta_articulos_extraidos(reglamento), "r", encoding="utf-8") as f:
+        articulos = json.load(f)
+    for articulo in ordenar_articulos(articulos):
+        dataset.extend(generar_pregunta_respuesta(articulo, reglamento['id']))
 
 # Guardar dataset en JSON
 with open(os.path.join(DATA_DIR, 'dataset_entrenamiento.json'), "w", encoding="utf-8") as f:
     json.dump(dataset, f, ensure_ascii=False, indent=2)
 
 print(f"✅ Dataset generado con {len(dataset)} ejemplos explicativos y guardado como dataset_entrenamiento.json")
-print(f"Ejemplos de RAC-01: {len([d for d in dataset if 'RAC-01' in d['respuesta']])}")
-print(f"Ejemplos de RAC-02: {len([d for d in dataset if 'RAC-02' in d['respuesta']])}")
+for reglamento in registro:
+    print(f"Ejemplos de {reglamento['id']}: {len([d for d in dataset if reglamento['id'] in d['respuesta']])}")
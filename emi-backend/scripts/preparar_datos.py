@@ -1,25 +1,19 @@
 import os
+import sys
 import json
 import re
 
 # Ruta absoluta a la raíz del proyecto
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-DATA_DIR = os.path.join(BASE_DIR, 'data')
+sys.path.insert(0, BASE_DIR)
 
-# Cargar los textos de RAC-01 y RAC-02
-with open(os.path.join(DATA_DIR, 'rac01.txt'), "r", encoding="utf-8") as f:
-    texto_rac01 = f.read()
-
-with open(os.path.join(DATA_DIR, 'rac02.txt'), "r", encoding="utf-8") as f:
-    texto_rac02 = f.read()
+from scripts.segmentador import segmentar_articulos
+from scripts.registro_corpus import cargar_registro, ruta_fuente, ruta_articulos_extraidos
 
 
 def extraer_articulos(texto):
-    pattern = r'(art[íi]culo\s*\d+)[:\s]*(.*?)(?=art[ íi]culo\s*\d+|$)'
-    matches = re.findall(pattern, texto, re.DOTALL | re.IGNORECASE)
-
     articulos = []
-    for titulo, contenido in matches:
+    for titulo, contenido in segmentar_articulos(texto):
         contenido = re.sub(r'\s+', ' ', contenido.strip())
         if contenido:
             articulos.append({
@@ -30,15 +24,14 @@ def extraer_articulos(texto):
     return articulos
 
 
-# Extraer artículos
-articulos_rac01 = extraer_articulos(texto_rac01)
-articulos_rac02 = extraer_articulos(texto_rac02)
-
-# Guardar en archivos JSON
-with open(os.path.join(DATA_DIR, 'rac01_articulos.json'), "w", encoding="utf-8") as f:
-    json.dump(articulos_rac01, f, ensure_ascii=False, indent=2)
+# Extraer los artículos de cada reglamento registrado y guardarlos en data/<slug>_articulos.json
+totales = []
+for reglamento in cargar_registro():
+    with open(ruta_fuente(reglamento), "r", encoding="utf-8") as f:
+        articulos = extraer_articulos(f.read())
 
-with open(os.path.join(DATA_DIR, 'rac02_articulos.json'), "w", encoding="utf-8") as f:
-    json.dump(articulos_rac02, f, ensure_ascii=False, indent=2)
+    with open(ruta_articulos_extraidos(reglamento), "w", encoding="utf-8") as f:
+        json.dump(articulos, f, ensure_ascii=False, indent=2)
+    totales.append(f"{reglamento['id']}: {len(articulos)}")
 
-print(f"✅ Artículos extraídos: RAC-01: {len(articulos_rac01)}, RAC-02: {len(articulos_rac02)}")
+print(f"✅ Artículos extraídos: {', '.join(totales)}")
@@ -0,0 +1,28 @@
+import numpy as np
+from typing import Dict, List, Sequence
+from scripts.similitud_preguntas import mejores_indices
+
+
+class IndiceDisperso:
+    """
+    Búsqueda léxica sobre los artículos de metadata_articulos.pkl usando el TfidfVectorizer
+    entrenado por vectorizar_texto.py. La matriz se recalcula sobre los artículos de la
+    metadata para que sus filas coincidan con los ids del índice FAISS.
+    """
+
+    def __init__(self, vectorizador, documentos: List[str]):
+        self.vectorizador = vectorizador
+        self.matriz = vectorizador.transform(documentos).tocsr()
+
+    def buscar(self, texto: str, k: int) -> List[int]:
+        puntajes = (self.matriz @ self.vectorizador.transform([texto]).T).toarray().ravel()
+        return [int(i) for i in mejores_indices(puntajes, k) if puntajes[i] > 0]
+
+
+def fusionar_rrf(rankings: Sequence[Sequence[int]], k: int = 60) -> List[int]:
+    """Reciprocal Rank Fusion: cada lista aporta 1 / (k + posición) a cada id que contiene."""
+    puntajes: Dict[int, float] = {}
+    for ranking in rankings:
+        for posicion, id_doc in enumerate(ranking, start=1):
+            puntajes[id_doc] = puntajes.get(id_doc, 0.0) + 1.0 / (k + posicion)
+    return sorted(puntajes, key=lambda id_doc: puntajes[id_doc], reverse=True)
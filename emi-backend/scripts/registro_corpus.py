@@ -0,0 +1,153 @@
+import os
+import re
+import sys
+import json
+import shutil
+import argparse
+from typing import Dict, List
+
+# Permite importar el paquete scripts al ejecutar este archivo directamente
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+
+from scripts.segmentador import segmentar_articulos
+
+# Manifiesto del corpus: un fragmento por reglamento, en el orden en que entran al índice.
+#   {"reglamentos": [{"id": "RAC-01", "slug": "rac01", "fuente": "rac01.txt"}, ...]}
+# Cada fragmento vive en data/corpus/<slug>/ con sus artículos (articulos.json) y sus
+# embeddings (embeddings.npy + fragmento.json, que escribe construir_indice.py).
+RUTA_REGISTRO = os.path.join(DATA_DIR, 'corpus.json')
+DIR_FRAGMENTOS = os.path.join(DATA_DIR, 'corpus')
+
+
+def cargar_registro(ruta: str = RUTA_REGISTRO) -> List[Dict]:
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)['reglamentos']
+
+
+def guardar_registro(reglamentos: List[Dict], ruta: str = RUTA_REGISTRO):
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump({'reglamentos': reglamentos}, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta)
+
+
+def numero_rac(id_reglamento: str) -> str:
+    # 'RAC-01' -> '1', igual que lo captura PATRON_RAC en modelo_consulta
+    return str(int(re.search(r'\d+', id_reglamento).group(0)))
+
+
+def racs_disponibles(registro: List[Dict] = None) -> List[str]:
+    registro = cargar_registro() if registro is None else registro
+    return sorted({numero_rac(r['id']) for r in registro})
+
+
+def ruta_fuente(reglamento: Dict) -> str:
+    return os.path.join(DATA_DIR, reglamento['fuente'])
+
+
+def ruta_fragmento(reglamento: Dict, archivo: str) -> str:
+    return os.path.join(DIR_FRAGMENTOS, reglamento['slug'], archivo)
+
+
+def ruta_articulos_extraidos(reglamento: Dict) -> str:
+    # Salida de preparar_datos.py (entrada de preguntas_respuestas.py)
+    return os.path.join(DATA_DIR, f"{reglamento['slug']}_articulos.json")
+
+
+def cargar_articulos(reglamento: Dict) -> List[Dict]:
+    with open(ruta_fragmento(reglamento, 'articulos.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def articulos_desde_texto(texto: str, id_reglamento: str) -> List[Dict]:
+    """Artículos en el formato del índice; el resto de la línea del encabezado es el título."""
+    articulos = []
+    for encabezado, cuerpo in segmentar_articulos(texto):
+        titulo, _, contenido = cuerpo.strip().partition('\n')
+        articulos.append({
+            'reglamento': id_reglamento,
+            'articulo': encabezado.strip(),
+            'titulo': titulo.strip(),
+            'contenido': contenido.strip() or titulo.strip()
+        })
+    return articulos
+
+
+def escribir_articulos(reglamento: Dict, articulos: List[Dict]):
+    ruta = ruta_fragmento(reglamento, 'articulos.json')
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(articulos, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta)
+
+
+def fragmentar(registro: List[Dict] = None):
+    """
+    Regenera el articulos.json de cada fragmento desde su fuente (etapa del pipeline). Solo se
+    reescriben los que cambian, así construir_indice reutiliza los embeddings de los demás.
+    """
+    for reglamento in cargar_registro() if registro is None else registro:
+        with open(ruta_fuente(reglamento), 'r', encoding='utf-8') as f:
+            articulos = articulos_desde_texto(f.read(), reglamento['id'])
+        ruta = ruta_fragmento(reglamento, 'articulos.json')
+        if os.path.exists(ruta) and cargar_articulos(reglamento) == articulos:
+            print(f"⏭️ {reglamento['id']} sin cambios ({len(articulos)} artículos)")
+            continue
+        escribir_articulos(reglamento, articulos)
+        print(f"✅ {reglamento['id']}: {len(articulos)} artículos → {ruta}")
+
+
+def agregar(id_reglamento: str, fuente: str, articulos: str = None):
+    """Registra un reglamento y crea su fragmento; los demás fragmentos no se tocan."""
+    registro = [r for r in cargar_registro() if r['id'] != id_reglamento]
+    reglamento = {'id': id_reglamento, 'slug': re.sub(r'[^a-z0-9]', '', id_reglamento.lower()), 'fuente': fuente}
+    if articulos:
+        with open(articulos, 'r', encoding='utf-8') as f:
+            extraidos = [a for a in json.load(f) if a.get('reglamento', id_reglamento) == id_reglamento]
+    else:
+        with open(ruta_fuente(reglamento), 'r', encoding='utf-8') as f:
+            extraidos = articulos_desde_texto(f.read(), id_reglamento)
+    escribir_articulos(reglamento, extraidos)
+    guardar_registro(registro + [reglamento])
+    print(f"✅ {id_reglamento} registrado con {len(extraidos)} artículos en {ruta_fragmento(reglamento, '')}")
+
+
+def quitar(id_reglamento: str):
+    registro = cargar_registro()
+    restantes = [r for r in registro if r['id'] != id_reglamento]
+    if len(restantes) == len(registro):
+        print(f"⚠️ {id_reglamento} no está registrado.")
+        return
+    reglamento = next(r for r in registro if r['id'] == id_reglamento)
+    guardar_registro(restantes)
+    shutil.rmtree(ruta_fragmento(reglamento, ''), ignore_errors=True)
+    print(f"🗑️ {id_reglamento} eliminado del corpus")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Registro de reglamentos del corpus")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    comandos.add_parser("listar")
+    comandos.add_parser("fragmentar", help="regenera los fragmentos desde las fuentes .txt")
+    p_agregar = comandos.add_parser("agregar")
+    p_agregar.add_argument("id", help="identificador, p. ej. RAC-03")
+    p_agregar.add_argument("fuente", help="archivo .txt dentro de data/")
+    p_agregar.add_argument("--articulos", help="JSON de artículos ya extraídos (en lugar de segmentar la fuente)")
+    p_quitar = comandos.add_parser("quitar")
+    p_quitar.add_argument("id")
+    args = parser.parse_args()
+
+    if args.comando == "agregar":
+        agregar(args.id, args.fuente, args.articulos)
+    elif args.comando == "quitar":
+        quitar(args.id)
+    elif args.comando == "fragmentar":
+        fragmentar()
+    else:
+        for r in cargar_registro():
+            print(f"{r['id']:10} {r['fuente']:20} {len(cargar_articulos(r)):5d} artículos")
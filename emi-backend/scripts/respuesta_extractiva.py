@@ -0,0 +1,215 @@
+import os
+import re
+import sys
+import json
+import time
+import pickle
+import hashlib
+import argparse
+import numpy as np
+from typing import Dict, List, Sequence
+
+# Permite importar el paquete scripts al ejecutar este archivo directamente
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.contexto_llm import encabezado_articulo
+from scripts.indice_activo import ruta_activa
+
+# Embeddings (float32, normalizados) de cada oración de los artículos de metadata_articulos.pkl,
+# y sus textos con el artículo al que pertenecen. Los escribe este script (etapa del pipeline)
+# junto a la versión activa del índice (scripts/indice_activo.py).
+ARCHIVO_EMBEDDINGS = 'oraciones_articulos.npy'
+ARCHIVO_ORACIONES = 'oraciones_articulos.json'
+
+# Similitud coseno mínima de la mejor oración para responder sin consultar al LLM
+UMBRAL_CONFIANZA = float(os.getenv("EXTRACTIVA_UMBRAL", 0.6))
+ORACIONES_RESPUESTA = int(os.getenv("EXTRACTIVA_ORACIONES", 2))
+# Los fragmentos más cortos (numerales, "Artículo 5.") se unen a la oración siguiente
+MIN_CARACTERES = 30
+
+PATRON_ORACION = re.compile(r'(?<=[.;:])\s+')
+PATRON_PALABRA = re.compile(r'\w+')
+# Abreviaturas frecuentes en los reglamentos: el punto que las sigue no termina la oración
+ABREVIATURAS = {'mcal', 'gral', 'cnl', 'tcnl', 'my', 'cap', 'tte', 'sgto', 'ing', 'lic', 'dr', 'dra',
+                'sr', 'sra', 'av', 'art', 'arts', 'no', 'nro', 'est', 'fact', 'hrs'}
+AVISO_RESPALDO = ("El asistente no está disponible en este momento. "
+                  "Estos son los fragmentos del reglamento más cercanos a tu pregunta:")
+
+
+def dividir_oraciones(texto: str) -> List[str]:
+    oraciones, pendiente = [], ""
+    for linea in texto.split('\n'):
+        for fragmento in PATRON_ORACION.split(linea.strip()):
+            pendiente = " ".join(f"{pendiente} {fragmento}".split())
+            palabras = PATRON_PALABRA.findall(pendiente[-12:])
+            if len(pendiente) >= MIN_CARACTERES and not (palabras and palabras[-1].lower() in ABREVIATURAS):
+                oraciones.append(pendiente)
+                pendiente = ""
+    if pendiente:
+        if oraciones:
+            oraciones[-1] += " " + pendiente
+        else:
+            oraciones.append(pendiente)
+    return oraciones
+
+
+def huella_archivo(ruta: str) -> str:
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def construir_oraciones(articulos: Sequence[Dict], modelo, tamano_lote: int = 128):
+    """
+    Divide cada artículo en oraciones y las codifica con el modelo de embeddings de la búsqueda
+    (sobre el texto normalizado, como las preguntas). Devuelve (oraciones, ids de artículo,
+    embeddings normalizados); las oraciones de cada artículo quedan contiguas y en orden.
+    """
+    from scripts.api_llm import normalizar_texto
+
+    oraciones, ids_articulo = [], []
+    for i, articulo in enumerate(articulos):
+        for oracion in dividir_oraciones(articulo.get('contenido', '')):
+            oraciones.append(oracion)
+            ids_articulo.append(i)
+
+    lotes = []
+    for inicio in range(0, len(oraciones), tamano_lote):
+        textos = [normalizar_texto(o) for o in oraciones[inicio:inicio + tamano_lote]]
+        lotes.append(np.asarray(modelo.encode(textos, batch_size=tamano_lote), dtype=np.float32))
+        print(f"🧮 Oraciones: {min(inicio + tamano_lote, len(oraciones))}/{len(oraciones)}")
+    embeddings = np.vstack(lotes) if lotes else np.zeros((0, modelo.get_sentence_embedding_dimension()), np.float32)
+    embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    return oraciones, ids_articulo, np.ascontiguousarray(embeddings, dtype=np.float32)
+
+
+def guardar_oraciones(oraciones, ids_articulo, embeddings, descripcion: Dict, ruta_embeddings: str, ruta_oraciones: str):
+    # Reemplazo atómico de cada archivo; el JSON va al final porque es el que valida el conjunto
+    temporal = f"{ruta_embeddings}.tmp.npy"
+    np.save(temporal, embeddings)
+    os.replace(temporal, ruta_embeddings)
+    temporal = f"{ruta_oraciones}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(dict(descripcion, total=len(oraciones), oraciones=oraciones, ids_articulo=ids_articulo),
+                  f, ensure_ascii=False)
+    os.replace(temporal, ruta_oraciones)
+
+
+class IndiceOraciones:
+    """
+    Oraciones de los artículos con sus embeddings (mapeados en memoria). Para una pregunta ya
+    codificada, puntúa solo las oraciones de los artículos recuperados: cada artículo ocupa un
+    rango contiguo de filas.
+    """
+
+    def __init__(self, ruta_embeddings: str, ruta_oraciones: str):
+        with open(ruta_oraciones, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+        self.huella_metadata = datos.get('huella_metadata')
+        self.modelo_embeddings = datos.get('modelo_embeddings')
+        self.oraciones = datos['oraciones']
+        self.ids_articulo = np.asarray(datos['ids_articulo'], dtype=np.int64)
+        self.embeddings = np.load(ruta_embeddings, mmap_mode='r')
+        if len(self.embeddings) != len(self.oraciones):
+            raise ValueError(f"❌ {ruta_embeddings} no corresponde a {ruta_oraciones}")
+        # Filas [inicios[i], inicios[i + 1]) del artículo i
+        self._inicios = np.searchsorted(self.ids_articulo, np.arange(datos.get('articulos', 0) + 1))
+
+    def __len__(self):
+        return len(self.oraciones)
+
+    def mejores(self, embedding, ids_articulo: Sequence[int], k: int = ORACIONES_RESPUESTA) -> List[Dict]:
+        """Las k oraciones más similares a la pregunta entre los artículos dados (sin textos repetidos)."""
+        consulta = np.asarray(embedding, dtype=np.float32).ravel()
+        consulta = consulta / max(float(np.linalg.norm(consulta)), 1e-12)
+        filas = np.concatenate([np.arange(self._inicios[i], self._inicios[i + 1])
+                                for i in ids_articulo if 0 <= i < len(self._inicios) - 1] or [np.zeros(0, np.int64)])
+        if not len(filas):
+            return []
+        similitudes = np.asarray(self.embeddings[filas]) @ consulta
+        elegidas, vistos = [], set()
+        for posicion in np.argsort(-similitudes):
+            fila = int(filas[posicion])
+            texto = self.oraciones[fila]
+            if texto in vistos:
+                continue
+            vistos.add(texto)
+            elegidas.append({'fila': fila, 'articulo': int(self.ids_articulo[fila]), 'texto': texto,
+                             'similitud': round(float(similitudes[posicion]), 4)})
+            if len(elegidas) == k:
+                break
+        return elegidas
+
+
+def formatear_respuesta(elegidas: Sequence[Dict], metadata, aviso: str = None) -> str:
+    """Cita cada oración con su artículo; las de un mismo artículo se muestran juntas y en su orden."""
+    por_articulo = {}
+    for oracion in elegidas:
+        por_articulo.setdefault(oracion['articulo'], []).append(oracion)
+    bloques = [aviso] if aviso else []
+    for articulo, oraciones in por_articulo.items():
+        citas, anterior = "", None
+        for oracion in sorted(oraciones, key=lambda o: o['fila']):
+            separador = "" if anterior is None else (" " if oracion['fila'] == anterior + 1 else " […] ")
+            citas += separador + oracion['texto']
+            anterior = oracion['fila']
+        bloques.append(f"«{citas}»\n— {encabezado_articulo(metadata[articulo])}")
+    return "\n\n".join(bloques)
+
+
+def responder_extractivo(indice: IndiceOraciones, metadata, embedding, ids_articulo: Sequence[int],
+                         k: int = ORACIONES_RESPUESTA, aviso: str = None) -> Dict:
+    """
+    Respuesta formada por las k oraciones de los artículos recuperados más cercanas a la
+    pregunta. 'confianza' es la similitud coseno de la mejor; None si no hay oraciones.
+    """
+    elegidas = indice.mejores(embedding, ids_articulo, k)
+    if not elegidas:
+        return None
+    return {
+        'respuesta': formatear_respuesta(elegidas, metadata, aviso),
+        'confianza': elegidas[0]['similitud'],
+        'citas': [{'articulo': o['articulo'], 'similitud': o['similitud']} for o in elegidas]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera los embeddings por oración de los artículos del índice")
+    parser.add_argument("--lote", type=int, default=128, help="tamaño de lote para los embeddings")
+    parser.add_argument("--probar", metavar="PREGUNTA", help="responde una pregunta en modo extractivo y termina")
+    args = parser.parse_args()
+
+    if args.probar:
+        from scripts.api_llm import recuperar_contexto, obtener_indice_oraciones, obtener_metadata
+        indice = obtener_indice_oraciones()
+        recuperacion = recuperar_contexto(args.probar)
+        if not indice or recuperacion is None:
+            sys.exit("❌ No hay índice de oraciones o artículos recuperados para la pregunta")
+        inicio = time.perf_counter()
+        resultado = responder_extractivo(indice, obtener_metadata(), recuperacion['embedding'], recuperacion['ids'])
+        print(f"⏱️ {(time.perf_counter() - inicio) * 1000:.2f} ms | confianza {resultado['confianza']}")
+        print(resultado['respuesta'])
+        sys.exit(0)
+
+    from scripts.api_llm import MODELO_EMBEDDINGS
+    from scripts.construir_indice import obtener_modelo
+    from scripts.indice_activo import leer_manifiesto
+
+    # Un solo manifiesto para leer la metadata y escribir las oraciones en la misma versión
+    manifiesto = leer_manifiesto()
+    ruta_metadata = ruta_activa('metadata_articulos.pkl', manifiesto)
+    ruta_embeddings = ruta_activa(ARCHIVO_EMBEDDINGS, manifiesto)
+    with open(ruta_metadata, 'rb') as f:
+        articulos = pickle.load(f)
+    inicio = time.perf_counter()
+    oraciones, ids_articulo, embeddings = construir_oraciones(articulos, obtener_modelo(), args.lote)
+    guardar_oraciones(oraciones, ids_articulo, embeddings, {
+        'modelo_embeddings': MODELO_EMBEDDINGS,
+        'huella_metadata': huella_archivo(ruta_metadata),
+        'articulos': len(articulos)
+    }, ruta_embeddings, ruta_activa(ARCHIVO_ORACIONES, manifiesto))
+    print(f"✅ {len(oraciones)} oraciones de {len(articulos)} artículos en {time.perf_counter() - inicio:.1f} s "
+          f"→ {ruta_embeddings}")
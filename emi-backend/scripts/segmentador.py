@@ -0,0 +1,26 @@
+import re
+from typing import Iterator, Pattern, Tuple
+
+# Encabezado de artículo en el texto original ("Artículo 12:", "ARTICULO 3 "). Solo al inicio de
+# una línea: las referencias dentro del texto ("inciso c del Artículo 27°") no abren un artículo.
+PATRON_ARTICULO = re.compile(r'^[ \t]*(art[íi]culo\s*\d+)[:\s]*', re.IGNORECASE | re.MULTILINE)
+
+
+def segmentar_articulos(texto: str, patron: Pattern = PATRON_ARTICULO) -> Iterator[Tuple[str, str]]:
+    """
+    Recorre el texto una sola vez con finditer: cada encabezado marca el fin del artículo
+    anterior, así el costo es lineal sin importar cuántos encabezados haya. Genera
+    (encabezado, cuerpo) en orden; el texto previo al primer encabezado se descarta.
+    Si el patrón tiene un grupo, el encabezado es ese grupo; si no, toda la coincidencia.
+    """
+    anterior = None
+    for encabezado in patron.finditer(texto):
+        if anterior is not None:
+            yield _titulo(anterior, patron), texto[anterior.end():encabezado.start()]
+        anterior = encabezado
+    if anterior is not None:
+        yield _titulo(anterior, patron), texto[anterior.end():]
+
+
+def _titulo(encabezado, patron: Pattern) -> str:
+    return encabezado.group(1) if patron.groups else encabezado.group(0)
@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Permite importar el paquete scripts al ejecutar este archivo directamente
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+# Servidor HTTP local que imita POST /v1/chat/completions de OpenAI (con y sin streaming).
+# Su comportamiento (latencia, códigos de error) se cambia en caliente para probar el
+# transporte de scripts/cliente_llm.py sin red ni clave:
+#   python scripts/servidor_llm_simulado.py --puerto 8089 --latencia 2
+#   OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=prueba python app.py
+#   python scripts/servidor_llm_simulado.py --escenarios
+
+
+class ServidorLLMSimulado(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, puerto: int = 0):
+        super().__init__(("127.0.0.1", puerto), ManejadorChat)
+        self.latencia_s = 0.0
+        # Códigos que se devuelven en orden, uno por petición; vacío = 200
+        self.codigos = []
+        self.codigo_fijo = None
+        self.peticiones = 0
+        self.en_curso = 0
+        self.max_en_curso = 0
+        self.conexiones = set()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def configurar(self, latencia_s: float = 0.0, codigos=(), codigo_fijo: int = None):
+        self.latencia_s, self.codigos, self.codigo_fijo = latencia_s, list(codigos), codigo_fijo
+
+    def reiniciar_contadores(self):
+        # Espera a que terminen las peticiones abandonadas por el cliente (p. ej. por plazo)
+        limite = time.monotonic() + 10
+        while self.en_curso and time.monotonic() < limite:
+            time.sleep(0.05)
+        self.peticiones, self.max_en_curso, self.conexiones = 0, 0, set()
+
+    def iniciar(self) -> 'ServidorLLMSimulado':
+        threading.Thread(target=self.serve_forever, name="servidor_llm_simulado", daemon=True).start()
+        return self
+
+
+class ManejadorChat(BaseHTTPRequestHandler):
+    # HTTP/1.1: el cliente puede reutilizar la conexión (pool)
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        servidor = self.server
+        cuerpo = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        with servidor._lock:
+            servidor.peticiones += 1
+            servidor.en_curso += 1
+            servidor.max_en_curso = max(servidor.max_en_curso, servidor.en_curso)
+            servidor.conexiones.add(self.client_address)
+            codigo = servidor.codigos.pop(0) if servidor.codigos else (servidor.codigo_fijo or 200)
+        time.sleep(servidor.latencia_s)
+        # Termina antes de responder: el cliente puede enviar otra petición apenas recibe esta
+        with servidor._lock:
+            servidor.en_curso -= 1
+        try:
+            if codigo != 200:
+                self._responder(codigo, {'error': {'message': f'error simulado {codigo}', 'type': 'server_error'}})
+            elif cuerpo.get('stream'):
+                self._responder_stream(cuerpo)
+            else:
+                self._responder(200, {
+                    'id': 'chatcmpl-simulado', 'object': 'chat.completion', 'created': int(time.time()),
+                    'model': cuerpo.get('model', 'simulado'),
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': respuesta_simulada(cuerpo)}}],
+                    'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2}
+                })
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _responder(self, codigo, datos):
+        contenido = json.dumps(datos).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(contenido)))
+        self.end_headers()
+        self.wfile.write(contenido)
+
+    def _responder_stream(self, cuerpo):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for palabra in respuesta_simulada(cuerpo).split(' '):
+            evento = {'id': 'chatcmpl-simulado', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                      'model': cuerpo.get('model', 'simulado'),
+                      'choices': [{'index': 0, 'delta': {'content': palabra + ' '}, 'finish_reason': None}]}
+            self._escribir_fragmento(f"data: {json.dumps(evento)}\n\n")
+        self._escribir_fragmento("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _escribir_fragmento(self, texto):
+        datos = texto.encode('utf-8')
+        self.wfile.write(f"{len(datos):x}\r\n".encode() + datos + b"\r\n")
+        self.wfile.flush()
+
+
+def respuesta_simulada(cuerpo) -> str:
+    pregunta = next((m['content'] for m in reversed(cuerpo.get('messages', [])) if m.get('role') == 'user'), '')
+    return f"Respuesta simulada a: {pregunta}"
+
+
+def ejecutar_escenarios():
+    from scripts.cliente_llm import TransporteLLM, Disyuntor, LLMNoDisponible
+
+    servidor = ServidorLLMSimulado().iniciar()
+    mensajes = [{'role': 'user', 'content': '¿Qué dice el artículo 19?'}]
+
+    def nuevo_transporte(**opciones):
+        opciones.setdefault('disyuntor', Disyuntor(umbral_fallos=3, enfriamiento_s=1.0))
+        return TransporteLLM(api_key="prueba", base_url=servidor.url, **opciones)
+
+    def medir(transporte, n=1, hilos=1):
+        def llamar(_):
+            inicio = time.perf_counter()
+            try:
+                transporte.completar(mensajes, model="simulado")
+                return "ok", time.perf_counter() - inicio
+            except Exception as e:
+                return type(e).__name__, time.perf_counter() - inicio
+        with ThreadPoolExecutor(hilos) as ejecutor:
+            return list(ejecutor.map(llamar, range(n)))
+
+    def informar(nombre, resultados, extra=""):
+        tipos = sorted({r for r, _ in resultados})
+        print(f"{nombre:32} {','.join(tipos):28} {max(s for _, s in resultados) * 1000:8.0f} ms {extra}")
+
+    print(f"\n{'escenario':32} {'resultado':28} {'máx':>11}")
+
+    transporte = nuevo_transporte()
+    servidor.configurar()
+    servidor.reiniciar_contadores()
+    informar("normal (20 llamadas)", medir(transporte, 20),
+             f"{len(servidor.conexiones)} conexión(es) para {servidor.peticiones} peticiones")
+
+    servidor.configurar(codigos=[500, 503])
+    servidor.reiniciar_contadores()
+    informar("2 errores 5xx y luego 200", medir(transporte), f"{servidor.peticiones} intentos")
+
+    servidor.configurar(latencia_s=3)
+    informar("servidor lento, plazo 1 s", medir(nuevo_transporte(plazo_s=1.0)))
+    servidor.reiniciar_contadores()
+
+    transporte = nuevo_transporte(reintentos=0)
+    servidor.configurar(codigo_fijo=500)
+    informar("caído: abre el disyuntor", medir(transporte, 3), str(transporte.disyuntor.estadisticas()))
+    servidor.reiniciar_contadores()
+    informar("disyuntor abierto: falla rápido", medir(transporte, 5), f"{servidor.peticiones} peticiones al servidor")
+    servidor.configurar()
+    time.sleep(1.1)
+    informar("recuperado tras el enfriamiento", medir(transporte, 3), transporte.disyuntor.estado)
+
+    transporte = nuevo_transporte(max_en_curso=4)
+    servidor.configurar(latencia_s=0.2)
+    servidor.reiniciar_contadores()
+    informar("20 hilos, máx. 4 en curso", medir(transporte, 20, hilos=20),
+             f"el servidor vio {servidor.max_en_curso} a la vez")
+
+    servidor.configurar()
+    transporte = nuevo_transporte()
+
+    async def stream():
+        return "".join([evento.choices[0].delta.content async for evento in
+                        transporte.completar_stream(mensajes, model="simulado") if evento.choices])
+    print(f"{'streaming':32} {asyncio.run(stream()).strip()!r}")
+    servidor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita la API de chat de OpenAI")
+    parser.add_argument("--puerto", type=int, default=8089)
+    parser.add_argument("--latencia", type=float, default=0.0, help="segundos de espera por petición")
+    parser.add_argument("--codigo", type=int, help="responde siempre con este código HTTP (p. ej. 500)")
+    parser.add_argument("--escenarios", action="store_true", help="prueba el transporte contra el servidor y termina")
+    args = parser.parse_args()
+
+    if args.escenarios:
+        ejecutar_escenarios()
+    else:
+        servidor = ServidorLLMSimulado(args.puerto)
+        servidor.configurar(args.latencia, codigo_fijo=args.codigo)
+        print(f"🧪 Servidor simulado en {servidor.url} (OPENAI_BASE_URL)")
+        servidor.serve_forever()
@@ -0,0 +1,57 @@
+import difflib
+import numpy as np
+from typing import List, Sequence, Tuple
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+class MotorSimilitudPreguntas:
+    """
+    Matriz dispersa de n-gramas de caracteres de todas las preguntas del dataset.
+    Una consulta se puntúa contra todo el dataset con un único producto matriz-vector
+    disperso en lugar de comparar cadena por cadena con difflib.
+    La similitud coseno no ordena igual que SequenceMatcher.ratio() (las preguntas del dataset
+    son plantillas que solo cambian el número de artículo): sirve para preseleccionar
+    candidatos, y ratios() puntúa esos pocos con difflib como antes.
+    """
+
+    def __init__(self, preguntas: List[str], ngramas: Tuple[int, int] = (3, 5)):
+        self.total = len(preguntas)
+        self.preguntas = preguntas
+        # Frecuencias sin IDF: la preselección que más coincide con el orden de difflib
+        # (scripts/benchmark_coincidencias.py)
+        self.vectorizador = TfidfVectorizer(
+            analyzer='char',
+            ngram_range=ngramas,
+            use_idf=False,
+            lowercase=False,
+            dtype=np.float32
+        )
+        if self.total:
+            # Las filas quedan normalizadas (L2), así que el producto punto es la similitud coseno
+            self.matriz = self.vectorizador.fit_transform(preguntas).tocsr()
+        else:
+            self.matriz = None
+
+    def similitudes(self, *consultas: str) -> np.ndarray:
+        """
+        Devuelve una matriz (len(consultas), total) con la similitud coseno de cada consulta
+        contra cada pregunta del dataset.
+        """
+        if self.matriz is None:
+            return np.zeros((len(consultas), 0), dtype=np.float32)
+        vectores = self.vectorizador.transform(consultas)
+        return (vectores @ self.matriz.T).toarray()
+
+    def ratios(self, consulta: str, indices: Sequence[int]) -> np.ndarray:
+        """SequenceMatcher.ratio() de la consulta contra las preguntas `indices`."""
+        return np.array([difflib.SequenceMatcher(None, consulta, self.preguntas[i]).ratio() for i in indices],
+                        dtype=np.float32)
+
+
+def mejores_indices(puntajes: np.ndarray, k: int) -> np.ndarray:
+    """Índices de los k puntajes más altos, ordenados de mayor a menor (argpartition + sort de k)."""
+    if puntajes.size == 0:
+        return np.array([], dtype=np.int64)
+    k = min(k, puntajes.size)
+    candidatos = np.argpartition(-puntajes, k - 1)[:k]
+    return candidatos[np.argsort(-puntajes[candidatos], kind='stable')]
@@ -1,10 +1,12 @@
+import os
+import json
 import pickle
-from sklearn.feature_extraction.text import TfidfVectorizer
+import argparse
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer, TfidfTransformer
+from sklearn.pipeline import make_pipeline
 from pymongo import MongoClient
-from nltk.corpus import stopwords
-import nltk
 from dotenv import load_dotenv
-import os
 
 # Cargar variables de entorno
 load_dotenv()
@@ -12,45 +14,165 @@ load_dotenv()
 MONGODB_URI = os.getenv("MONGODB_URI")
 MONGODB_DB = os.getenv("MONGODB_DB")
 MONGODB_COLLECTION = os.getenv("MONGODB_COLLECTION")
+VECTORIZADOR_MODO = os.getenv("VECTORIZADOR_MODO", "tfidf")
+VECTORIZADOR_LOTE = int(os.getenv("VECTORIZADOR_LOTE", "500"))
 
 # Base del proyecto
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
+RUTA_STOPWORDS = os.path.join(DATA_DIR, 'stopwords_es.json')
+RUTA_VECTORIZADOR = os.path.join(DATA_DIR, 'tfidf_vectorizer.pkl')
+RUTA_MATRIZ = os.path.join(DATA_DIR, 'tfidf_matrix.npz')
+# Solo modo hashing: conteos crudos e _id de cada fila, para anexar secciones sin reajustar
+RUTA_CONTEOS = os.path.join(DATA_DIR, 'tfidf_conteos.npz')
+RUTA_IDS = os.path.join(DATA_DIR, 'tfidf_ids.json')
 
 # Crear la carpeta data si no existe
 os.makedirs(DATA_DIR, exist_ok=True)
 
-nltk.download('stopwords')
-spanish_stopwords = stopwords.words('spanish')
 
-# Conexión a MongoDB
-client = MongoClient(MONGODB_URI)
-db = client[MONGODB_DB]
-coleccion = db[MONGODB_COLLECTION]
-secciones = list(coleccion.find({}))
+def cargar_stopwords():
+    """Lista de stopwords en español; se descarga con nltk solo la primera vez y queda en data/."""
+    if os.path.exists(RUTA_STOPWORDS):
+        with open(RUTA_STOPWORDS, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    import nltk
+    from nltk.corpus import stopwords
+    nltk.download('stopwords', quiet=True)
+    palabras = stopwords.words('spanish')
+    with open(RUTA_STOPWORDS, 'w', encoding='utf-8') as f:
+        json.dump(palabras, f, ensure_ascii=False, indent=0)
+    return palabras
+
+
+def iterar_secciones(coleccion, tamano_lote, filtro=None):
+    """Recorre el cursor por lotes trayendo solo titulo/contenido; devuelve (_id, documento)."""
+    cursor = coleccion.find(filtro or {}, {'titulo': 1, 'contenido': 1}).batch_size(tamano_lote)
+    for s in cursor:
+        if s.get('contenido'):
+            yield s['_id'], f"{s.get('titulo', '')} {s['contenido']}"
+
+
+def guardar_pickle(objeto, ruta):
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'wb') as f:
+        pickle.dump(objeto, f)
+    os.replace(temporal, ruta)
+
+
+def guardar_npz(matriz, ruta):
+    # save_npz agrega la extensión si falta; el temporal ya la lleva para poder reemplazarlo
+    temporal = f"{ruta[:-4]}.tmp.npz"
+    sp.save_npz(temporal, matriz.tocsr(), compressed=True)
+    os.replace(temporal, ruta)
+
+
+def vectorizar_tfidf(coleccion, stopwords, tamano_lote):
+    """Ajuste completo del TfidfVectorizer; los documentos se consumen en streaming desde el cursor."""
+    vectorizer = TfidfVectorizer(
+        stop_words=stopwords,
+        ngram_range=(1, 3),
+        max_df=0.9,
+        min_df=2,
+        lowercase=True
+    )
+    total = [0]
+
+    def documentos():
+        for _, documento in iterar_secciones(coleccion, tamano_lote):
+            total[0] += 1
+            yield documento
+
+    tfidf_matrix = vectorizer.fit_transform(documentos())
+    if not total[0]:
+        raise ValueError("❌ No hay documentos en la base de datos para vectorizar.")
+    return vectorizer, tfidf_matrix
+
+
+def crear_hasher(stopwords):
+    # Sin vocabulario que ajustar: la misma sección siempre cae en las mismas columnas
+    return HashingVectorizer(
+        stop_words=stopwords,
+        ngram_range=(1, 3),
+        n_features=2 ** 20,
+        alternate_sign=False,
+        norm=None,
+        lowercase=True
+    )
+
+
+def vectorizar_hashing(coleccion, stopwords, tamano_lote, incremental):
+    """
+    Conteos con HashingVectorizer por lotes. En modo incremental se descartan las filas de
+    las secciones que ya no están en la colección (el _id es el hash del contenido: una sección
+    editada deja de existir con su _id anterior), solo se vectorizan las secciones cuyo _id no
+    está en tfidf_ids.json y se anexan a los conteos guardados; luego se recalcula el IDF
+    (barato, es una pasada sobre la matriz dispersa).
+    """
+    hasher = crear_hasher(stopwords)
+    conteos, ids = None, []
+    if incremental and os.path.exists(RUTA_CONTEOS) and os.path.exists(RUTA_IDS):
+        conteos = sp.load_npz(RUTA_CONTEOS)
+        with open(RUTA_IDS, 'r', encoding='utf-8') as f:
+            ids = json.load(f)
+        vigentes = {str(id_seccion) for id_seccion in coleccion.distinct('_id')}
+        conservadas = [fila for fila, id_seccion in enumerate(ids) if id_seccion in vigentes]
+        if len(conservadas) < len(ids):
+            print(f"🗑️ {len(ids) - len(conservadas)} secciones ya no están en la colección; se quitan sus filas")
+            conteos = conteos[conservadas]
+            ids = [ids[fila] for fila in conservadas]
+    filtro = {'_id': {'$nin': ids}} if ids else None
+
+    bloques = [conteos] if conteos is not None else []
+    lote_ids, lote_docs = [], []
+    nuevos = 0
+    for id_seccion, documento in iterar_secciones(coleccion, tamano_lote, filtro):
+        lote_ids.append(str(id_seccion))
+        lote_docs.append(documento)
+        if len(lote_docs) >= tamano_lote:
+            bloques.append(hasher.transform(lote_docs))
+            ids.extend(lote_ids)
+            nuevos += len(lote_docs)
+            lote_ids, lote_docs = [], []
+    if lote_docs:
+        bloques.append(hasher.transform(lote_docs))
+        ids.extend(lote_ids)
+        nuevos += len(lote_docs)
+
+    if not ids:
+        raise ValueError("❌ No hay documentos en la base de datos para vectorizar.")
+    print(f"🧮 {nuevos} secciones nuevas vectorizadas ({len(ids)} en total)")
+
+    conteos = sp.vstack(bloques).tocsr()
+    transformador = TfidfTransformer().fit(conteos)
+    guardar_npz(conteos, RUTA_CONTEOS)
+    with open(RUTA_IDS, 'w', encoding='utf-8') as f:
+        json.dump(ids, f)
+    # El pipeline expone transform() igual que TfidfVectorizer, que es lo que usa api_llm
+    return make_pipeline(hasher, transformador), transformador.transform(conteos)
 
-# Construir documentos
-documentos = [f"{s['titulo']} {s['contenido']}" for s in secciones if s.get('contenido')]
 
-if not documentos:
-    raise ValueError("❌ No hay documentos en la base de datos para vectorizar.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vectorización TF-IDF de las secciones en MongoDB")
+    parser.add_argument("--modo", choices=["tfidf", "hashing"], default=VECTORIZADOR_MODO)
+    parser.add_argument("--lote", type=int, default=VECTORIZADOR_LOTE, help="documentos por lote del cursor")
+    parser.add_argument("--incremental", action="store_true",
+                        help="(hashing) anexa solo las secciones nuevas a la matriz existente")
+    args = parser.parse_args()
 
-# Vectorizador
-vectorizer = TfidfVectorizer(
-    stop_words=spanish_stopwords,
-    ngram_range=(1, 3),
-    max_df=0.9,
-    min_df=2,
-    lowercase=True
-)
+    spanish_stopwords = cargar_stopwords()
 
-tfidf_matrix = vectorizer.fit_transform(documentos)
+    # Conexión a MongoDB
+    client = MongoClient(MONGODB_URI)
+    coleccion = client[MONGODB_DB][MONGODB_COLLECTION]
 
-# Guardar los archivos en data/
-with open(os.path.join(DATA_DIR, 'tfidf_vectorizer.pkl'), 'wb') as f:
-    pickle.dump(vectorizer, f)
+    if args.modo == "hashing":
+        vectorizer, tfidf_matrix = vectorizar_hashing(coleccion, spanish_stopwords, args.lote, args.incremental)
+    else:
+        vectorizer, tfidf_matrix = vectorizar_tfidf(coleccion, spanish_stopwords, args.lote)
 
-with open(os.path.join(DATA_DIR, 'tfidf_matrix.pkl'), 'wb') as f:
-    pickle.dump(tfidf_matrix, f)
+    # Guardar los archivos en data/
+    guardar_pickle(vectorizer, RUTA_VECTORIZADOR)
+    guardar_npz(tfidf_matrix, RUTA_MATRIZ)
 
-print("✅ Vectorización completada y guardada en carpeta 'data'.")
+    print(f"✅ Vectorización completada y guardada en carpeta 'data' ({tfidf_matrix.shape[0]} x {tfidf_matrix.shape[1]}).")
@@ -0,0 +1,91 @@
+import os
+import sys
+import pickle
+import threading
+
+import numpy as np
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.cache_respuestas import CacheSemantica
+
+
+def vector(*componentes):
+    return np.asarray(componentes, dtype=np.float32)
+
+
+def test_acierto_exacto_requiere_mismos_articulos():
+    cache = CacheSemantica()
+    cache.guardar("que es el rac", [1, 2], vector(1, 0), "respuesta")
+
+    assert cache.buscar("que es el rac", [1, 2]) == "respuesta"
+    assert cache.buscar("que es el rac", [3, 4]) is None
+
+
+def test_acierto_semantico_exige_solapamiento_de_articulos():
+    cache = CacheSemantica(umbral=0.9, solapamiento=0.5)
+    cache.guardar("articulo 12", [12, 40], vector(1, 0), "sobre el 12")
+    cache.guardar("articulo 13", [13, 41], vector(0.99, 0.14), "sobre el 13")
+
+    # Muy parecida a las dos, pero solo comparte artículos con la segunda (no la más similar)
+    assert cache.buscar("el articulo 13", [13, 41], vector(1, 0.01)) == "sobre el 13"
+    assert cache.buscar("otra", [7, 8], vector(1, 0)) is None
+    assert cache.estadisticas()['aciertos_semanticos'] == 1
+
+
+def test_guardado_concurrente_no_falla(tmp_path):
+    ruta = tmp_path / 'cache.pkl'
+    cache = CacheSemantica(ruta=str(ruta), guardar_cada=1)
+    errores = []
+
+    def responder(hilo):
+        try:
+            for i in range(20):
+                cache.guardar(f"pregunta {hilo} {i}", [hilo], vector(hilo + 1, i), "respuesta")
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=responder, args=(h,)) for h in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert not errores
+    assert [p.name for p in tmp_path.iterdir()] == ['cache.pkl']
+    assert len(CacheSemantica(ruta=str(ruta)).cache) == 160
+
+
+def test_error_al_persistir_no_llega_a_la_peticion(tmp_path):
+    # La ruta está bajo un archivo: no se puede crear el directorio
+    bloqueo = tmp_path / 'archivo'
+    bloqueo.write_text('')
+    cache = CacheSemantica(ruta=str(bloqueo / 'cache.pkl'), guardar_cada=1)
+
+    cache.guardar("pregunta", [1], vector(1, 0), "respuesta")
+
+    assert cache.buscar("pregunta", [1]) == "respuesta"
+
+
+def test_cache_de_otra_version_del_indice_se_descarta(tmp_path):
+    ruta = str(tmp_path / 'cache.pkl')
+    anterior = CacheSemantica(ruta=ruta, version_indice='v1')
+    anterior.guardar("pregunta", [1], vector(1, 0), "respuesta")
+    anterior.guardar_en_disco()
+
+    assert CacheSemantica(ruta=ruta, version_indice='v1').buscar("pregunta", [1]) == "respuesta"
+
+    nueva = CacheSemantica(ruta=ruta, version_indice='v2')
+    assert nueva.buscar("pregunta", [1]) is None
+    assert not os.path.exists(ruta)
+
+
+def test_archivo_sin_version_se_descarta_con_indice_versionado(tmp_path):
+    ruta = tmp_path / 'cache.pkl'
+    with open(ruta, 'wb') as f:
+        pickle.dump([], f)
+
+    CacheSemantica(ruta=str(ruta), version_indice='v1')
+
+    assert not ruta.exists()
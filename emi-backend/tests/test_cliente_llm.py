@@ -0,0 +1,137 @@
+import gc
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from openai import InternalServerError
+
+from scripts import bucle_async, cliente_llm
+from scripts.cliente_llm import TransporteLLM, Disyuntor, LLMNoDisponible
+from scripts.servidor_llm_simulado import ServidorLLMSimulado
+
+MENSAJES = [{'role': 'user', 'content': '¿Qué dice el artículo 19 sobre las inasistencias justificadas?'}]
+
+
+@pytest.fixture(scope='module')
+def servidor():
+    servidor = ServidorLLMSimulado().iniciar()
+    yield servidor
+    servidor.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def servidor_normal(servidor, monkeypatch):
+    servidor.configurar()
+    servidor.reiniciar_contadores()
+    # Esperas de reintento cortas para que las pruebas no dependan del backoff real
+    monkeypatch.setattr(cliente_llm, 'ESPERA_BASE_S', 0.01)
+    monkeypatch.setattr(cliente_llm, 'ESPERA_MAX_S', 0.05)
+
+
+def nuevo_transporte(servidor, **opciones):
+    opciones.setdefault('disyuntor', Disyuntor(umbral_fallos=100, enfriamiento_s=1.0))
+    return TransporteLLM(api_key="prueba", base_url=servidor.url, **opciones)
+
+
+def llamar(transporte):
+    try:
+        transporte.completar(MENSAJES, model="simulado")
+        return "ok"
+    except Exception as e:
+        return type(e).__name__
+
+
+def test_reintenta_errores_transitorios_y_responde(servidor):
+    transporte = nuevo_transporte(servidor, reintentos=2)
+    servidor.configurar(codigos=[500, 503])
+
+    respuesta = transporte.completar(MENSAJES, model="simulado")
+
+    assert respuesta.choices[0].message.content.startswith("Respuesta simulada")
+    assert servidor.peticiones == 3
+    estadisticas = transporte.estadisticas()
+    assert (estadisticas['llamadas'], estadisticas['reintentos'], estadisticas['fallos']) == (1, 2, 0)
+
+
+def test_plazo_total_agotado_entre_reintentos(servidor):
+    transporte = nuevo_transporte(servidor, plazo_s=1.0, reintentos=10)
+    servidor.configurar(latencia_s=0.4, codigo_fijo=500)
+
+    inicio = time.monotonic()
+    with pytest.raises(LLMNoDisponible):
+        transporte.completar(MENSAJES, model="simulado")
+
+    assert time.monotonic() - inicio < 1.5
+    assert servidor.peticiones >= 2
+    assert transporte.estadisticas()['fallos'] == 1
+
+
+def test_disyuntor_abre_rechaza_prueba_semiabierta_y_cierra(servidor):
+    disyuntor = Disyuntor(umbral_fallos=2, enfriamiento_s=0.3)
+    transporte = nuevo_transporte(servidor, reintentos=0, disyuntor=disyuntor)
+
+    servidor.configurar(codigo_fijo=500)
+    for _ in range(2):
+        with pytest.raises(InternalServerError):
+            transporte.completar(MENSAJES, model="simulado")
+    assert disyuntor.estado == Disyuntor.ABIERTO
+
+    # Abierto: falla sin llegar al servidor
+    with pytest.raises(LLMNoDisponible):
+        transporte.completar(MENSAJES, model="simulado")
+    assert servidor.peticiones == 2
+
+    # Tras el enfriamiento pasa una sola llamada de prueba; la otra se rechaza mientras tanto
+    servidor.configurar(latencia_s=0.3)
+    time.sleep(0.35)
+    with ThreadPoolExecutor(2) as ejecutor:
+        resultados = sorted(ejecutor.map(lambda _: llamar(transporte), range(2)))
+    assert resultados == ["LLMNoDisponible", "ok"]
+    assert servidor.peticiones == 3
+    assert disyuntor.estado == Disyuntor.CERRADO
+    assert disyuntor.estadisticas()['aperturas'] == 1
+
+
+def test_limite_de_llamadas_en_curso(servidor):
+    transporte = nuevo_transporte(servidor, max_en_curso=2)
+    servidor.configurar(latencia_s=0.1)
+
+    with ThreadPoolExecutor(8) as ejecutor:
+        resultados = list(ejecutor.map(lambda _: llamar(transporte), range(8)))
+
+    assert resultados == ["ok"] * 8
+    assert servidor.max_en_curso <= 2
+    assert transporte.estadisticas()['en_curso'] == 0
+
+
+def test_stream_abandonado_devuelve_la_conexion(servidor):
+    # Un solo lugar en el pool: si el stream abandonado no se cierra, la siguiente llamada
+    # espera una conexión hasta agotar el plazo
+    transporte = nuevo_transporte(servidor, max_en_curso=1, plazo_s=2.0)
+
+    def fragmentos(fallar):
+        async def consumir():
+            async for evento in transporte.completar_stream(MENSAJES, model="simulado"):
+                if evento.choices:
+                    yield evento.choices[0].delta.content
+                if fallar:
+                    raise ValueError("el consumidor abandona el stream")
+        return bucle_async.iterar(consumir())
+
+    gc.disable()
+    try:
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                list(fragmentos(fallar=True))
+        texto = "".join(fragmentos(fallar=False))
+    finally:
+        gc.enable()
+
+    assert texto.strip().startswith("Respuesta simulada")
+    assert transporte.estadisticas()['en_curso'] == 0
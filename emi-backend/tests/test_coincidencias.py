@@ -0,0 +1,67 @@
+import os
+import re
+import sys
+import difflib
+
+import numpy as np
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+import modelo_consulta
+from modelo_consulta import ModeloConsultaEMI, quitar_acentos
+from scripts.dataset_qa import DatasetQA
+from scripts.similitud_preguntas import mejores_indices
+
+PLANTILLAS = [
+    "¿Cuál es el propósito del artículo {n} del {rac}?",
+    "Resume los puntos clave del artículo {n} del {rac}.",
+    "¿Cómo se aplica lo establecido en el artículo {n} del {rac}?",
+]
+
+
+def entradas_plantilla():
+    entradas = []
+    for rac in ("RAC-01", "RAC-02"):
+        for n in range(1, 31):
+            respuesta = f"Según el artículo {n} del {rac}, contenido del artículo {n}."
+            for plantilla in PLANTILLAS:
+                entradas.append({'pregunta': plantilla.format(n=n, rac=rac),
+                                 'contexto': f"Contenido del artículo {n}.", 'respuesta': respuesta})
+    return entradas
+
+
+def buscar_difflib(entradas, consulta):
+    """Puntaje anterior de buscar_coincidencias: difflib contra cada pregunta."""
+    consulta_limpia = quitar_acentos(consulta.lower().strip())
+    consulta_normalizada = re.sub(r'[^\w\s]', '', consulta_limpia)
+    racs = [re.match(r'rac[- :]?0?(\d+)(?!\d)', palabra) for palabra in consulta_normalizada.split()]
+    rac = next((r.group(1) for r in racs if r), None)
+    palabras_clave = sum(1 for palabra in ['articulo', 'art', 'art.'] if palabra in consulta_limpia)
+    coincidencias = []
+    for i, entrada in enumerate(entradas):
+        pregunta = quitar_acentos(entrada['pregunta'].lower())
+        texto = quitar_acentos((entrada['contexto'] + " " + entrada['respuesta']).lower())
+        contexto_rac = 1 if rac and rac in re.findall(r'\brac[- :]?0?(\d+)(?!\d)', texto) else 0
+        relevancia = (difflib.SequenceMatcher(None, consulta_limpia, pregunta).ratio() * 0.4 +
+                      palabras_clave * 0.2 + contexto_rac * 0.3 +
+                      difflib.SequenceMatcher(None, consulta_normalizada, pregunta).ratio() * 0.1)
+        if relevancia > 0.3:
+            coincidencias.append((contexto_rac, relevancia, i))
+    return [entradas[i]['pregunta'] for _, _, i in sorted(coincidencias, reverse=True)[:5]]
+
+
+def test_mismo_orden_que_difflib(monkeypatch):
+    monkeypatch.setattr(modelo_consulta, 'CANDIDATOS_COINCIDENCIAS', 60)
+    entradas = entradas_plantilla()
+    modelo = ModeloConsultaEMI.__new__(ModeloConsultaEMI)
+    modelo._publicar_dataset(DatasetQA.desde_entradas(entradas), None)
+
+    for consulta in ["cual es el proposito del rac 2", "resume el articulo 12 del rac-01",
+                     "como se aplica el articulo 7", "propósito del artículo 30 del RAC-02"]:
+        obtenidas = [c['datos']['pregunta'] for c in modelo.buscar_coincidencias(consulta)]
+        assert obtenidas == buscar_difflib(entradas, consulta)
+
+
+def test_mejores_indices_ordena_de_mayor_a_menor():
+    assert list(mejores_indices(np.array([0.1, 0.9, 0.5, 0.7]), 3)) == [1, 3, 2]
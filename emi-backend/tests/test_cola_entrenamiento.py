@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+import fcntl
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts import cola_entrenamiento
+from scripts.cola_entrenamiento import ColaEntrenamiento, PENDIENTE, EN_CURSO, COMPLETADO, FALLIDO
+
+DATOS = [{'pregunta': '¿Qué dice el artículo 1?', 'contexto': 'Artículo 1', 'respuesta': 'Objeto.'}]
+
+
+@pytest.fixture
+def cola(tmp_path):
+    return ColaEntrenamiento(str(tmp_path / 'entrenamiento.sqlite3'))
+
+
+def test_ciclo_de_vida_de_un_trabajo(cola):
+    trabajo_id = cola.encolar(DATOS, epocas=3)
+    assert cola.estado(trabajo_id)['estado'] == PENDIENTE
+    assert cola.estado(trabajo_id)['ejemplos'] == 1
+
+    trabajo = cola.tomar_siguiente()
+    assert (trabajo['id'], trabajo['epocas'], trabajo['datos']) == (trabajo_id, 3, DATOS)
+    assert cola.estado(trabajo_id)['estado'] == EN_CURSO
+
+    cola.actualizar(trabajo_id, 1.7, "época 1/3")
+    assert cola.estado(trabajo_id)['progreso'] == 1.0
+    cola.actualizar(trabajo_id, 0.5)
+    assert (cola.estado(trabajo_id)['progreso'], cola.estado(trabajo_id)['mensaje']) == (0.5, "época 1/3")
+
+    cola.finalizar(trabajo_id, True, "listo")
+    estado = cola.estado(trabajo_id)
+    assert (estado['estado'], estado['progreso'], estado['mensaje']) == (COMPLETADO, 1.0, "listo")
+    assert cola.tomar_siguiente() is None
+
+
+def test_trabajos_en_orden_de_llegada_y_una_sola_vez(cola):
+    ids = []
+    for _ in range(10):
+        ids.append(cola.encolar(DATOS))
+        time.sleep(0.001)
+
+    with ThreadPoolExecutor(4) as ejecutor:
+        tomados = list(ejecutor.map(lambda _: cola.tomar_siguiente(), range(12)))
+
+    tomados = [t['id'] for t in tomados if t]
+    assert sorted(tomados) == sorted(ids)
+    assert len(set(tomados)) == 10
+
+
+def test_trabajo_en_curso_de_un_proceso_muerto_queda_fallido(cola):
+    trabajo_id = cola.encolar(DATOS)
+    cola.tomar_siguiente()
+
+    cola.marcar_interrumpidos()
+
+    estado = cola.estado(trabajo_id)
+    assert estado['estado'] == FALLIDO
+    assert estado['mensaje'].startswith("interrumpido")
+
+
+@pytest.fixture
+def trabajador(tmp_path, monkeypatch):
+    """Bloqueo temporal y un ModeloConsultaEMI falso que registra lo que entrena."""
+    entrenados = []
+
+    class ModeloFalso:
+        def fine_tuning_incremental(self, datos, epocas, progreso):
+            if not datos:
+                raise ValueError("sin datos")
+            progreso(0.5, "entrenando")
+            entrenados.append((datos, epocas))
+
+        def recargar_dataset_si_cambio(self):
+            pass
+
+    monkeypatch.setattr(cola_entrenamiento, 'RUTA_BLOQUEO', str(tmp_path / 'entrenamiento.lock'))
+    monkeypatch.setattr(cola_entrenamiento.os, 'nice', lambda incremento: 0)
+    monkeypatch.setitem(sys.modules, 'modelo_consulta', types.SimpleNamespace(ModeloConsultaEMI=ModeloFalso))
+    return entrenados
+
+
+def test_trabajador_procesa_la_cola_y_registra_los_fallos(cola, trabajador):
+    correcto = cola.encolar(DATOS, epocas=2)
+    fallido = cola.encolar([])
+
+    cola_entrenamiento.bucle_trabajador(cola.ruta, una_vez=True)
+
+    assert trabajador == [(DATOS, 2)]
+    assert cola.estado(correcto)['estado'] == COMPLETADO
+    assert cola.estado(fallido)['estado'] == FALLIDO
+    assert cola.estado(fallido)['mensaje'] == "ValueError: sin datos"
+
+
+def test_un_solo_trabajador_a_la_vez(cola, trabajador):
+    trabajo_id = cola.encolar(DATOS)
+
+    with open(cola_entrenamiento.RUTA_BLOQUEO, 'w') as bloqueo:
+        fcntl.flock(bloqueo, fcntl.LOCK_EX)
+        cola_entrenamiento.bucle_trabajador(cola.ruta, una_vez=True)
+
+    assert trabajador == []
+    assert cola.estado(trabajo_id)['estado'] == PENDIENTE
@@ -0,0 +1,93 @@
+import os
+import sys
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.contexto_llm import armar_contexto, contar_tokens, dividir_pasajes, encabezado_articulo
+
+TEMAS = ["inasistencias justificadas", "evaluación de la asignatura", "becas de estudio",
+         "sanciones disciplinarias", "uso del uniforme", "titulación de grado"]
+
+
+def parrafo(tema, numero):
+    return (f"Párrafo {numero} sobre {tema}: la dirección académica regula {tema} conforme a lo "
+            f"establecido en este reglamento para cada gestión y cada unidad académica {numero}.")
+
+
+def articulo(numero, tema, parrafos=3):
+    return {'reglamento': 'RAC-02', 'articulo': f'Artículo {numero}', 'titulo': tema.capitalize(),
+            'contenido': "\n".join(parrafo(tema, j) for j in range(parrafos))}
+
+
+def test_dividir_pasajes_agrupa_parrafos_hasta_el_maximo():
+    texto = "\n".join(parrafo("becas", j) for j in range(6))
+    maximo = 2 * contar_tokens(parrafo("becas", 0)) + 1
+
+    pasajes = dividir_pasajes(texto, max_tokens=maximo)
+
+    assert "\n".join(pasajes) == texto
+    assert all(contar_tokens(p) <= maximo for p in pasajes)
+    assert len(pasajes) == 3
+
+
+def test_dividir_pasajes_parte_parrafos_largos_en_oraciones():
+    texto = "Primera oración larga del párrafo. Segunda oración; tercera: cuarta."
+
+    pasajes = dividir_pasajes(texto, max_tokens=contar_tokens("Primera oración larga del párrafo.") + 1)
+
+    assert pasajes[0] == "Primera oración larga del párrafo."
+    assert " ".join(pasajes).split() == texto.split()
+
+
+def test_descarta_articulos_casi_duplicados():
+    original = articulo(19, TEMAS[0])
+    copia = dict(original, articulo='Artículo 19 bis')
+
+    resultado = armar_contexto("inasistencias", [original, copia, articulo(20, TEMAS[1])], max_tokens=10000)
+
+    assert resultado['duplicados'] == 1
+    assert encabezado_articulo(original) in resultado['contexto']
+    assert encabezado_articulo(copia) not in resultado['contexto']
+    assert encabezado_articulo(articulo(20, TEMAS[1])) in resultado['contexto']
+
+
+def test_respeta_el_presupuesto_de_tokens():
+    articulos = [articulo(i, tema) for i, tema in enumerate(TEMAS)]
+    completo = armar_contexto("becas", articulos, max_tokens=100000)
+    presupuesto = completo['tokens'] // 3
+
+    resultado = armar_contexto("becas", articulos, max_tokens=presupuesto)
+
+    assert completo['pasajes'] == completo['pasajes_total']
+    assert 0 < resultado['pasajes'] < resultado['pasajes_total']
+    assert resultado['tokens'] <= presupuesto
+    assert resultado['tokens_completo'] == completo['tokens_completo']
+    # Sin vectorizador manda el orden de recuperación: el primer artículo entra entero
+    assert resultado['contexto'].startswith(encabezado_articulo(articulos[0]) + "\n" + articulos[0]['contenido'])
+
+
+def test_primer_pasaje_entra_aunque_exceda_el_presupuesto():
+    resultado = armar_contexto("becas", [articulo(1, TEMAS[2])], max_tokens=1)
+
+    assert resultado['pasajes'] == 1
+    assert resultado['contexto'].startswith(encabezado_articulo(articulo(1, TEMAS[2])))
+
+
+def test_pasajes_relevantes_en_su_orden_original():
+    articulos = [articulo(i, tema, parrafos=8) for i, tema in enumerate(TEMAS)]
+    vectorizador = TfidfVectorizer().fit([a['contenido'] for a in articulos])
+    pregunta = "¿Qué dice sobre los párrafos 7 de sanciones disciplinarias?"
+
+    sin_vectorizador = armar_contexto(pregunta, articulos, max_tokens=400)
+    resultado = armar_contexto(pregunta, articulos, vectorizador=vectorizador, max_tokens=400)
+
+    # El artículo que trata el tema entra por su similitud aunque se haya recuperado cuarto
+    assert encabezado_articulo(articulos[3]) not in sin_vectorizador['contexto']
+    assert encabezado_articulo(articulos[3]) in resultado['contexto']
+    encabezados = [encabezado_articulo(a) for a in articulos if encabezado_articulo(a) in resultado['contexto']]
+    posiciones = [resultado['contexto'].index(e) for e in encabezados]
+    assert posiciones == sorted(posiciones)
+    assert len(encabezados) < len(articulos)
@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import textwrap
+import subprocess
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# transformers, datasets y peft mínimos: registran qué se cargó para comprobar desde qué
+# checkpoint sigue el entrenamiento sin descargar ningún modelo
+LIBRERIAS_FALSAS = {
+    'transformers.py': '''
+        class AutoModelForSeq2SeqLM:
+            @staticmethod
+            def from_pretrained(nombre):
+                return {'base': nombre}
+
+        class AutoTokenizer:
+            pass
+
+        Trainer = TrainingArguments = DataCollatorForSeq2Seq = TrainerCallback = AutoTokenizer
+    ''',
+    'datasets.py': '''
+        class Dataset:
+            pass
+
+        def concatenate_datasets(partes):
+            return partes
+    ''',
+    'peft.py': '''
+        import os
+        import json
+
+        class ModeloLora:
+            def __init__(self, base, origen, entrenable):
+                self.base, self.origen, self.entrenable = base, origen, entrenable
+
+            def save_pretrained(self, directorio):
+                os.makedirs(directorio, exist_ok=True)
+                with open(os.path.join(directorio, 'adapter_config.json'), 'w') as f:
+                    json.dump({'origen': self.origen}, f)
+
+        class LoraConfig:
+            def __init__(self, **opciones):
+                pass
+
+        def get_peft_model(base, config):
+            return ModeloLora(base, 'nuevo', True)
+
+        class PeftModel:
+            @staticmethod
+            def from_pretrained(base, directorio, is_trainable=False):
+                return ModeloLora(base, directorio, is_trainable)
+    ''',
+}
+
+# Un proceso de entrenamiento: carga el modelo, informa desde dónde sigue y publica el adaptador
+PROCESO = '''
+import sys, json
+import modelo_consulta
+modelo_consulta.importar_librerias_entrenamiento()
+modelo, continua = modelo_consulta.cargar_modelo_entrenable("t5-small", sys.argv[1])
+modelo.save_pretrained(sys.argv[1])
+print(json.dumps({"continua": continua, "origen": modelo.origen, "entrenable": modelo.entrenable}))
+'''
+
+
+def ejecutar_proceso(librerias, dir_fine_tuned):
+    entorno = dict(os.environ, PYTHONPATH=os.pathsep.join([str(librerias), BASE_DIR]))
+    salida = subprocess.run([sys.executable, '-c', PROCESO, str(dir_fine_tuned)], cwd=BASE_DIR, env=entorno,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def test_segundo_proceso_continua_el_adaptador_publicado(tmp_path):
+    librerias = tmp_path / 'librerias'
+    librerias.mkdir()
+    for nombre, codigo in LIBRERIAS_FALSAS.items():
+        (librerias / nombre).write_text(textwrap.dedent(codigo))
+    dir_fine_tuned = tmp_path / 'modelo_fine_tuned'
+
+    primero = ejecutar_proceso(librerias, dir_fine_tuned)
+    assert primero == {'continua': False, 'origen': 'nuevo', 'entrenable': True}
+
+    segundo = ejecutar_proceso(librerias, dir_fine_tuned)
+    assert segundo == {'continua': True, 'origen': str(dir_fine_tuned), 'entrenable': True}
@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.dataset_qa import DatasetQA, FORMATO
+
+SUFIJO = " (Reglamento de Régimen Académico)"
+ENTRADAS = [
+    {'pregunta': '¿Qué dice el artículo 1?', 'contexto': 'Artículo 1', 'respuesta': 'Objeto.'},
+    {'pregunta': '¿De qué trata el artículo 1?', 'contexto': 'Artículo 1', 'respuesta': 'Objeto.'},
+    {'pregunta': '¿Qué dice el artículo 2?', 'contexto': 'Artículo 2', 'respuesta': 'Alcance.'},
+]
+
+
+def test_entradas_iguales_comparten_articulo():
+    dataset = DatasetQA.desde_entradas(ENTRADAS)
+
+    assert len(dataset) == 3
+    assert len(dataset.articulos) == 2
+    assert dataset.id_articulo.tolist() == [0, 0, 1]
+    assert list(dataset.entradas()) == ENTRADAS
+
+
+def test_guardar_y_cargar_conserva_el_dataset(tmp_path):
+    ruta = str(tmp_path / 'dataset.json')
+    dataset = DatasetQA.desde_entradas(ENTRADAS, sufijo_contexto=SUFIJO, enriquecer=True)
+    dataset = dataset.con_entradas([{'pregunta': '¿Y el 3?', 'contexto': 'Artículo 3', 'respuesta': 'Vigencia.'}])
+    dataset.guardar(ruta)
+
+    cargado = DatasetQA.cargar(ruta)
+
+    assert list(cargado.entradas()) == list(dataset.entradas())
+    assert cargado.huella() == dataset.huella()
+    assert [a.enriquecido for a in cargado.articulos] == [True, True, False]
+    assert cargado.contexto(0) == 'Artículo 1' + SUFIJO
+    assert cargado.contexto(3) == 'Artículo 3'
+    assert os.listdir(tmp_path) == ['dataset.json']
+    with open(ruta, encoding='utf-8') as f:
+        assert json.load(f)['formato'] == FORMATO
+
+
+def test_entrada_reconstruida_vuelve_a_su_articulo():
+    dataset = DatasetQA.desde_entradas(ENTRADAS, sufijo_contexto=SUFIJO, enriquecer=True)
+
+    copia = dataset.con_entradas([dataset.entrada(0)])
+
+    assert len(copia.articulos) == 2
+    assert copia.id_articulo[-1] == 0
+    assert len(dataset) == 3
+
+
+def test_carga_formatos_anteriores(tmp_path):
+    lista = tmp_path / 'lista.json'
+    lista.write_text(json.dumps(ENTRADAS), encoding='utf-8')
+    assert list(DatasetQA.cargar(str(lista)).entradas()) == ENTRADAS
+
+    # emi-qa/1: sin la marca por artículo, el sufijo se aplicaba a todos
+    v1 = tmp_path / 'v1.json'
+    v1.write_text(json.dumps({'formato': 'emi-qa/1', 'sufijo_contexto': SUFIJO,
+                              'articulos': [['Artículo 1', 'Objeto.']],
+                              'preguntas': [['¿Qué dice el artículo 1?', 0]]}), encoding='utf-8')
+    assert DatasetQA.cargar(str(v1)).contexto(0) == 'Artículo 1' + SUFIJO
+
+
+def test_huella_cambia_con_el_contenido():
+    dataset = DatasetQA.desde_entradas(ENTRADAS)
+    otro = DatasetQA.desde_entradas(ENTRADAS[:2] + [dict(ENTRADAS[2], respuesta='Otra.')])
+
+    assert dataset.huella() == DatasetQA.desde_entradas(ENTRADAS).huella()
+    assert dataset.huella() != otro.huella()
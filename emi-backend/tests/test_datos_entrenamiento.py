@@ -0,0 +1,52 @@
+import os
+import sys
+
+import numpy as np
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.datos_entrenamiento import dividir_anteriores, texto_entrada, MINIMO_REPETICION, PROPORCION_REPETICION
+
+
+def test_repeticion_separa_repaso_y_evaluacion_sin_solaparse():
+    repaso, evaluacion = dividir_anteriores(1000, 20, modo="repeticion")
+
+    assert len(repaso) == max(MINIMO_REPETICION, PROPORCION_REPETICION * 20)
+    assert len(evaluacion) == len(repaso) // 4
+    assert not set(repaso) & set(evaluacion)
+    assert np.all(np.diff(repaso) > 0) and np.all(np.diff(evaluacion) > 0)
+    assert repaso.max() < 1000 and evaluacion.max() < 1000
+
+
+def test_repeticion_con_pocos_anteriores_los_repasa_todos():
+    repaso, evaluacion = dividir_anteriores(10, 50, modo="repeticion")
+
+    assert repaso.tolist() == list(range(10))
+    assert len(evaluacion) == 0
+
+
+def test_completo_reserva_un_quinto_para_evaluar():
+    repaso, evaluacion = dividir_anteriores(1000, 20, modo="completo")
+
+    assert len(evaluacion) == 200
+    assert sorted(repaso.tolist() + evaluacion.tolist()) == list(range(1000))
+
+
+def test_division_reproducible_por_semilla():
+    primera = dividir_anteriores(500, 10, modo="repeticion", semilla=3)
+    segunda = dividir_anteriores(500, 10, modo="repeticion", semilla=3)
+    otra = dividir_anteriores(500, 10, modo="repeticion", semilla=4)
+
+    assert all(np.array_equal(a, b) for a, b in zip(primera, segunda))
+    assert not np.array_equal(primera[0], otra[0])
+
+
+def test_sin_anteriores():
+    repaso, evaluacion = dividir_anteriores(0, 5, modo="repeticion")
+
+    assert len(repaso) == len(evaluacion) == 0
+
+
+def test_texto_entrada():
+    assert texto_entrada("¿Qué dice?", "Artículo 1") == "Pregunta: ¿Qué dice?\nContexto: Artículo 1"
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import mongomock
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.guardar_mongodb import cargar_secciones, hash_seccion
+
+SECCIONES = [
+    {'documento': 'RAC-01', 'titulo': 'Artículo 1', 'contenido': 'Objeto del reglamento'},
+    {'documento': 'RAC-01', 'titulo': 'Artículo 2', 'contenido': 'Alcance'},
+    {'documento': 'RAC-02', 'titulo': 'Artículo 1', 'contenido': 'Disposiciones generales'},
+]
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient()['emi']
+
+
+def test_segunda_carga_sin_cambios_se_omite(db):
+    primera = cargar_secciones(db, 'secciones', SECCIONES, tamano_lote=2)
+    assert primera['documentos'] == 3
+    assert primera['lotes'] == 2
+
+    segunda = cargar_secciones(db, 'secciones', SECCIONES, tamano_lote=2)
+    assert segunda['lotes'] == 0
+    assert db['secciones'].count_documents({}) == 3
+
+
+def test_carga_reemplaza_la_coleccion(db):
+    cargar_secciones(db, 'secciones', SECCIONES)
+    nuevas = SECCIONES[:1] + [{'documento': 'RAC-03', 'titulo': 'Artículo 1', 'contenido': 'Nuevo'}]
+
+    reporte = cargar_secciones(db, 'secciones', nuevas)
+
+    assert reporte['lotes'] == 1
+    assert set(db['secciones'].distinct('_id')) == {hash_seccion(s) for s in nuevas}
+    assert 'secciones_carga' not in db.list_collection_names()
+
+
+def test_indices_de_la_coleccion_publicada(db):
+    cargar_secciones(db, 'secciones', SECCIONES)
+
+    claves = [indice['key'] for indice in db['secciones'].index_information().values()]
+    assert [('documento', 1), ('titulo', 1)] in claves
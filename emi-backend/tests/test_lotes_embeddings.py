@@ -0,0 +1,68 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.lotes_embeddings import AgrupadorConsultas
+
+
+def test_cada_hilo_recibe_su_resultado_y_se_agrupan():
+    lotes = []
+    barrera = threading.Barrier(16)
+
+    def procesar_lote(elementos):
+        lotes.append(list(elementos))
+        return [e * 10 for e in elementos]
+
+    agrupador = AgrupadorConsultas(procesar_lote, max_lote=8, espera_ms=50)
+
+    def enviar(i):
+        barrera.wait()
+        return agrupador.enviar(i, timeout=5)
+
+    with ThreadPoolExecutor(16) as ejecutor:
+        resultados = list(ejecutor.map(enviar, range(16)))
+
+    assert resultados == [i * 10 for i in range(16)]
+    assert sorted(e for lote in lotes for e in lote) == list(range(16))
+    assert max(len(lote) for lote in lotes) <= 8
+    assert len(lotes) < 16
+    estadisticas = agrupador.estadisticas()
+    assert estadisticas['consultas'] == 16
+    assert estadisticas['lotes'] == len(lotes)
+
+
+def test_error_del_lote_llega_a_todos_sus_hilos():
+    def procesar_lote(elementos):
+        raise RuntimeError("modelo no disponible")
+
+    agrupador = AgrupadorConsultas(procesar_lote, max_lote=4, espera_ms=20)
+
+    with ThreadPoolExecutor(4) as ejecutor:
+        futuros = [ejecutor.submit(agrupador.enviar, i, 5) for i in range(4)]
+        for futuro in futuros:
+            with pytest.raises(RuntimeError):
+                futuro.result()
+
+    # El hilo del agrupador sigue vivo después del error
+    agrupador.procesar_lote = lambda elementos: elementos
+    assert agrupador.enviar("otra", timeout=5) == "otra"
+
+
+def test_max_lote_uno_procesa_en_el_mismo_hilo():
+    hilos = []
+
+    def procesar_lote(elementos):
+        hilos.append(threading.current_thread())
+        return elementos
+
+    agrupador = AgrupadorConsultas(procesar_lote, max_lote=1)
+
+    assert agrupador.enviar("consulta") == "consulta"
+    assert hilos == [threading.current_thread()]
+    assert agrupador.estadisticas()['lotes'] == 0
@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.memoria_sesiones import (AlmacenSesiones, AlmacenSesionesMemoria, AlmacenSesionesSQLite,
+                                      crear_almacen_sesiones, nuevo_contexto)
+
+
+@pytest.fixture(params=['memoria', 'sqlite'])
+def crear_almacen(request, tmp_path):
+    def crear(ttl=1800):
+        if request.param == 'memoria':
+            return AlmacenSesionesMemoria(ttl=ttl)
+        return AlmacenSesionesSQLite(str(tmp_path / 'sesiones.sqlite3'), ttl=ttl)
+    return crear
+
+
+def test_guardar_obtener_y_eliminar(crear_almacen):
+    almacen = crear_almacen()
+    contexto = nuevo_contexto()
+    contexto['ultimo_rac'] = 'RAC-02'
+
+    almacen.guardar('a', contexto)
+    assert almacen.obtener('a') == contexto
+    assert almacen.obtener('b') is None
+
+    almacen.eliminar('a')
+    assert almacen.obtener('a') is None
+
+
+def test_obtener_devuelve_una_copia(crear_almacen):
+    almacen = crear_almacen()
+    almacen.guardar('a', nuevo_contexto())
+
+    almacen.obtener('a')['sugerencias_previas'].append('modificada')
+
+    assert almacen.obtener('a') == nuevo_contexto()
+
+
+def test_sesion_expira_tras_el_ttl(crear_almacen):
+    almacen = crear_almacen(ttl=0.05)
+    almacen.guardar('a', nuevo_contexto())
+    assert almacen.obtener('a') is not None
+
+    time.sleep(0.1)
+
+    assert almacen.obtener('a') is None
+
+
+def test_sqlite_se_comparte_entre_instancias(tmp_path):
+    ruta = str(tmp_path / 'sesiones.sqlite3')
+    AlmacenSesionesSQLite(ruta).guardar('a', {'ultimo_articulo': 'Artículo 19'})
+
+    assert AlmacenSesionesSQLite(ruta).obtener('a') == {'ultimo_articulo': 'Artículo 19'}
+
+
+def test_sqlite_purga_las_sesiones_expiradas(tmp_path):
+    almacen = AlmacenSesionesSQLite(str(tmp_path / 'sesiones.sqlite3'), ttl=0.05, purgar_cada=2)
+    almacen.guardar('vieja', nuevo_contexto())
+    time.sleep(0.1)
+    almacen.guardar('nueva', nuevo_contexto())
+
+    ids = [fila[0] for fila in almacen._conexion().execute("SELECT id FROM sesiones")]
+    assert ids == ['nueva']
+
+
+def test_interfaz_exige_implementar_todos_los_metodos():
+    class Incompleto(AlmacenSesiones):
+        def obtener(self, sesion_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Incompleto()
+
+
+def test_crear_almacen_segun_entorno(tmp_path, monkeypatch):
+    monkeypatch.delenv("SESIONES_BACKEND", raising=False)
+    assert isinstance(crear_almacen_sesiones(), AlmacenSesionesMemoria)
+
+    monkeypatch.setenv("SESIONES_BACKEND", "sqlite")
+    monkeypatch.setenv("SESIONES_SQLITE_RUTA", str(tmp_path / 'sesiones.sqlite3'))
+    assert isinstance(crear_almacen_sesiones(), AlmacenSesionesSQLite)
+
+    monkeypatch.setenv("SESIONES_BACKEND", "redis")
+    with pytest.raises(ValueError):
+        crear_almacen_sesiones()
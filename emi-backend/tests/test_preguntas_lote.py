@@ -0,0 +1,104 @@
+import os
+import re
+import sys
+import asyncio
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts import api_llm, preguntas_lote
+from scripts.preguntas_lote import responder_lote
+
+
+class ModeloFalso:
+    """Responde desde el 'dataset' solo los saludos."""
+
+    def generar_respuesta_sin_sesion(self, pregunta, usar_llm=True):
+        return "¡Hola!" if pregunta.lower().startswith("hola") else None
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Recuperación, caché, respuesta extractiva y LLM falsos; registra las consultas al LLM."""
+    registro = {'consultas': [], 'en_curso': 0, 'max_en_curso': 0, 'cache': {}}
+
+    def recuperar_contextos_lote(preguntas):
+        return [None if "clima" in p else {'ids': [len(p)], 'embedding': None, 'contexto': f"contexto de {p}"}
+                for p in preguntas]
+
+    def buscar_en_cache(pregunta, recuperacion):
+        return registro['cache'].get(api_llm.normalizar_texto(pregunta))
+
+    def guardar_en_cache(pregunta, recuperacion, respuesta):
+        if not respuesta.startswith("[ERROR]"):
+            registro['cache'][api_llm.normalizar_texto(pregunta)] = respuesta
+
+    def responder_extractivo(recuperacion, respaldo=False):
+        return "oraciones citadas" if respaldo else None
+
+    async def consultar_llm_async(pregunta, contexto):
+        registro['consultas'].append(pregunta)
+        registro['en_curso'] += 1
+        registro['max_en_curso'] = max(registro['max_en_curso'], registro['en_curso'])
+        # Las preguntas con número menor tardan más: terminan en otro orden que el de llegada
+        numero = re.search(r'\d+', pregunta)
+        await asyncio.sleep(max(0.0, 0.1 - 0.03 * int(numero.group(0))) if numero else 0.0)
+        registro['en_curso'] -= 1
+        return "[ERROR] caído" if "falla" in pregunta else f"respuesta a {pregunta}"
+
+    for nombre, funcion in [('recuperar_contextos_lote', recuperar_contextos_lote),
+                            ('buscar_en_cache', buscar_en_cache), ('guardar_en_cache', guardar_en_cache),
+                            ('responder_extractivo', responder_extractivo)]:
+        monkeypatch.setattr(preguntas_lote, nombre, funcion)
+    monkeypatch.setattr(api_llm, 'responder_extractivo', responder_extractivo)
+    monkeypatch.setattr(api_llm, 'consultar_llm_async', consultar_llm_async)
+    return registro
+
+
+def test_cada_pregunta_recibe_su_resultado(llm):
+    preguntas = ["Hola", "¿Qué dice el artículo 1?", "¿Qué dice el artículo 2?", "¿Cómo estará el clima?",
+                 "¿Qué dice el artículo 3?"]
+
+    resultados = list(responder_lote(preguntas, ModeloFalso(), concurrencia=4))
+
+    assert sorted(r['indice'] for r in resultados) == list(range(len(preguntas)))
+    por_indice = {r['indice']: r for r in resultados}
+    assert all(por_indice[i]['pregunta'] == p for i, p in enumerate(preguntas))
+    assert (por_indice[0]['respuesta'], por_indice[0]['origen']) == ("¡Hola!", 'dataset')
+    assert por_indice[3]['origen'] == 'sin_informacion'
+    for i in (1, 2, 4):
+        assert (por_indice[i]['respuesta'], por_indice[i]['origen']) == (f"respuesta a {preguntas[i]}", 'llm')
+    # Se entregan a medida que terminan, no en el orden de llegada
+    assert [r['indice'] for r in resultados if r['origen'] == 'llm'] == [4, 2, 1]
+
+
+def test_preguntas_repetidas_se_consultan_una_vez(llm):
+    preguntas = ["¿Qué dice el artículo 1?", "¿que dice el ARTICULO 1", "¿Qué dice el artículo 2?"]
+
+    resultados = sorted(responder_lote(preguntas, concurrencia=4), key=lambda r: r['indice'])
+
+    assert sorted(llm['consultas']) == ["¿Qué dice el artículo 1?", "¿Qué dice el artículo 2?"]
+    assert resultados[0]['respuesta'] == resultados[1]['respuesta'] == "respuesta a ¿Qué dice el artículo 1?"
+
+    # En un segundo lote salen de la caché
+    segundo = list(responder_lote(preguntas[:1], concurrencia=4))
+    assert segundo[0]['origen'] == 'cache'
+    assert len(llm['consultas']) == 2
+
+
+def test_concurrencia_acotada(llm):
+    preguntas = [f"¿Qué dice el artículo {i}?" for i in range(12)]
+
+    resultados = list(responder_lote(preguntas, concurrencia=3))
+
+    assert len(resultados) == 12
+    assert llm['max_en_curso'] <= 3
+
+
+def test_error_del_llm_se_reemplaza_por_el_respaldo(llm):
+    resultados = list(responder_lote(["pregunta que falla"], concurrencia=1))
+
+    assert (resultados[0]['respuesta'], resultados[0]['origen']) == ("oraciones citadas", 'respaldo')
+    assert llm['cache'] == {}
@@ -0,0 +1,48 @@
+import os
+import sys
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.recuperacion_hibrida import IndiceDisperso, fusionar_rrf
+from scripts.benchmark_recuperacion import recall_en_k
+
+
+def test_rrf_premia_los_ids_presentes_en_ambas_listas():
+    densa = [1, 2, 3, 4]
+    dispersa = [3, 5, 1]
+
+    fusion = fusionar_rrf([densa, dispersa])
+
+    assert fusion[:2] == [1, 3]
+    assert set(fusion) == {1, 2, 3, 4, 5}
+
+
+def test_rrf_con_una_lista_conserva_su_orden():
+    assert fusionar_rrf([[7, 3, 9]]) == [7, 3, 9]
+    assert fusionar_rrf([[], []]) == []
+
+
+def test_rrf_la_constante_k_suaviza_la_posicion():
+    rankings = [[1, 2, 3], [4, 5, 2]]
+    # Con k = 0 el primer puesto de una sola lista supera a dos puestos intermedios; con k = 60 no
+    assert fusionar_rrf(rankings, k=0)[0] != 2
+    assert fusionar_rrf(rankings, k=60)[0] == 2
+
+
+def test_indice_disperso_solo_devuelve_articulos_con_coincidencias():
+    documentos = ["permisos del estudiante", "inasistencias justificadas", "evaluación final del semestre"]
+    indice = IndiceDisperso(TfidfVectorizer().fit(documentos), documentos)
+
+    assert indice.buscar("permisos", 3) == [0]
+    assert indice.buscar("inasistencias justificadas del estudiante", 3) == [1, 0, 2]
+    assert indice.buscar("nada que ver", 3) == []
+
+
+def test_recall_en_k():
+    rankings = [[4, 1, 2], [9, 8, 7]]
+    relevantes = [{1}, {7}]
+
+    assert recall_en_k(rankings, relevantes, [1, 2, 3]) == {1: 0.0, 2: 0.5, 3: 1.0}
@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts import registro_corpus
+
+TEXTO_RAC03 = ("REGLAMENTO DE PRUEBA\n"
+               "Artículo 1: Objeto\nRegula las pruebas.\n"
+               "Artículo 2: Alcance\nSe aplica según el Artículo 1.\n")
+
+
+@pytest.fixture
+def datos(tmp_path, monkeypatch):
+    """data/ temporal con su corpus.json y fragmentos."""
+    ruta_registro = str(tmp_path / 'corpus.json')
+    monkeypatch.setattr(registro_corpus, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(registro_corpus, 'DIR_FRAGMENTOS', str(tmp_path / 'corpus'))
+    monkeypatch.setattr(registro_corpus, 'RUTA_REGISTRO', ruta_registro)
+    monkeypatch.setattr(registro_corpus.cargar_registro, '__defaults__', (ruta_registro,))
+    monkeypatch.setattr(registro_corpus.guardar_registro, '__defaults__', (ruta_registro,))
+    (tmp_path / 'rac03.txt').write_text(TEXTO_RAC03, encoding='utf-8')
+    return tmp_path
+
+
+def test_agregar_segmenta_la_fuente_y_registra(datos):
+    registro_corpus.agregar("RAC-03", "rac03.txt")
+
+    assert registro_corpus.cargar_registro() == [{'id': 'RAC-03', 'slug': 'rac03', 'fuente': 'rac03.txt'}]
+    assert registro_corpus.cargar_articulos(registro_corpus.cargar_registro()[0]) == [
+        {'reglamento': 'RAC-03', 'articulo': 'Artículo 1', 'titulo': 'Objeto', 'contenido': 'Regula las pruebas.'},
+        {'reglamento': 'RAC-03', 'articulo': 'Artículo 2', 'titulo': 'Alcance',
+         'contenido': 'Se aplica según el Artículo 1.'},
+    ]
+    assert registro_corpus.racs_disponibles() == ['3']
+
+
+def test_agregar_desde_articulos_extraidos_filtra_por_reglamento(datos):
+    extraidos = datos / 'extraidos.json'
+    extraidos.write_text(json.dumps([
+        {'reglamento': 'RAC-03', 'articulo': 'Artículo 1', 'titulo': 'A', 'contenido': 'a'},
+        {'reglamento': 'RAC-04', 'articulo': 'Artículo 1', 'titulo': 'B', 'contenido': 'b'},
+    ]), encoding='utf-8')
+
+    registro_corpus.agregar("RAC-03", "rac03.txt", str(extraidos))
+
+    articulos = registro_corpus.cargar_articulos(registro_corpus.cargar_registro()[0])
+    assert [a['titulo'] for a in articulos] == ['A']
+
+
+def test_quitar_borra_el_fragmento_y_deja_los_demas(datos):
+    (datos / 'rac04.txt').write_text("Artículo 1: Único\nTexto.\n", encoding='utf-8')
+    registro_corpus.agregar("RAC-03", "rac03.txt")
+    registro_corpus.agregar("RAC-04", "rac04.txt")
+
+    registro_corpus.quitar("RAC-03")
+
+    assert [r['id'] for r in registro_corpus.cargar_registro()] == ['RAC-04']
+    assert not (datos / 'corpus' / 'rac03').exists()
+    assert (datos / 'corpus' / 'rac04' / 'articulos.json').exists()
+    registro_corpus.quitar("RAC-09")
+
+
+def test_fragmentar_solo_reescribe_los_que_cambian(datos):
+    (datos / 'rac04.txt').write_text("Artículo 1: Único\nTexto.\n", encoding='utf-8')
+    registro_corpus.agregar("RAC-03", "rac03.txt")
+    registro_corpus.agregar("RAC-04", "rac04.txt")
+    rac03 = datos / 'corpus' / 'rac03' / 'articulos.json'
+    rac04 = datos / 'corpus' / 'rac04' / 'articulos.json'
+    os.utime(rac03, (0, 0))
+    os.utime(rac04, (0, 0))
+
+    (datos / 'rac04.txt').write_text("Artículo 1: Único\nTexto nuevo.\n", encoding='utf-8')
+    registro_corpus.fragmentar()
+
+    assert os.path.getmtime(rac03) == 0
+    assert os.path.getmtime(rac04) > 0
+    assert registro_corpus.cargar_articulos(registro_corpus.cargar_registro()[1])[0]['contenido'] == 'Texto nuevo.'
+
+
+def test_registro_inexistente_esta_vacio(datos):
+    assert registro_corpus.cargar_registro() == []
+    assert registro_corpus.racs_disponibles() == []
@@ -0,0 +1,98 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.respuesta_extractiva import (IndiceOraciones, construir_oraciones, dividir_oraciones,
+                                          guardar_oraciones, responder_extractivo, AVISO_RESPALDO)
+
+METADATA = [
+    {'reglamento': 'RAC-02', 'articulo': 'Artículo 19', 'titulo': 'Inasistencias',
+     'contenido': "Las inasistencias se justifican con certificado médico. El plazo es de tres días hábiles."},
+    {'reglamento': 'RAC-02', 'articulo': 'Artículo 20', 'titulo': 'Evaluación',
+     'contenido': "La evaluación es continua durante el semestre. La nota mínima de aprobación es 51."},
+]
+
+
+class ModeloFalso:
+    """Codifica cada texto como un vector de conteo de algunas palabras clave."""
+    CLAVES = ['inasistencias', 'certificado', 'plazo', 'evaluacion', 'nota', 'semestre']
+
+    def encode(self, textos, batch_size=32):
+        return [[texto.count(clave) + 0.01 for clave in self.CLAVES] for texto in textos]
+
+    def get_sentence_embedding_dimension(self):
+        return len(self.CLAVES)
+
+
+def test_dividir_oraciones_respeta_abreviaturas_y_fragmentos_cortos():
+    texto = ("Artículo 5.\nLo firma el Gral. de Brigada y el Cnl. director del instituto. "
+             "Los estudiantes deben asistir; las faltas se registran en el sistema académico.")
+
+    assert dividir_oraciones(texto) == [
+        "Artículo 5. Lo firma el Gral. de Brigada y el Cnl. director del instituto.",
+        "Los estudiantes deben asistir;",
+        "las faltas se registran en el sistema académico.",
+    ]
+
+
+def test_dividir_oraciones_une_el_resto_corto_a_la_ultima():
+    assert dividir_oraciones("La nota mínima de aprobación es 51 puntos. Fin.") == [
+        "La nota mínima de aprobación es 51 puntos. Fin."]
+    assert dividir_oraciones("Corto.") == ["Corto."]
+
+
+@pytest.fixture
+def indice(tmp_path):
+    oraciones, ids_articulo, embeddings = construir_oraciones(METADATA, ModeloFalso())
+    rutas = str(tmp_path / 'oraciones.npy'), str(tmp_path / 'oraciones.json')
+    guardar_oraciones(oraciones, ids_articulo, embeddings, {'articulos': len(METADATA)}, *rutas)
+    return IndiceOraciones(*rutas)
+
+
+def test_indice_guarda_las_oraciones_de_cada_articulo_en_orden(indice):
+    assert len(indice) == 4
+    assert indice.ids_articulo.tolist() == [0, 0, 1, 1]
+    assert np.allclose(np.linalg.norm(indice.embeddings, axis=1), 1)
+
+
+def test_mejores_solo_entre_los_articulos_recuperados(indice):
+    consulta = ModeloFalso().encode(["plazo certificado"])[0]
+
+    mejores = indice.mejores(consulta, [0], k=1)
+    assert [o['texto'] for o in mejores] == ["El plazo es de tres días hábiles."]
+
+    assert all(o['articulo'] == 1 for o in indice.mejores(consulta, [1], k=2))
+    assert indice.mejores(consulta, [7]) == []
+
+
+def test_respuesta_cita_el_articulo_y_une_oraciones_consecutivas(indice):
+    consulta = ModeloFalso().encode(["inasistencias certificado plazo"])[0]
+
+    resultado = responder_extractivo(indice, METADATA, consulta, [0, 1], k=2)
+
+    assert resultado['respuesta'] == (
+        "«Las inasistencias se justifican con certificado médico. El plazo es de tres días hábiles.»\n"
+        "— [RAC-02] Artículo 19 - Inasistencias")
+    assert [c['articulo'] for c in resultado['citas']] == [0, 0]
+    assert resultado['confianza'] == resultado['citas'][0]['similitud']
+
+
+def test_respuesta_de_respaldo_lleva_el_aviso(indice):
+    consulta = ModeloFalso().encode(["nota"])[0]
+
+    resultado = responder_extractivo(indice, METADATA, consulta, [1], k=1, aviso=AVISO_RESPALDO)
+
+    assert resultado['respuesta'].startswith(AVISO_RESPALDO + "\n\n«La nota mínima")
+    assert responder_extractivo(indice, METADATA, consulta, []) is None
+
+
+def test_archivos_que_no_corresponden(indice, tmp_path):
+    np.save(tmp_path / 'otro.npy', np.zeros((3, 6), np.float32))
+
+    with pytest.raises(ValueError):
+        IndiceOraciones(str(tmp_path / 'otro.npy'), str(tmp_path / 'oraciones.json'))
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+import run_all
+
+
+@pytest.fixture
+def proyecto(tmp_path, monkeypatch):
+    """Proyecto mínimo: dos etapas encadenadas por un archivo y un módulo compartido."""
+    (tmp_path / 'scripts').mkdir()
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'scripts' / 'comun.py').write_text("VALOR = 1\n")
+    (tmp_path / 'scripts' / 'primera.py').write_text("from scripts.comun import VALOR\n")
+    (tmp_path / 'scripts' / 'segunda.py').write_text("def main():\n    import scripts.comun\n")
+    (tmp_path / 'data' / 'fuente.txt').write_text("fuente")
+    etapas = {
+        "segunda": {"script": "scripts/segunda.py", "entradas": ["data/intermedio.txt"], "salidas": []},
+        "primera": {"script": "scripts/primera.py", "entradas": ["data/fuente.txt"],
+                    "salidas": ["data/intermedio.txt"]},
+    }
+    ejecutadas = []
+
+    def run_script(path, argumentos=()):
+        ejecutadas.append(path)
+        if path == "scripts/primera.py":
+            (tmp_path / 'data' / 'intermedio.txt').write_text("intermedio")
+        return True
+
+    monkeypatch.setattr(run_all, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(run_all, 'RUTA_ESTADO', str(tmp_path / 'data' / '.estado_pipeline.json'))
+    monkeypatch.setattr(run_all, 'ETAPAS', etapas)
+    monkeypatch.setattr(run_all, 'run_script', run_script)
+    return tmp_path, ejecutadas
+
+
+def test_modulos_locales_incluye_importaciones_bajo_demanda(proyecto):
+    assert run_all.modulos_locales("scripts/primera.py") == ["scripts/comun.py"]
+    assert run_all.modulos_locales("scripts/segunda.py") == ["scripts/comun.py"]
+
+
+def test_dependencias_por_archivos_intermedios(proyecto):
+    assert run_all.dependencias("segunda") == {"primera"}
+    assert run_all.dependencias("primera") == set()
+
+
+def test_etapas_en_orden_y_omitidas_sin_cambios(proyecto):
+    _, ejecutadas = proyecto
+    assert run_all.ejecutar_pipeline(max_paralelo=1)
+    assert ejecutadas == ["scripts/primera.py", "scripts/segunda.py"]
+
+    ejecutadas.clear()
+    assert run_all.ejecutar_pipeline(max_paralelo=1)
+    assert ejecutadas == []
+
+
+def test_cambio_en_modulo_compartido_reejecuta_las_etapas(proyecto):
+    raiz, ejecutadas = proyecto
+    run_all.ejecutar_pipeline(max_paralelo=1)
+    ejecutadas.clear()
+
+    (raiz / 'scripts' / 'comun.py').write_text("VALOR = 2\n")
+    run_all.ejecutar_pipeline(max_paralelo=1)
+
+    assert sorted(ejecutadas) == ["scripts/primera.py", "scripts/segunda.py"]
+
+
+def test_fallo_detiene_las_etapas_dependientes(proyecto, monkeypatch):
+    _, ejecutadas = proyecto
+    monkeypatch.setattr(run_all, 'run_script', lambda path, argumentos=(): ejecutadas.append(path) and False)
+
+    assert not run_all.ejecutar_pipeline(max_paralelo=1)
+    assert ejecutadas == ["scripts/primera.py"]
@@ -0,0 +1,50 @@
+import os
+import re
+import sys
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+from scripts.segmentador import segmentar_articulos
+from scripts.benchmark_segmentador import extraer_articulos_regex, reglamento_sintetico
+from scripts.preparar_datos import extraer_articulos
+
+
+def segmentar(texto, **opciones):
+    return [(titulo, cuerpo.strip()) for titulo, cuerpo in segmentar_articulos(texto, **opciones)]
+
+
+def test_coincide_con_la_regex_anterior_con_encabezados_al_inicio_de_linea():
+    texto = reglamento_sintetico(0.05, 40)
+
+    assert segmentar(texto) == extraer_articulos_regex(texto)
+
+
+def test_referencias_dentro_del_texto_no_abren_un_articulo():
+    texto = ("Preámbulo\n"
+             "Artículo 1: Objeto del reglamento.\n"
+             "ARTICULO 2 Las faltas del inciso c del Artículo 27° se sancionan.\n"
+             "  artículo 3: Vigencia.")
+
+    assert segmentar(texto) == [
+        ("Artículo 1", "Objeto del reglamento."),
+        ("ARTICULO 2", "Las faltas del inciso c del Artículo 27° se sancionan."),
+        ("artículo 3", "Vigencia."),
+    ]
+
+
+def test_patron_sin_grupo_usa_toda_la_coincidencia():
+    texto = "CAPITULO I\nuno\nCAPITULO II\ndos"
+
+    assert segmentar(texto, patron=re.compile(r'^CAPITULO \w+', re.MULTILINE)) == [
+        ("CAPITULO I", "uno"), ("CAPITULO II", "dos")]
+
+
+def test_texto_sin_encabezados():
+    assert segmentar("sin artículos numerados") == []
+
+
+def test_extraer_articulos_normaliza_y_descarta_vacios():
+    texto = "Artículo 1:\n\nArtículo 2: Texto   con\n espacios."
+
+    assert extraer_articulos(texto) == [{"titulo": "artículo 2", "contenido": "Texto con espacios."}]
@@ -0,0 +1,13 @@
+import gc
+from app import crear_app
+
+# Con preload_app (ver gunicorn.conf.py) este módulo se importa una sola vez en el proceso maestro:
+# SentenceTransformer, índice FAISS, metadatos y dataset quedan cargados antes del fork y los
+# workers comparten esas páginas en modo copy-on-write. Por eso la precarga es síncrona: un hilo
+# de calentamiento no sobreviviría al fork.
+app = crear_app(precarga="sincrona")
+
+# Mueve los objetos ya cargados a la generación permanente del GC para que las recolecciones
+# de los workers no los toquen (y no copien sus páginas).
+gc.collect()
+gc.freeze()
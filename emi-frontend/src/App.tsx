@@ -15,6 +15,8 @@ function App() {
   const [isLoading, setIsLoading] = useState<boolean>(false)
   const messagesEndRef = useRef<HTMLDivElement>(null)
   const inputRef = useRef<HTMLTextAreaElement>(null)
+  // Id de sesión devuelto por la API para conservar la memoria conversacional
+  const sesionIdRef = useRef<string | null>(null)
   const [currentTime, setCurrentTime] = useState<string>(getCurrentTime())
 
   // Función para obtener la hora actual formateada
@@ -107,10 +109,13 @@ function App() {
       const response = await fetch(`${API_URL}/preguntar`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ pregunta: input }),
+        body: JSON.stringify({ pregunta: input, sesion_id: sesionIdRef.current }),
       })
 
       const data = await response.json()
+      if (data.sesion_id) {
+        sesionIdRef.current = data.sesion_id
+      }
 
       // Añadir respuesta del asistente al chat
       const assistantMessage: Message = {